@@ -0,0 +1,132 @@
+"""Teste de carga da API HTTP do simulador (`leilao.api`).
+
+Sobe a API em outro processo (`--processos` processos numa porta livre) e
+dispara requisições de `--clientes` processos clientes, cada um com uma
+conexão keep-alive, durante `--duracao` segundos. Com `--tamanho-lote 1`
+usa `POST /simulate`; acima disso, `POST /simulate/batch`. Mostra
+requisições/s, simulações (lotes)/s e a latência p50/p95. Com `--url`,
+mede uma API já em execução.
+
+    python benchmarks/api.py
+    python benchmarks/api.py --tamanho-lote 1000 --clientes 4
+    python benchmarks/api.py --url http://127.0.0.1:8080 --duracao 30
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def lote_aleatorio(rng):
+    area = rng.randrange(35, 250)
+    return {
+        "endereco": f"Rua {rng.choice(['Augusta', 'Paulista', 'Oscar Freire'])} {rng.randrange(1, 2000)}",
+        "valor_lance": rng.randrange(150, 900) * 1000,
+        "valor_mercado": rng.randrange(300, 1500) * 1000,
+        "area_m2": area,
+        "custo_reforma_m2": rng.choice([500, 800, 1000, 1500]),
+        "iptu_mensal": rng.randrange(50, 600),
+        "condominio_mensal": rng.randrange(300, 3000),
+        "prazo_venda_meses": rng.randrange(3, 25),
+    }
+
+
+def aguardar(url, limite=30):
+    partes = urlsplit(url)
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        try:
+            conexao = http.client.HTTPConnection(partes.hostname, partes.port, timeout=1)
+            conexao.request("GET", "/health")
+            if conexao.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"API não respondeu em {url}")
+
+
+def cliente(url, tamanho_lote, duracao, semente):
+    rng = random.Random(semente)
+    partes = urlsplit(url)
+    if tamanho_lote == 1:
+        rota = "/simulate"
+        corpos = [json.dumps(lote_aleatorio(rng)).encode() for _ in range(256)]
+    else:
+        rota = "/simulate/batch"
+        corpos = [json.dumps({"lotes": [lote_aleatorio(rng) for _ in range(tamanho_lote)]}).encode() for _ in range(4)]
+    cabecalhos = {"Content-Type": "application/json"}
+    conexao = http.client.HTTPConnection(partes.hostname, partes.port, timeout=60)
+    latencias = []
+    erros = 0
+    fim = time.perf_counter() + duracao
+    i = 0
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        conexao.request("POST", rota, corpos[i % len(corpos)], cabecalhos)
+        resposta = conexao.getresponse()
+        resposta.read()
+        latencias.append(time.perf_counter() - inicio)
+        erros += resposta.status != 200
+        i += 1
+    conexao.close()
+    return latencias, erros
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="API já em execução (senão, uma é iniciada)")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="processos da API iniciada")
+    parser.add_argument("--clientes", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--tamanho-lote", type=int, default=1, help="lotes por requisição (1 = /simulate)")
+    parser.add_argument("--duracao", type=float, default=5.0, help="segundos de carga")
+    args = parser.parse_args()
+
+    servidor = None
+    url = args.url
+    if url is None:
+        porta = porta_livre()
+        url = f"http://127.0.0.1:{porta}"
+        servidor = subprocess.Popen(
+            [sys.executable, "-m", "leilao.api", "--porta", str(porta), "--processos", str(args.processos)],
+            cwd=RAIZ,
+            stdout=subprocess.DEVNULL,
+        )
+    try:
+        aguardar(url)
+        with multiprocessing.Pool(args.clientes) as pool:
+            medicoes = pool.starmap(cliente, [(url, args.tamanho_lote, args.duracao, i) for i in range(args.clientes)])
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+    latencias = sorted(l for m in medicoes for l in m[0])
+    erros = sum(m[1] for m in medicoes)
+    requisicoes = len(latencias)
+    rota = "/simulate" if args.tamanho_lote == 1 else f"/simulate/batch ({args.tamanho_lote} lotes)"
+    print(f"{rota}: {args.clientes} clientes, {'API externa' if args.url else f'{args.processos} processo(s)'}, {args.duracao:g} s")
+    print(f"  requisições  {requisicoes / args.duracao:10.1f} /s")
+    print(f"  simulações   {requisicoes * args.tamanho_lote / args.duracao:10.1f} /s")
+    print(f"  latência p50 {latencias[len(latencias) // 2] * 1000:7.2f} ms  p95 {latencias[int(0.95 * (len(latencias) - 1))] * 1000:7.2f} ms")
+    if erros:
+        print(f"  {erros} requisição(ões) com erro")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
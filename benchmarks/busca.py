@@ -0,0 +1,82 @@
+"""Vazão e latência da busca de comparáveis, sem rede.
+
+Sobe o servidor local (`leilao.servidor_local`), aponta cada provedor para ele
+e executa a busca completa (fan-out pelos portais, interpretação e extração)
+para `--enderecos` endereços distintos, com `--concorrencia` buscas
+simultâneas e sem cache. Falha (código 1) se alguma busca não devolver um
+anúncio por portal, o que serve de teste de regressão do pipeline.
+
+    python benchmarks/busca.py
+    python benchmarks/busca.py --provedor google --latencia 0.05
+    python benchmarks/busca.py --gravacoes ~/.cache/simulador_leilao/serpapi.sqlite3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leilao import servidor_local  # noqa: E402
+from leilao.busca import SITES, buscar_portais, criar_sessao  # noqa: E402
+from leilao.extracao import extrair_anuncios  # noqa: E402
+from leilao.provedores import ProvedorGoogleHtml, ProvedorPortal, ProvedorSerpApi  # noqa: E402
+
+RUAS = ["Augusta", "Paulista", "Oscar Freire", "Haddock Lobo", "Bela Cintra", "Consolação", "Frei Caneca"]
+BAIRROS = ["Consolação", "Jardins", "Pinheiros", "Moema", "Vila Mariana"]
+
+
+def criar_provedor(nome, url_base, sem_limite):
+    # Sem limite de taxa mede o pipeline; com os limites padrão mede o uso real
+    limites = {"taxa": 1e6, "rajada": 1e6, "concorrencia": 64} if sem_limite else {}
+    if nome == "serpapi":
+        return ProvedorSerpApi(f"{url_base}/search.json", **limites)
+    if nome == "google":
+        return ProvedorGoogleHtml(f"{url_base}/search", **limites)
+    return ProvedorPortal(f"{url_base}/portal/{{site}}?q={{endereco}}", **limites)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provedor", choices=["serpapi", "google", "portal"], default="serpapi")
+    parser.add_argument("--enderecos", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--latencia", type=float, default=0.0, help="latência simulada por resposta, em segundos")
+    parser.add_argument("--tamanho-pagina", type=int, default=0, help="tamanho das páginas de portal, em bytes")
+    parser.add_argument("--gravacoes", help="cache SQLite ou JSONL com respostas gravadas")
+    parser.add_argument("--com-limites", action="store_true", help="usa os limites de taxa padrão do provedor")
+    args = parser.parse_args()
+
+    gravacoes = servidor_local.carregar_gravacoes(args.gravacoes) if args.gravacoes else {}
+    servidor = servidor_local.iniciar(gravacoes=gravacoes, latencia=args.latencia, tamanho_pagina=args.tamanho_pagina)
+    provedor = criar_provedor(args.provedor, servidor.url, not args.com_limites)
+    sessao = criar_sessao(pool_maxsize=64)
+    enderecos = [f"{RUAS[i % len(RUAS)]} {100 + i} {BAIRROS[i % len(BAIRROS)]} São Paulo" for i in range(args.enderecos)]
+
+    def buscar(endereco):
+        inicio = time.perf_counter()
+        anuncios = extrair_anuncios(buscar_portais(endereco, "chave-local", sessao=sessao, cache=False, provedor=provedor))
+        return time.perf_counter() - inicio, len(anuncios)
+
+    try:
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+            medicoes = list(executor.map(buscar, enderecos))
+        total = time.perf_counter() - inicio
+    finally:
+        servidor.shutdown()
+
+    latencias = sorted(m[0] for m in medicoes)
+    incompletas = sum(1 for m in medicoes if m[1] < len(SITES))
+    print(f"provedor {args.provedor}: {len(enderecos)} buscas, {servidor.requisicoes} requisições em {total:.2f} s")
+    print(f"  vazão    {len(enderecos) / total:8.1f} buscas/s")
+    print(f"  latência p50 {statistics.median(latencias) * 1000:7.1f} ms  p95 {latencias[int(0.95 * (len(latencias) - 1))] * 1000:7.1f} ms")
+    if incompletas:
+        print(f"  {incompletas} busca(s) sem anúncio em todos os portais")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Benchmark de precisão e velocidade do extrator de preço/área.
+
+Mede dois corpora, com o valor esperado de cada snippet:
+
+- `benchmarks/snippets.jsonl`: título + snippet de anúncios no formato dos
+  portais (ZAP, VivaReal, OLX, QuintoAndar, Imovelweb), rotulados à mão, com
+  condomínio/IPTU antes do preço, aluguel, R$/m², lançamentos e buscas sem
+  preço ("preco": null);
+- um corpus sintético determinístico nos mesmos formatos ("R$ 850.000",
+  "R$ 1,2 mi", "R$ 850 mil", "R$ 8.500/m²"), maior, para medir o tempo.
+
+Outro corpus gravado pode ser passado em JSONL, uma linha por snippet:
+{"texto": "...", "preco": 850000, "area": 75}.
+
+    python benchmarks/extracao.py
+    python benchmarks/extracao.py --corpus snippets.jsonl
+    python benchmarks/extracao.py --n 5000 --gravar corpus.jsonl
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leilao.extracao import extrair  # noqa: E402
+
+CORPUS_GRAVADO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snippets.jsonl")
+
+TIPOS = ["Apartamento", "Apto", "Casa", "Cobertura", "Studio", "Sobrado"]
+BAIRROS = ["Pinheiros", "Moema", "Centro", "Savassi", "Boa Viagem", "Copacabana", "Batel"]
+
+
+def _milhar(valor):
+    return f"{valor:,.0f}".replace(",", ".")
+
+
+def _formatar_preco(rng, preco):
+    """Texto do preço num dos formatos usuais e o valor que ele representa."""
+    forma = rng.randrange(5)
+    if forma == 0:
+        return f"R$ {_milhar(preco)}", preco
+    if forma == 1:
+        return f"R$ {_milhar(preco)},00", preco
+    if forma == 2:
+        return f"R$ {preco:.0f}", preco
+    if forma == 3 and preco >= 1e6:
+        milhoes = round(preco / 1e6, 1)
+        return f"R$ {milhoes:.1f} mi".replace(".", ","), milhoes * 1e6
+    milhares = round(preco / 1e3)
+    return f"R$ {milhares} mil", milhares * 1e3
+
+
+def gerar_corpus(n=3000, seed=42):
+    """Corpus sintético rotulado: [{'texto', 'preco', 'area'}]."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        area = rng.randrange(30, 400)
+        preco_m2 = rng.randrange(40, 180) * 100
+        preco = round(area * preco_m2, -3)
+        texto_preco, preco = _formatar_preco(rng, preco)
+        partes = [
+            f"{rng.choice(TIPOS)} à venda em {rng.choice(BAIRROS)}",
+            f"{rng.randrange(1, 5)} quartos",
+            f"{area} m²" if rng.random() < 0.7 else f"{area} metros quadrados",
+        ]
+        if rng.random() < 0.3:
+            partes.append(f"Condomínio R$ {_milhar(rng.randrange(300, 3000))}")
+        if rng.random() < 0.2:
+            partes.append(f"R$ {_milhar(preco_m2)}/m²")
+        partes.insert(rng.randrange(1, len(partes) + 1), texto_preco)
+        corpus.append({"texto": " · ".join(partes), "preco": preco, "area": area})
+    return corpus
+
+
+# Abordagem anterior: lista de padrões crus, re.findall um a um
+_PADROES_LEGADOS = [r'r\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)', r'r\$\s*(\d+\.?\d*)']
+_AREA_LEGADOS = [r'(\d+)\s*m²', r'(\d+)\s*metros quadrados']
+
+
+def extrair_legado(texto):
+    texto = texto.lower()
+    preco = area = None
+    for pattern in _PADROES_LEGADOS:
+        for match in re.findall(pattern, texto):
+            try:
+                valor = float(match.replace(".", "").replace(",", "."))
+            except ValueError:
+                continue
+            if 10000 <= valor <= 50000000:
+                preco = valor
+                break
+        if preco is not None:
+            break
+    for pattern in _AREA_LEGADOS:
+        matches = re.findall(pattern, texto)
+        if matches:
+            area = float(matches[0])
+            break
+    return preco, area
+
+
+def medir(funcao, textos, repeticoes=5):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t = time.perf_counter()
+        for texto in textos:
+            funcao(texto)
+        melhor = min(melhor, time.perf_counter() - t)
+    return melhor
+
+
+def precisao(corpus, funcao):
+    acertos_preco = acertos_area = 0
+    for item in corpus:
+        preco, area = funcao(item["texto"])[:2]
+        if item.get("preco") is None:
+            acertos_preco += preco is None
+        else:
+            acertos_preco += preco is not None and abs(preco - item["preco"]) <= 0.005 * item["preco"]
+        acertos_area += item.get("area") is None or (area is not None and abs(area - item["area"]) < 0.5)
+    return acertos_preco / len(corpus), acertos_area / len(corpus)
+
+
+def ler_corpus(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+def relatar(nome, corpus, repeticoes):
+    textos = [item["texto"] for item in corpus]
+    print(f"{nome}: {len(corpus)} snippets")
+    for rotulo, funcao in (("extrator atual", extrair), ("padrões legados", extrair_legado)):
+        segundos = medir(funcao, textos, repeticoes)
+        p, a = precisao(corpus, funcao)
+        print(f"  {rotulo:<16} {segundos * 1e6 / len(textos):7.2f} µs/snippet  preço {p:6.1%}  área {a:6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS_GRAVADO, help="arquivo JSONL com snippets gravados")
+    parser.add_argument("--n", type=int, default=3000, help="tamanho do corpus sintético")
+    parser.add_argument("--gravar", help="grava o corpus usado em JSONL")
+    args = parser.parse_args()
+
+    sintetico = gerar_corpus(args.n)
+    if args.gravar:
+        with open(args.gravar, "w", encoding="utf-8") as f:
+            for item in sintetico:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    # O corpus gravado é pequeno: mais repetições para estabilizar o tempo
+    relatar(os.path.basename(args.corpus), ler_corpus(args.corpus), repeticoes=50)
+    relatar("sintético", sintetico, repeticoes=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Custo do fluxo de caixa (TIR e VPL) sobre a grade de ágios.
+
+Mede `simular` e `simular_fluxo` para a grade de ágios de 0% a 200% em passos
+de `--passo`, à vista e parcelado, e confere a TIR vetorizada contra uma
+bissecção escalar, ágio a ágio, numa amostra da grade.
+
+    python benchmarks/fluxo.py
+    python benchmarks/fluxo.py --passo 0.01 --prazo 36
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leilao.calculo import faixa_agios, simular  # noqa: E402
+from leilao.fluxo import ENTRADA_PERCENT, PARCELAS, fluxo_caixa, simular_fluxo  # noqa: E402
+
+PARAMETROS = dict(
+    valor_lance=500_000.0,
+    valor_mercado=1_000_000.0,
+    area_m2=100.0,
+    custo_reforma_m2=1_000.0,
+    iptu_mensal=100.0,
+    condominio_mensal=1_500.0,
+    assessoria_percent=6.0,
+)
+
+
+def tir_escalar(fluxo):
+    # Referência: bissecção em Python puro, um fluxo por vez
+    def vpl(taxa):
+        return sum(f / (1 + taxa) ** t for t, f in enumerate(fluxo))
+
+    baixa, alta = -0.99, 1.0
+    if not (vpl(baixa) > 0 > vpl(alta)):
+        return float("nan")
+    for _ in range(100):
+        meio = (baixa + alta) / 2
+        baixa, alta = (meio, alta) if vpl(meio) > 0 else (baixa, meio)
+    return (baixa + alta) / 2
+
+
+def medir(funcao, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--passo", type=float, default=0.1, help="passo da grade de ágios (%)")
+    parser.add_argument("--prazo", type=int, default=12, help="prazo até a venda (meses)")
+    args = parser.parse_args()
+
+    parametros = dict(PARAMETROS, prazo_venda_meses=args.prazo)
+    agios = faixa_agios(0.0, 200.0, args.passo)
+    parcelado = dict(entrada_percent=ENTRADA_PERCENT, parcelas=PARCELAS, correcao_mensal_percent=0.5)
+
+    print(f"{len(agios)} ágios, prazo de {args.prazo} meses")
+    print(f"  simular                 {medir(lambda: simular(**parametros, agio_percent=agios)):8.2f} ms")
+    print(f"  simular_fluxo à vista   {medir(lambda: simular_fluxo(parametros, agios, 10.0)):8.2f} ms")
+    print(f"  simular_fluxo parcelado {medir(lambda: simular_fluxo(parametros, agios, 10.0, **parcelado)):8.2f} ms")
+
+    amostra = agios[:: max(1, len(agios) // 50)]
+    vetorizada = simular_fluxo(parametros, amostra, **parcelado)["tir_mensal"] / 100
+    fluxos = fluxo_caixa(parametros, amostra, **parcelado)["total"]
+    referencia = np.array([tir_escalar(f) for f in fluxos])
+    erro = np.nanmax(np.abs(vetorizada - referencia))
+    print(f"  maior diferença para a TIR escalar: {erro:.2e}")
+    if erro > 1e-9 or not np.array_equal(np.isnan(vetorizada), np.isnan(referencia)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Tempo de interpretação de uma página de resultados do Google.
+
+Monta uma página no formato do Google com os resultados sintéticos do
+servidor local, cercada de scripts, estilos e navegação (como a página real),
+e compara a análise anterior (BeautifulSoup com `html.parser` da página
+inteira) com os modos de `leilao.provedores.interpretar_google`: SoupStrainer
+só nos contêineres de resultado e lxml com XPath. Um HTML salvo pode ser
+passado com `--html`.
+
+    python benchmarks/google.py
+    python benchmarks/google.py --html google_results.html
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leilao.provedores import _interpretar_google_bs4, _interpretar_google_lxml  # noqa: E402
+from leilao.servidor_local import pagina_google, resultados_sinteticos  # noqa: E402
+
+
+def pagina_sintetica():
+    resultados = pagina_google(resultados_sinteticos('site:zapimoveis.com.br "augusta 100" venda apartamento'))
+    corpo = resultados.split("<body>", 1)[1].rsplit("</body>", 1)[0]
+    script = "<script>" + "var a = {x: 1, y: [1, 2, 3]};" * 5000 + "</script>"
+    estilo = "<style>" + ".x{color:red}" * 3000 + "</style>"
+    navegacao = "".join(f'<div class="n{i}"><span><a href="/url?q={i}">link {i}</a></span></div>' for i in range(1500))
+    return f"<html><head>{script}{estilo}</head><body>{navegacao}{corpo}{script}{navegacao}</body></html>"
+
+
+def interpretar_legado(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    soup.prettify()  # a versão anterior gerava o arquivo de depuração a cada busca
+    blocos = soup.find_all("div", class_="g") or soup.find_all("div", class_="tF2Cxc")
+    return [b for b in blocos if b.find("h3") and b.find("a")]
+
+
+def medir(funcao, html, repeticoes):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(html)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, len(resultado)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--html", help="página do Google salva")
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.html:
+        with open(args.html, encoding="utf-8") as f:
+            html = f.read()
+    else:
+        html = pagina_sintetica()
+    print(f"página de {len(html) / 1024:.0f} KiB")
+    modos = [("html.parser inteiro", interpretar_legado), ("SoupStrainer", _interpretar_google_bs4)]
+    try:
+        import lxml  # noqa: F401
+        modos.append(("lxml + XPath", _interpretar_google_lxml))
+    except ImportError:
+        print("lxml não instalado; modo lxml ignorado")
+    for nome, funcao in modos:
+        segundos, n = medir(funcao, html, args.repeticoes)
+        print(f"{nome:<20} {segundos * 1000:8.1f} ms  {n} resultados")
+
+
+if __name__ == "__main__":
+    main()
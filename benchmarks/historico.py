@@ -0,0 +1,89 @@
+"""Ingestão e consulta do histórico de leilões (`leilao.historico`).
+
+Gera um CSV sintético com `--leiloes` leilões (números no padrão brasileiro,
+um quarto deles desertos), mede a ingestão para as colunas `.npy` com os
+índices pré-agregados e o tempo de `consultar` para um endereço, e confere os
+percentis do índice contra `np.quantile` sobre as colunas mapeadas em memória.
+
+    python benchmarks/historico.py
+    python benchmarks/historico.py --leiloes 5000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leilao.historico import NIVEIS, HistoricoLeiloes, faixa_area, ingerir  # noqa: E402
+
+BAIRROS = {
+    "São Paulo": ["Pinheiros", "Moema", "Tatuapé", "Itaim Bibi", "Vila Mariana", "Santana", "Centro"],
+    "Rio de Janeiro": ["Copacabana", "Tijuca", "Barra da Tijuca", "Botafogo"],
+    "Campinas": ["Cambuí", "Taquaral"],
+}
+ENDERECO = "Rua Fradique Coutinho, 100, Pinheiros, São Paulo - SP"
+
+
+def gerar_csv(caminho, n, semente=0):
+    rng = np.random.default_rng(semente)
+    pares = [(cidade, bairro) for cidade, bairros in BAIRROS.items() for bairro in bairros]
+    escolha = rng.integers(len(pares), size=n)
+    area = rng.integers(30, 300, size=n)
+    mercado = area * rng.uniform(6_000, 15_000, size=n)
+    lance = mercado * rng.choice([1.0, 0.5], size=n) * rng.uniform(0.8, 1.0, size=n)
+    arremate = np.where(rng.random(n) < 0.25, np.nan, lance * (1 + rng.gamma(2.0, 0.1, size=n)))
+
+    def brasileiro(valores):
+        return pd.Series(np.round(valores, 2)).map(lambda v: "" if np.isnan(v) else f"{v:.2f}".replace(".", ","))
+
+    pd.DataFrame({
+        "data": pd.to_datetime("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, size=n), unit="D"),
+        "cidade": [pares[i][0] for i in escolha],
+        "bairro": [pares[i][1] for i in escolha],
+        "area_m2": area,
+        "lance_inicial": brasileiro(lance),
+        "arremate": brasileiro(arremate),
+        "valor_mercado": brasileiro(mercado),
+    }).to_csv(caminho, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leiloes", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        csv = os.path.join(pasta, "leiloes.csv")
+        gerar_csv(csv, args.leiloes)
+        diretorio = os.path.join(pasta, "historico")
+        inicio = time.perf_counter()
+        ingerir([csv], diretorio)
+        print(f"{args.leiloes} leilões ({os.path.getsize(csv) / 2**20:.0f} MB de CSV)")
+        print(f"  ingestão          {time.perf_counter() - inicio:8.2f} s")
+
+        historico = HistoricoLeiloes(diretorio)
+        regiao = historico.consultar(ENDERECO, 80)
+        repeticoes = 2_000
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            historico.consultar(ENDERECO, 80)
+        print(f"  consulta          {(time.perf_counter() - inicio) / repeticoes * 1e6:8.1f} µs ({regiao.descricao}, {regiao.n} vendidos)")
+
+        colunas = historico.colunas()
+        cidades, bairros = np.array(colunas["cidade_nomes"]), np.array(colunas["bairro_nomes"])
+        agio = (colunas["arremate"] / colunas["lance_inicial"] - 1) * 100
+        grupo = (cidades[colunas["cidade"]] == "São Paulo") & (bairros[colunas["bairro"]] == "Pinheiros") & (faixa_area(colunas["area_m2"]) == faixa_area(80))
+        referencia = np.quantile(agio[grupo & np.isfinite(agio)], NIVEIS)
+        erro = np.abs(referencia - np.array(regiao.agio)).max()
+        print(f"  maior diferença para np.quantile: {erro:.1e} p.p.")
+        if erro > 1e-3:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Mede o tempo de importação a frio dos módulos do núcleo.
+
+Cada módulo é importado num interpretador novo; o script falha se algum deles
+carregar Streamlit, BeautifulSoup ou `requests`.
+
+    python benchmarks/importacao.py
+"""
+import os
+import subprocess
+import sys
+
+MODULOS = [
+    "leilao",
+    "leilao.formatacao",
+    "leilao.enderecos",
+    "leilao.extracao",
+    "leilao.cache",
+    "leilao.busca",
+    "leilao.calculo",
+    "leilao.lote",
+    "leilao.historico",
+]
+
+PROIBIDOS = ("streamlit", "bs4", "requests")
+
+MEDIR = """
+import sys, time
+t = time.perf_counter()
+import {modulo}
+ms = (time.perf_counter() - t) * 1000
+carregados = [m for m in {proibidos!r} if m in sys.modules]
+print(f"{{ms:.2f}} {{','.join(carregados)}}")
+"""
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir(modulo, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", MEDIR.format(modulo=modulo, proibidos=PROIBIDOS)],
+            capture_output=True, text=True, check=True, cwd=RAIZ,
+        ).stdout.split()
+        tempos.append(float(saida[0]))
+        carregados = saida[1] if len(saida) > 1 else ""
+    return min(tempos), carregados
+
+
+def main():
+    falhou = False
+    for modulo in MODULOS:
+        ms, carregados = medir(modulo)
+        aviso = f"  <-- carregou {carregados}" if carregados else ""
+        falhou = falhou or bool(carregados)
+        print(f"{modulo:<22} {ms:8.2f} ms{aviso}")
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
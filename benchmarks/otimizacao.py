@@ -0,0 +1,76 @@
+"""Custo do lance ótimo (`leilao.otimizacao`) na grade fina de ágios.
+
+Mede `otimizar_lance` para cada curva de chance de vitória (concorrentes,
+logística e empírica, esta com `--historico` ágios sorteados) e cada objetivo,
+na grade de 0% a 200% em passos de `--passo`, e confere o ótimo contra uma
+varredura escalar, ágio a ágio, do lucro esperado.
+
+    python benchmarks/otimizacao.py
+    python benchmarks/otimizacao.py --passo 0.01 --historico 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leilao.calculo import faixa_agios, simular  # noqa: E402
+from leilao.otimizacao import OBJETIVOS, CurvaConcorrentes, CurvaEmpirica, CurvaLogistica, otimizar_lance  # noqa: E402
+
+PARAMETROS = dict(
+    valor_lance=500_000.0,
+    valor_mercado=1_000_000.0,
+    area_m2=100.0,
+    custo_reforma_m2=1_000.0,
+    iptu_mensal=100.0,
+    condominio_mensal=1_500.0,
+    prazo_venda_meses=12,
+    assessoria_percent=6.0,
+)
+
+
+def medir(funcao, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--passo", type=float, default=0.1, help="passo da grade de ágios (%)")
+    parser.add_argument("--historico", type=int, default=5_000, help="ágios históricos da curva empírica")
+    args = parser.parse_args()
+
+    agios = faixa_agios(0.0, 200.0, args.passo)
+    historico = np.random.default_rng(0).gamma(2.0, 12.0, args.historico)
+    curvas = {
+        "concorrentes": CurvaConcorrentes(),
+        "logística": CurvaLogistica(),
+        "empírica": CurvaEmpirica(historico),
+    }
+
+    print(f"{len(agios)} ágios")
+    for nome, curva in curvas.items():
+        for objetivo in OBJETIVOS:
+            ms = medir(lambda: otimizar_lance(PARAMETROS, curva, agios, objetivo, 10.0))
+            print(f"  {nome:<13} {objetivo:<10} {ms:8.2f} ms")
+
+    # Referência: lucro esperado ágio a ágio, com simular escalar
+    curva = curvas["concorrentes"]
+    amostra = agios[:: max(1, len(agios) // 200)]
+    esperados = [float(curva([a])[0]) * float(simular(**PARAMETROS, agio_percent=a)["resultado"]) for a in amostra]
+    referencia = amostra[int(np.argmax(esperados))]
+    otimo = otimizar_lance(PARAMETROS, curva, amostra)["otimo"]
+    print(f"  ágio ótimo: vetorizado {otimo['agio_percent']:.2f}%, escalar {referencia:.2f}%")
+    if otimo["agio_percent"] != referencia:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
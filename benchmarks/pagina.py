@@ -0,0 +1,57 @@
+"""Leitura de páginas de anúncio: em fluxo com limite de bytes × download inteiro.
+
+Sobe o servidor local (`leilao.servidor_local`) com páginas de portal de
+`--tamanho` bytes, com o preço e a área no início, e compara o tempo e os
+bytes baixados por página de `leilao.pagina.ler_pagina` com a abordagem
+anterior (`requests.get` da página inteira e regex sobre o HTML todo).
+
+    python benchmarks/pagina.py
+    python benchmarks/pagina.py --tamanho 5000000 --latencia 0.02
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leilao import servidor_local  # noqa: E402
+from leilao.busca import criar_sessao  # noqa: E402
+from leilao.pagina import ler_pagina  # noqa: E402
+
+_PRECO_LEGADO = re.compile(r'r\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)', re.IGNORECASE)
+
+
+def ler_inteira(url, sessao):
+    # Abordagem anterior: página inteira decodificada e regex sobre o HTML
+    pagina = sessao.get(url, timeout=10)
+    m = _PRECO_LEGADO.search(pagina.text.lower())
+    return (float(m.group(1).replace(".", "").replace(",", ".")) if m else None), len(pagina.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanho", type=int, default=3_000_000, help="tamanho das páginas, em bytes")
+    parser.add_argument("--paginas", type=int, default=30)
+    parser.add_argument("--latencia", type=float, default=0.0)
+    args = parser.parse_args()
+
+    servidor = servidor_local.iniciar(latencia=args.latencia, tamanho_pagina=args.tamanho)
+    sessao = criar_sessao()
+    urls = [f"{servidor.url}/portal/zapimoveis.com.br?q=Rua+Augusta+{i}" for i in range(args.paginas)]
+    try:
+        for nome, ler in (("página inteira", lambda u: ler_inteira(u, sessao)),
+                          ("em fluxo", lambda u: (lambda l: (l.extracao.preco, l.bytes_lidos))(ler_pagina(u, sessao)))):
+            inicio = time.perf_counter()
+            leituras = [ler(url) for url in urls]
+            segundos = time.perf_counter() - inicio
+            achados = sum(1 for preco, _ in leituras if preco)
+            kb = sum(b for _, b in leituras) / len(leituras) / 1024
+            print(f"{nome:<15} {segundos * 1000 / len(urls):8.1f} ms/página  {kb:9.1f} KiB/página  preço em {achados}/{len(urls)}")
+    finally:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Núcleo do simulador de arremate de imóveis em leilão.
+
+O pacote não importa Streamlit, BeautifulSoup nem `requests`: a pilha de rede
+só é carregada quando uma busca é feita. Os nomes abaixo são resolvidos sob
+demanda, então `import leilao` não carrega nem o NumPy.
+"""
+import importlib
+
+_EXPORTS = {
+    "simular": "leilao.calculo",
+    "faixa_agios": "leilao.calculo",
+    "simular_fluxo": "leilao.fluxo",
+    "otimizar_lance": "leilao.otimizacao",
+    "format_number": "leilao.formatacao",
+    "parse_number": "leilao.formatacao",
+    "prepare_address": "leilao.enderecos",
+    "extrair_anuncios": "leilao.extracao",
+    "precos_unicos": "leilao.extracao",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(nome):
+    modulo = _EXPORTS.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module 'leilao' has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(modulo), nome)
+    globals()[nome] = valor
+    return valor
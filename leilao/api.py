@@ -0,0 +1,297 @@
+"""API HTTP/JSON do simulador, sem Streamlit.
+
+Rotas:
+
+- `POST /simulate`: um lote (os campos de `leilao.lote.CAMPOS`, mais
+  `agios_percent` e `comparaveis` opcionais); devolve o detalhamento de
+  custos do lance inicial e a tabela de ágios.
+- `POST /simulate/batch`: {"lotes": [...], "agios_percent": [...],
+  "comparaveis": false}; devolve {"resultados": [...]} na ordem dos lotes,
+  com {"erro": ...} nos lotes inválidos.
+- `GET /health` e `GET /metrics` (métricas do processo, formato Prometheus).
+
+Todos os lotes de uma requisição são calculados numa única chamada vetorizada
+a `simular` (lotes nas linhas, ágios nas colunas). Com `comparaveis`, a
+estimativa vem só da base local de comparáveis (`leilao.comparaveis`), sem
+rede. Com `--processos N` sobem N processos ouvindo a mesma porta
+(`SO_REUSEPORT`), cada um com um servidor multithread:
+
+    python -m leilao.api --porta 8080 --processos 4
+    curl -d '{"valor_lance": "500.000", "valor_mercado": "1.000.000"}' localhost:8080/simulate
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from leilao.calculo import simular
+from leilao.lote import AGIOS_PADRAO, CAMPOS, ler_campos
+from leilao.metricas import METRICAS, contar, medir
+
+# Campos numéricos, na ordem dos argumentos de `simular`
+CAMPOS_NUMERICOS = tuple(c for c in CAMPOS if c != "endereco")
+# Colunas da tabela de ágios devolvida para cada lote
+COLUNAS_TABELA = ("valor_arremate", "total_investido", "resultado", "percentual", "rendimento_mensal")
+
+LIMITE_CORPO = 32 * 1024 * 1024
+LIMITE_LOTES = 20_000
+LIMITE_AGIOS = 1_000
+# Células lote × ágio por requisição: cada coluna da tabela é um array desse
+# tamanho, e `simular` monta cerca de 20 delas
+LIMITE_CELULAS = 2_000_000
+
+
+class ErroRequisicao(ValueError):
+    """Requisição inválida; vira uma resposta {"erro": ...} com `status`."""
+
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def ler_agios(corpo):
+    agios = corpo.get("agios_percent", AGIOS_PADRAO)
+    if not isinstance(agios, (list, tuple)) or not 0 < len(agios) <= LIMITE_AGIOS:
+        raise ErroRequisicao(f"agios_percent deve ser uma lista com 1 a {LIMITE_AGIOS} números")
+    try:
+        return [float(a) for a in agios]
+    except (TypeError, ValueError):
+        raise ErroRequisicao("agios_percent deve conter apenas números") from None
+
+
+def _estimativa(linha):
+    # Só a base local: a API não faz buscas na rede
+    from leilao.comparaveis import base_compartilhada
+
+    estimativa = base_compartilhada().estimar(linha["endereco"], linha["area_m2"])
+    return {"valor_estimado": estimativa.valor, "n": estimativa.n, "preco_m2": estimativa.preco_m2}
+
+
+def simular_lotes(lotes, agios_percent=AGIOS_PADRAO, comparaveis=False):
+    """Resultado de cada lote, calculado numa única chamada vetorizada.
+
+    Cada resultado tem `endereco`, `parametros`, `detalhe` (colunas de
+    `simular` no lance inicial) e `agios` ({coluna: lista por ágio}); com
+    `comparaveis`, também a estimativa da base local. Lotes inválidos viram
+    {"erro": ...}.
+    """
+    resultados = []
+    validos = []
+    for lote in lotes:
+        if not isinstance(lote, dict):
+            resultados.append({"erro": "lote deve ser um objeto JSON"})
+            continue
+        linha, erro = ler_campos(lote)
+        if erro:
+            resultados.append({"endereco": linha["endereco"], "erro": erro})
+            continue
+        validos.append(len(resultados))
+        resultados.append(linha)
+    if not validos:
+        return resultados
+
+    colunas = {campo: np.array([resultados[i][campo] for i in validos]) for campo in CAMPOS_NUMERICOS}
+    detalhe = simular(**colunas, agio_percent=0.0)
+    tabela = simular(**{campo: valores[:, np.newaxis] for campo, valores in colunas.items()}, agio_percent=np.asarray(agios_percent)[np.newaxis, :])
+    # tolist() converte tudo de uma vez em floats do Python, prontos para o JSON
+    detalhe = {k: v.tolist() for k, v in detalhe.items() if k != "agio_percent"}
+    tabela = {k: tabela[k].tolist() for k in COLUNAS_TABELA}
+    agios = list(agios_percent)
+    for j, i in enumerate(validos):
+        linha = resultados[i]
+        resultado = {
+            "endereco": linha["endereco"],
+            "parametros": {campo: linha[campo] for campo in CAMPOS_NUMERICOS},
+            "detalhe": {k: v[j] for k, v in detalhe.items()},
+            "agios": {"agio_percent": agios, **{k: v[j] for k, v in tabela.items()}},
+        }
+        if comparaveis and linha["endereco"]:
+            try:
+                resultado["comparaveis"] = _estimativa(linha)
+            except Exception as e:
+                resultado["comparaveis"] = {"erro": str(e)}
+        resultados[i] = resultado
+    return resultados
+
+
+def simular_requisicao(corpo):
+    """Resposta de `POST /simulate` para o corpo JSON já decodificado."""
+    if not isinstance(corpo, dict):
+        raise ErroRequisicao("o corpo deve ser um objeto JSON")
+    resultado = simular_lotes([corpo], ler_agios(corpo), bool(corpo.get("comparaveis")))[0]
+    if "erro" in resultado:
+        raise ErroRequisicao(resultado["erro"])
+    return resultado
+
+
+def simular_lote_requisicao(corpo):
+    """Resposta de `POST /simulate/batch` para o corpo JSON já decodificado."""
+    if not isinstance(corpo, dict) or not isinstance(corpo.get("lotes"), list):
+        raise ErroRequisicao('o corpo deve ser {"lotes": [...]}')
+    if len(corpo["lotes"]) > LIMITE_LOTES:
+        raise ErroRequisicao(f"no máximo {LIMITE_LOTES} lotes por requisição", 413)
+    agios = ler_agios(corpo)
+    if len(corpo["lotes"]) * len(agios) > LIMITE_CELULAS:
+        raise ErroRequisicao(f"no máximo {LIMITE_CELULAS} combinações de lote e ágio por requisição", 413)
+    return {"resultados": simular_lotes(corpo["lotes"], agios, bool(corpo.get("comparaveis")))}
+
+
+ROTAS_POST = {
+    "/simulate": simular_requisicao,
+    "/simulate/batch": simular_lote_requisicao,
+}
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "SimuladorLeilao"
+    # Cabeçalhos e corpo saem em escritas separadas; sem isto, o Nagle espera
+    # o ACK atrasado do cliente (~40 ms) a cada resposta keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._responder(200, {"status": "ok", "pid": os.getpid()})
+        elif self.path == "/metrics":
+            self._responder(200, METRICAS.prometheus(), "text/plain; version=0.0.4")
+        else:
+            self._responder(404, {"erro": "rota desconhecida"})
+
+    def do_POST(self):
+        rota = ROTAS_POST.get(self.path)
+        if rota is None:
+            self._descartar_corpo()
+            self._responder(404, {"erro": "rota desconhecida"})
+            return
+        with medir("api", rota=self.path):
+            try:
+                resposta = rota(self._ler_json())
+                status = 200
+            except ErroRequisicao as e:
+                resposta, status = {"erro": str(e)}, e.status
+            except Exception as e:
+                resposta, status = {"erro": f"erro interno: {e}"}, 500
+            contar("requisicoes_api", rota=self.path, status=status)
+            if status == 200:
+                contar("simulacoes_api", len(resposta["resultados"]) if "resultados" in resposta else 1)
+            self._responder(status, resposta)
+
+    def _ler_json(self):
+        tamanho = self.headers.get("Content-Length")
+        if tamanho is None:
+            raise ErroRequisicao("Content-Length obrigatório", 411)
+        try:
+            tamanho = int(tamanho)
+        except ValueError:
+            raise ErroRequisicao("Content-Length inválido") from None
+        if tamanho > LIMITE_CORPO:
+            self.close_connection = True
+            raise ErroRequisicao(f"corpo maior que {LIMITE_CORPO} bytes", 413)
+        try:
+            return json.loads(self.rfile.read(tamanho))
+        except ValueError as e:
+            raise ErroRequisicao(f"JSON inválido: {e}") from None
+
+    def _descartar_corpo(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if 0 < tamanho <= LIMITE_CORPO:
+            self.rfile.read(tamanho)
+        elif tamanho:
+            self.close_connection = True
+
+    def _responder(self, status, corpo, tipo="application/json"):
+        if not isinstance(corpo, str):
+            corpo = json.dumps(corpo, ensure_ascii=False, separators=(",", ":"))
+        dados = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def criar_servidor(host="127.0.0.1", porta=8080, reutilizar_porta=False):
+    """Servidor multithread (ainda sem atender); `reutilizar_porta` liga o
+    `SO_REUSEPORT`, para vários processos dividirem a mesma porta."""
+    servidor = _Servidor((host, porta), _Manipulador, bind_and_activate=False)
+    if reutilizar_porta:
+        servidor.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    try:
+        servidor.server_bind()
+        servidor.server_activate()
+    except OSError:
+        servidor.server_close()
+        raise
+    servidor.url = f"http://{host}:{servidor.server_address[1]}"
+    return servidor
+
+
+def iniciar(porta=0, host="127.0.0.1"):
+    """Sobe o servidor numa thread e o devolve; encerre com `servidor.shutdown()`."""
+    servidor = criar_servidor(host, porta)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def _trabalhador(host, porta, reutilizar_porta):
+    servidor = criar_servidor(host, porta, reutilizar_porta)
+    # Aquece o NumPy antes da primeira requisição
+    simular_lotes([{}])
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+def servir(host="127.0.0.1", porta=8080, processos=1):
+    """Atende na porta com `processos` processos (bloqueia até Ctrl+C)."""
+    if processos > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        print("SO_REUSEPORT indisponível neste sistema; usando um único processo")
+        processos = 1
+    if processos == 1:
+        _trabalhador(host, porta, False)
+        return
+    metodo = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    contexto = multiprocessing.get_context(metodo)
+    filhos = [contexto.Process(target=_trabalhador, args=(host, porta, True), daemon=True) for _ in range(processos)]
+    for filho in filhos:
+        filho.start()
+    try:
+        while all(filho.is_alive() for filho in filhos):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for filho in filhos:
+            filho.terminate()
+            filho.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="processos atendendo a porta (padrão: CPUs)")
+    args = parser.parse_args(argv)
+    print(f"API do simulador em http://{args.host}:{args.porta} ({args.processos} processo(s))", flush=True)
+    servir(args.host, args.porta, max(1, args.processos))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Busca concorrente de anúncios nos portais.
+
+As consultas de cada portal são disparadas em paralelo sobre uma sessão HTTP
+compartilhada (pool de conexões keep-alive). A consulta em si é feita por um
+provedor (`leilao.provedores`: SerpApi por padrão, Google HTML ou a página do
+portal), cada um com timeout, limite de conexões e limitador de taxa próprios.
+As respostas ficam num cache persistente (ver `leilao.cache`), de modo que
+buscas repetidas do mesmo endereço não gastam créditos nem rede.
+
+`requests` é importado apenas ao criar a sessão HTTP, de modo que importar
+este módulo não carrega a pilha de rede.
+
+Sessão, cache e limitadores são únicos por processo e portanto compartilhados
+entre todas as sessões do Streamlit. Buscas idênticas simultâneas (vários
+analistas abrindo o mesmo lote) são agrupadas: só uma vai ao provedor e as
+demais aguardam o mesmo resultado.
+
+Cada portal tem a busca cronometrada e as consultas, erros e créditos gastos
+contados em `leilao.metricas`.
+"""
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from leilao.cache import cache_compartilhado
+from leilao.metricas import contar, medir
+from leilao.pagina import completar_com_pagina
+from leilao.provedores import CONSULTA_TEMPLATE, obter_provedor
+
+SITES = [
+    "zapimoveis.com.br",
+    "vivareal.com.br",
+    "imovelweb.com.br",
+    "olx.com.br",
+]
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+
+class VooUnico:
+    """Agrupa chamadas concorrentes com a mesma chave numa única execução."""
+
+    def __init__(self):
+        self._em_andamento = {}
+        self._lock = threading.Lock()
+        self.agrupadas = 0
+
+    def executar(self, chave, funcao, *args, **kwargs):
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = self._em_andamento[chave] = Future()
+            else:
+                self.agrupadas += 1
+        if not lider:
+            return futuro.result()
+        try:
+            futuro.set_result(funcao(*args, **kwargs))
+        except BaseException as e:
+            futuro.set_exception(e)
+        finally:
+            with self._lock:
+                del self._em_andamento[chave]
+        return futuro.result()
+
+
+VOOS = VooUnico()
+
+
+def criar_sessao(pool_maxsize=32):
+    """Cria uma sessão HTTP com pool de conexões keep-alive por host."""
+    # `requests` só é carregado quando uma busca de fato acontece
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    sessao.headers.update(HEADERS)
+    return sessao
+
+
+_sessao = None
+_sessao_lock = threading.Lock()
+
+
+def sessao_compartilhada():
+    """Sessão HTTP única do processo, criada sob demanda."""
+    global _sessao
+    with _sessao_lock:
+        if _sessao is None:
+            _sessao = criar_sessao()
+        return _sessao
+
+
+def montar_consulta(site, search_address):
+    return CONSULTA_TEMPLATE.format(site=site, endereco=search_address)
+
+
+def buscar_portal(site, search_address, api_key, sessao=None, cache=None, provedor=None):
+    """Consulta um portal e devolve a lista de resultados (`organic_results`).
+
+    `provedor` é uma instância ou um nome de `leilao.provedores.PROVEDORES`
+    (None usa o padrão, SerpApi). `cache=None` usa o cache compartilhado do
+    processo; `cache=False` desliga o cache. Se a consulta falhar, uma
+    resposta expirada ainda é aproveitada. Chamadas simultâneas para o mesmo
+    provedor, portal e endereço são agrupadas.
+    """
+    provedor = obter_provedor(provedor)
+    chave = (search_address, site, provedor.consulta)
+    return VOOS.executar(chave, _buscar_portal, site, search_address, api_key, sessao, cache, provedor)
+
+
+def _buscar_portal(site, search_address, api_key, sessao, cache, provedor):
+    if cache is None:
+        cache = cache_compartilhado()
+    if cache:
+        guardado = cache.obter(search_address, site, provedor.consulta)
+        contar("cache_buscas", resultado="acerto" if guardado is not None else "falha")
+        if guardado is not None:
+            return guardado
+    try:
+        with medir("consulta_provedor", provedor=provedor.nome, site=site):
+            organic_results = provedor.consultar(site, search_address, sessao or sessao_compartilhada(), api_key)
+    except Exception:
+        contar("erros_provedor", provedor=provedor.nome, site=site)
+        guardado = cache.obter(search_address, site, provedor.consulta, permitir_expirado=True) if cache else None
+        if guardado is None:
+            raise
+        return guardado
+    contar("consultas_provedor", provedor=provedor.nome, site=site)
+    if provedor.creditos_por_consulta:
+        contar("creditos_provedor", provedor.creditos_por_consulta, provedor=provedor.nome)
+    if cache:
+        cache.gravar(search_address, site, provedor.consulta, organic_results)
+    return organic_results
+
+
+def _buscar_e_completar(site, search_address, api_key, sessao, cache, provedor):
+    resultados = buscar_portal(site, search_address, api_key, sessao, cache, provedor)
+    return completar_com_pagina(resultados, sessao, cache=cache_compartilhado() if cache is None else cache, provedor=provedor)
+
+
+def _buscar_medindo(tarefa, site, *args):
+    with medir("busca_portal", site=site):
+        return tarefa(site, *args)
+
+
+def buscar_portais(search_address, api_key, sites=SITES, sessao=None, cache=None, provedor=None, visitar_paginas=False):
+    """Consulta todos os portais em paralelo.
+
+    Retorna um dicionário {site: organic_results | Exception}, na ordem de
+    `sites`. A latência total fica limitada pelo portal mais lento. Com
+    `visitar_paginas`, portais cujos resultados não trazem preço no snippet
+    têm as páginas dos primeiros anúncios lidas em fluxo (`leilao.pagina`).
+    """
+    sessao = sessao or sessao_compartilhada()
+    provedor = obter_provedor(provedor)
+    tarefa = _buscar_e_completar if visitar_paginas else buscar_portal
+    with ThreadPoolExecutor(max_workers=max(1, len(sites))) as executor:
+        # Cada thread roda numa cópia do contexto, para os tempos irem à rodada de quem chamou
+        futuros = {
+            site: executor.submit(contextvars.copy_context().run, _buscar_medindo, tarefa, site, search_address, api_key, sessao, cache, provedor)
+            for site in sites
+        }
+    respostas = {}
+    for site, futuro in futuros.items():
+        try:
+            respostas[site] = futuro.result()
+        except Exception as e:
+            respostas[site] = e
+    return respostas
@@ -0,0 +1,100 @@
+"""Cache persistente (SQLite) das respostas da SerpApi.
+
+As entradas são indexadas por (endereço normalizado, portal, modelo da
+consulta), expiram após `ttl` segundos e, quando o número de entradas passa de
+`max_entradas`, as menos usadas recentemente são descartadas (LRU).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CAMINHO_PADRAO = os.getenv("LEILAO_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "simulador_leilao", "serpapi.sqlite3"))
+TTL_PADRAO = float(os.getenv("LEILAO_CACHE_TTL", 7 * 24 * 3600))
+MAX_ENTRADAS_PADRAO = int(os.getenv("LEILAO_CACHE_MAX", 5000))
+
+
+class CacheRespostas:
+    """Cache chave → JSON em SQLite com TTL, despejo LRU e contadores."""
+
+    def __init__(self, caminho=CAMINHO_PADRAO, ttl=TTL_PADRAO, max_entradas=MAX_ENTRADAS_PADRAO):
+        self.caminho = caminho
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS respostas (
+                   endereco TEXT NOT NULL,
+                   site TEXT NOT NULL,
+                   consulta TEXT NOT NULL,
+                   valor TEXT NOT NULL,
+                   criado REAL NOT NULL,
+                   acessado REAL NOT NULL,
+                   PRIMARY KEY (endereco, site, consulta)
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_respostas_acessado ON respostas (acessado)")
+
+    def obter(self, endereco, site, consulta, permitir_expirado=False):
+        """Devolve o valor armazenado ou None se ausente/expirado."""
+        agora = time.time()
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT valor, criado FROM respostas WHERE endereco = ? AND site = ? AND consulta = ?",
+                (endereco, site, consulta),
+            ).fetchone()
+            if linha is None or (not permitir_expirado and agora - linha[1] > self.ttl):
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE respostas SET acessado = ? WHERE endereco = ? AND site = ? AND consulta = ?",
+                (agora, endereco, site, consulta),
+            )
+            self.hits += 1
+        return json.loads(linha[0])
+
+    def gravar(self, endereco, site, consulta, valor):
+        agora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas (endereco, site, consulta, valor, criado, acessado) VALUES (?, ?, ?, ?, ?, ?)",
+                (endereco, site, consulta, json.dumps(valor, ensure_ascii=False), agora, agora),
+            )
+            self._despejar()
+
+    def _despejar(self):
+        excesso = self._conn.execute("SELECT COUNT(*) FROM respostas").fetchone()[0] - self.max_entradas
+        if excesso > 0:
+            self._conn.execute(
+                "DELETE FROM respostas WHERE rowid IN (SELECT rowid FROM respostas ORDER BY acessado LIMIT ?)",
+                (excesso,),
+            )
+
+    def limpar_expirados(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM respostas WHERE criado < ?", (time.time() - self.ttl,))
+
+    def estatisticas(self):
+        with self._lock:
+            entradas = self._conn.execute("SELECT COUNT(*) FROM respostas").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entradas": entradas}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_compartilhado():
+    """Instância única do cache no processo, criada sob demanda."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheRespostas()
+        return _cache
@@ -0,0 +1,117 @@
+"""Modelo de custos e retorno do arremate, vetorizado com NumPy.
+
+Todas as entradas de `simular` aceitam escalares ou arrays; os arrays são
+combinados por broadcasting, de modo que uma única chamada calcula a tabela
+inteira de ágios (ou qualquer outra grade de parâmetros) de uma só vez.
+"""
+import numpy as np
+
+# Parâmetros fixos do modelo (%)
+IRPF_PERCENT = 15.0
+ITBI_PERCENT = 3.0
+REGISTRO_PERCENT = 1.0
+COMISSAO_LEILOEIRO_PERCENT = 5.0
+
+# Colunas devolvidas por `simular`, na ordem em que aparecem no detalhamento
+COLUNAS = (
+    "agio_percent",
+    "valor_arremate",
+    "ganho_capital",
+    "irpf",
+    "itbi",
+    "registro",
+    "total_tributos",
+    "comissao_leiloeiro",
+    "assessoria",
+    "total_leiloeiro_assessoria",
+    "custo_reforma",
+    "total_reforma",
+    "total_iptu",
+    "total_condominio",
+    "total_mensal",
+    "comissao_venda",
+    "total_outros_custos",
+    "total_investido",
+    "resultado",
+    "percentual",
+    "rendimento_mensal",
+)
+
+
+def faixa_agios(inicio=0.0, fim=200.0, passo=0.1):
+    """Gera a grade de ágios (%) de `inicio` a `fim`, inclusive."""
+    n = int(round((fim - inicio) / passo)) + 1
+    return np.round(inicio + passo * np.arange(n), 10)
+
+
+def retorno_mensal(percentual, prazo_venda_meses):
+    """Converte o retorno total (%) em rendimento mensal composto (%)."""
+    percentual = np.asarray(percentual, dtype=float)
+    prazo = np.asarray(prazo_venda_meses, dtype=float)
+    valido = (prazo > 0) & (percentual > -100)
+    base = np.where(valido, 1 + percentual / 100, 1.0)
+    expoente = np.where(valido, 1 / np.where(prazo > 0, prazo, 1.0), 1.0)
+    return np.where(valido, (base ** expoente - 1) * 100, 0.0)
+
+
+def simular(
+    valor_lance,
+    valor_mercado,
+    area_m2,
+    custo_reforma_m2,
+    iptu_mensal,
+    condominio_mensal,
+    prazo_venda_meses,
+    assessoria_percent=0.0,
+    comissao_venda_percent=0.0,
+    agio_percent=0.0,
+    irpf_percent=IRPF_PERCENT,
+    itbi_percent=ITBI_PERCENT,
+    registro_percent=REGISTRO_PERCENT,
+    comissao_leiloeiro_percent=COMISSAO_LEILOEIRO_PERCENT,
+):
+    """Calcula todos os custos e o resultado do arremate.
+
+    Retorna um dicionário {coluna: np.ndarray} com as chaves de `COLUNAS`.
+    Com entradas escalares cada valor é um array 0-d (use `float()`).
+    """
+    valor_lance = np.asarray(valor_lance, dtype=float)
+    valor_mercado = np.asarray(valor_mercado, dtype=float)
+    agio_percent = np.asarray(agio_percent, dtype=float)
+    prazo_venda_meses = np.asarray(prazo_venda_meses, dtype=float)
+
+    valor_arremate = valor_lance * (1 + agio_percent / 100)
+    ganho_capital = np.maximum(valor_mercado - valor_arremate, 0)
+    irpf = ganho_capital * (irpf_percent / 100)
+    itbi = valor_arremate * (itbi_percent / 100)
+    registro = valor_arremate * (registro_percent / 100)
+    total_tributos = irpf + itbi + registro
+
+    comissao_leiloeiro = valor_arremate * (comissao_leiloeiro_percent / 100)
+    assessoria = valor_arremate * (np.asarray(assessoria_percent, dtype=float) / 100)
+    total_leiloeiro_assessoria = comissao_leiloeiro + assessoria
+
+    custo_reforma = np.asarray(area_m2, dtype=float) * custo_reforma_m2
+    outros_custos = 0.0
+    total_reforma = custo_reforma + outros_custos
+
+    total_iptu = np.asarray(iptu_mensal, dtype=float) * prazo_venda_meses
+    total_condominio = np.asarray(condominio_mensal, dtype=float) * prazo_venda_meses
+    total_mensal = total_iptu + total_condominio
+
+    comissao_venda = valor_mercado * (np.asarray(comissao_venda_percent, dtype=float) / 100)
+
+    total_outros_custos = total_tributos + total_leiloeiro_assessoria + total_reforma + total_mensal + comissao_venda
+    total_investido = valor_arremate + total_outros_custos
+    resultado = valor_mercado - total_investido
+    positivo = total_investido > 0
+    percentual = np.where(positivo, resultado / np.where(positivo, total_investido, 1.0) * 100, 0.0)
+    rendimento_mensal = retorno_mensal(percentual, prazo_venda_meses)
+
+    colunas = np.broadcast_arrays(
+        agio_percent, valor_arremate, ganho_capital, irpf, itbi, registro, total_tributos,
+        comissao_leiloeiro, assessoria, total_leiloeiro_assessoria, custo_reforma, total_reforma,
+        total_iptu, total_condominio, total_mensal, comissao_venda, total_outros_custos,
+        total_investido, resultado, percentual, rendimento_mensal,
+    )
+    return dict(zip(COLUNAS, colunas))
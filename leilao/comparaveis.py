@@ -0,0 +1,189 @@
+"""Base local de anúncios comparáveis, indexada por tokens de endereço.
+
+Cada anúncio coletado nas buscas é gravado (preço, área, portal, título, link,
+endereço normalizado e data da coleta) e indexado pelos tokens do endereço:
+rua, bairro e cidade. O valor de mercado de um lote novo pode então ser
+estimado a partir dos anúncios já guardados, em milissegundos e sem rede. A
+busca ao vivo só é necessária quando a região tem poucos anúncios ou só
+anúncios antigos.
+
+Grafias diferentes do mesmo endereço caem nos mesmos comparáveis: o endereço
+é normalizado (`leilao.enderecos`) e cada palavra desconhecida é trocada pela
+palavra mais parecida já indexada ("Brigadero" → "brigadeiro"), por um índice
+de trigramas mantido em memória. Só erros de digitação são corrigidos (ver
+`leilao.enderecos.IndiceTrigramas.mais_proximo`), e os anúncios também são
+indexados pelas palavras do endereço como vieram: uma rua nova parecida com
+uma conhecida ("Augusto" e "Augusta") entra no vocabulário com a própria grafia.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from leilao.duplicatas import deduplicar
+from leilao.enderecos import TIPOS_LOGRADOURO, IndiceTrigramas, normalizar_endereco
+from leilao.estatisticas import estatisticas_comparaveis
+
+CAMINHO_PADRAO = os.getenv("LEILAO_COMPARAVEIS_PATH", os.path.join(os.path.expanduser("~"), ".cache", "simulador_leilao", "comparaveis.sqlite3"))
+IDADE_MAXIMA_PADRAO = float(os.getenv("LEILAO_COMPARAVEIS_IDADE", 30 * 24 * 3600))
+MINIMO_PADRAO = 3
+
+_PALAVRAS_VAZIAS = {"de", "da", "do", "das", "dos", "e", "em", "na", "no", "apartamento", "casa", "bloco", "sp", "rj", "mg"} | TIPOS_LOGRADOURO
+
+# Palavras mais curtas que isto não são corrigidas pelo índice de trigramas
+TAMANHO_MINIMO_CORRECAO = 4
+
+
+def tokens_endereco(endereco):
+    """Tokens de um endereço usados no índice (palavras sem números e preposições)."""
+    palavras = normalizar_endereco(endereco).split()
+    return sorted({p for p in palavras if p.isalpha() and len(p) > 1 and p not in _PALAVRAS_VAZIAS})
+
+
+class Estimativa(NamedTuple):
+    valor: Optional[float]
+    n: int
+    preco_m2: Optional[float]
+    mais_recente: Optional[float]
+    anuncios: list
+
+
+class BaseComparaveis:
+    """Armazena anúncios em SQLite e os consulta pelo índice de tokens."""
+
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._vocabulario = None
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS anuncios (
+                   id INTEGER PRIMARY KEY,
+                   link TEXT NOT NULL UNIQUE,
+                   site TEXT,
+                   title TEXT,
+                   price REAL NOT NULL,
+                   area REAL,
+                   price_per_m2 REAL,
+                   endereco TEXT NOT NULL,
+                   coletado REAL NOT NULL
+               );
+               CREATE TABLE IF NOT EXISTS tokens (
+                   token TEXT NOT NULL,
+                   anuncio_id INTEGER NOT NULL REFERENCES anuncios (id) ON DELETE CASCADE,
+                   PRIMARY KEY (token, anuncio_id)
+               ) WITHOUT ROWID;"""
+        )
+
+    def _indice_vocabulario(self):
+        # Chamado com o lock; carregado do banco na primeira consulta
+        if self._vocabulario is None:
+            self._vocabulario = IndiceTrigramas(t for (t,) in self._conn.execute("SELECT DISTINCT token FROM tokens"))
+        return self._vocabulario
+
+    def canonizar(self, endereco):
+        """Endereço normalizado, com as palavras trocadas pelas grafias já indexadas.
+
+        "R. Brigadero, nº 1.500" vira "rua brigadeiro 1500" se "brigadeiro" já
+        está na base; serve de chave para o cache de buscas e para os comparáveis.
+        """
+        palavras = normalizar_endereco(endereco).split()
+        with self._lock:
+            vocabulario = self._indice_vocabulario()
+            for i, palavra in enumerate(palavras):
+                if palavra.isalpha() and len(palavra) >= TAMANHO_MINIMO_CORRECAO and palavra not in _PALAVRAS_VAZIAS:
+                    palavras[i] = vocabulario.mais_proximo(palavra) or palavra
+        return " ".join(palavras)
+
+    def ingerir(self, anuncios, endereco, coletado=None):
+        """Grava (ou atualiza, pelo link) os anúncios encontrados para `endereco`."""
+        coletado = coletado or time.time()
+        endereco_normalizado = self.canonizar(endereco)
+        # Tokens canônicos e os da grafia original, para que uma palavra nova
+        # entre no vocabulário mesmo quando se parece com uma já conhecida
+        tokens = sorted(set(tokens_endereco(endereco_normalizado)) | set(tokens_endereco(endereco)))
+        with self._lock, self._conn:
+            vocabulario = self._indice_vocabulario()
+            for token in tokens:
+                vocabulario.adicionar(token)
+            for a in anuncios:
+                if not a.get("link") or not a.get("price"):
+                    continue
+                cursor = self._conn.execute(
+                    """INSERT INTO anuncios (link, site, title, price, area, price_per_m2, endereco, coletado)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (link) DO UPDATE SET
+                           site = excluded.site, title = excluded.title, price = excluded.price,
+                           area = excluded.area, price_per_m2 = excluded.price_per_m2,
+                           endereco = excluded.endereco, coletado = excluded.coletado
+                       RETURNING id""",
+                    (a["link"], a.get("site"), a.get("title"), a["price"], a.get("area"), a.get("price_per_m2"),
+                     endereco_normalizado, coletado),
+                )
+                anuncio_id = cursor.fetchone()[0]
+                self._conn.execute("DELETE FROM tokens WHERE anuncio_id = ?", (anuncio_id,))
+                self._conn.executemany("INSERT INTO tokens (token, anuncio_id) VALUES (?, ?)", [(t, anuncio_id) for t in tokens])
+
+    def vizinhos(self, endereco, limite=20000):
+        """Anúncios que compartilham o maior número de tokens com `endereco`."""
+        tokens = tokens_endereco(self.canonizar(endereco))
+        if not tokens:
+            return []
+        marcadores = ",".join("?" * len(tokens))
+        with self._lock:
+            linhas = self._conn.execute(
+                f"""WITH pontos AS (
+                        SELECT anuncio_id, COUNT(*) AS comuns FROM tokens
+                        WHERE token IN ({marcadores}) GROUP BY anuncio_id
+                    )
+                    SELECT a.site, a.title, a.link, a.price, a.area, a.price_per_m2, a.coletado, p.comuns
+                    FROM pontos p JOIN anuncios a ON a.id = p.anuncio_id
+                    WHERE p.comuns = (SELECT MAX(comuns) FROM pontos)
+                    ORDER BY a.coletado DESC LIMIT ?""",
+                (*tokens, limite),
+            ).fetchall()
+        colunas = ("site", "title", "link", "price", "area", "price_per_m2", "coletado", "comuns")
+        return [dict(zip(colunas, linha)) for linha in linhas]
+
+    def estimar(self, endereco, area_m2=None, idade_maxima=IDADE_MAXIMA_PADRAO):
+        """Estima o valor de mercado a partir dos anúncios próximos e recentes.
+
+        Cada imóvel conta uma vez, mesmo publicado em vários portais. Com
+        `area_m2` e anúncios com área, usa a mediana robusta do R$/m² × área;
+        caso contrário, a mediana robusta dos preços (ver `leilao.estatisticas`).
+        """
+        limite_idade = time.time() - idade_maxima
+        anuncios = deduplicar(a for a in self.vizinhos(endereco) if a["coletado"] >= limite_idade)
+        if not anuncios:
+            return Estimativa(None, 0, None, None, [])
+        estatisticas = estatisticas_comparaveis(anuncios, area_m2)
+        preco_m2 = estatisticas["preco_m2"]["mediana"] if estatisticas["preco_m2"] else None
+        return Estimativa(estatisticas["valor_estimado"], len(anuncios), preco_m2, max(a["coletado"] for a in anuncios), anuncios)
+
+    def estatisticas(self):
+        with self._lock:
+            anuncios = self._conn.execute("SELECT COUNT(*) FROM anuncios").fetchone()[0]
+            tokens = self._conn.execute("SELECT COUNT(DISTINCT token) FROM tokens").fetchone()[0]
+        return {"anuncios": anuncios, "tokens": tokens}
+
+
+def precisa_atualizar(estimativa, minimo=MINIMO_PADRAO):
+    """Verdadeiro se a região tem poucos anúncios recentes na base."""
+    return estimativa.n < minimo
+
+
+_base = None
+_base_lock = threading.Lock()
+
+
+def base_compartilhada():
+    """Instância única da base no processo, criada sob demanda."""
+    global _base
+    with _base_lock:
+        if _base is None:
+            _base = BaseComparaveis()
+        return _base
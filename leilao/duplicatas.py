@@ -0,0 +1,121 @@
+"""Detecção de anúncios quase duplicados entre portais.
+
+O mesmo imóvel costuma aparecer no Zap, no VivaReal e na OLX com títulos e
+preços ligeiramente diferentes. Dois anúncios são considerados o mesmo imóvel
+quando os preços diferem no máximo `TOLERANCIA_PRECO` e, além disso, as áreas
+coincidem ou os títulos são parecidos (SimHash de trigramas de caracteres).
+
+Os candidatos são agrupados por faixas logarítmicas de preço, de modo que só
+anúncios com preço próximo são comparados, e cada anúncio é comparado apenas
+com o primeiro anúncio (líder) de cada grupo, o que evita encadear imóveis
+diferentes. O SimHash só é calculado quando falta a área. A mesma rotina
+serve para a busca ao vivo e para a base local.
+"""
+import functools
+import hashlib
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+TOLERANCIA_PRECO = 0.02
+TOLERANCIA_AREA = 0.03
+# Distância de Hamming máxima (em 64 bits) para títulos "parecidos"
+DISTANCIA_TITULO = 10
+
+_BITS = 64
+_PALAVRAS_RUIDO = re.compile(r"\b(?:a venda|venda|vende-se|vendo|comprar|imovel|imoveis|olx|zap|vivareal|imovelweb)\b")
+
+
+def normalizar_titulo(titulo):
+    """Minúsculas, sem acentos, sem números soltos e sem palavras de portal."""
+    texto = unicodedata.normalize("NFKD", titulo or "").encode("ascii", "ignore").decode("ascii").lower()
+    texto = _PALAVRAS_RUIDO.sub(" ", texto)
+    return " ".join(re.findall(r"[a-z]+\d*|\d+m2", texto))
+
+
+@functools.lru_cache(maxsize=65536)
+def _hash_ngrama(ngrama):
+    return int.from_bytes(hashlib.blake2b(ngrama.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+@functools.lru_cache(maxsize=16384)
+def simhash(texto, n=3):
+    """SimHash de 64 bits dos n-gramas de caracteres do texto."""
+    hashes = [_hash_ngrama(texto[i:i + n]) for i in range(len(texto) - n + 1)]
+    metade = len(hashes) / 2
+    return sum(1 << bit for bit in range(_BITS) if sum(h >> bit & 1 for h in hashes) > metade)
+
+
+def simhash_titulo(anuncio):
+    return simhash(normalizar_titulo(anuncio.get("title")))
+
+
+def dominio(link):
+    host = urlsplit(link or "").netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def _proximos(a, b, tolerancia):
+    return abs(a - b) <= tolerancia * max(a, b)
+
+
+def mesmo_imovel(a, b):
+    """Critério de duplicata entre dois anúncios."""
+    if a.get("link") and a.get("link") == b.get("link"):
+        return True
+    if not _proximos(a["price"], b["price"], TOLERANCIA_PRECO):
+        return False
+    if a.get("area") and b.get("area"):
+        return _proximos(a["area"], b["area"], TOLERANCIA_AREA)
+    return (simhash_titulo(a) ^ simhash_titulo(b)).bit_count() <= DISTANCIA_TITULO
+
+
+def agrupar(anuncios):
+    """Agrupa os anúncios que representam o mesmo imóvel.
+
+    Retorna uma lista de grupos (listas de índices em `anuncios`, o líder
+    primeiro).
+    """
+    # Faixas de preço com largura igual à tolerância: duplicatas caem na
+    # mesma faixa ou numa vizinha
+    largura = math.log1p(TOLERANCIA_PRECO)
+    lideres = defaultdict(list)  # faixa -> índices dos líderes
+    grupos = {}
+    links = {}
+    for i, anuncio in enumerate(anuncios):
+        faixa = math.floor(math.log(anuncio["price"]) / largura)
+        lider = links.get(anuncio.get("link"))
+        if lider is None:
+            lider = next(
+                (j for f in (faixa - 1, faixa, faixa + 1) for j in lideres[f] if mesmo_imovel(anuncios[j], anuncio)),
+                None,
+            )
+        if lider is None:
+            lideres[faixa].append(i)
+            grupos[i] = [i]
+            lider = i
+        else:
+            grupos[lider].append(i)
+        if anuncio.get("link"):
+            links.setdefault(anuncio["link"], lider)
+    return list(grupos.values())
+
+
+def deduplicar(anuncios):
+    """Um anúncio por imóvel físico.
+
+    O representante de cada grupo é o primeiro anúncio com área (ou o
+    primeiro do grupo); ele recebe `sites` com os portais em que o imóvel
+    apareceu e `duplicatas` com o tamanho do grupo.
+    """
+    anuncios = [a for a in anuncios if a.get("price")]
+    unicos = []
+    for grupo in agrupar(anuncios):
+        membros = [anuncios[i] for i in grupo]
+        representante = dict(next((a for a in membros if a.get("area")), membros[0]))
+        representante["sites"] = sorted({a.get("site") or dominio(a.get("link")) for a in membros})
+        representante["duplicatas"] = len(membros)
+        unicos.append(representante)
+    return unicos
@@ -0,0 +1,158 @@
+"""Normalização de endereços e busca aproximada por trigramas.
+
+Os editais escrevem o mesmo endereço de muitas formas ("R. Augusta, nº 1.500",
+"RUA AUGUSTA 1500", "Av. Paulista" / "Avenida Paulista"). `normalizar_endereco`
+produz uma forma canônica: minúsculas, sem acentos nem pontuação (uma única
+passada de `str.translate` com tabela pré-computada) e com as abreviações de
+logradouro e títulos expandidas palavra a palavra. `IndiceTrigramas` encontra a
+palavra conhecida mais parecida com uma grafia nova ("Brigadero" → "brigadeiro").
+"""
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+# Letras acentuadas → sem acento, pontuação → espaço; montada uma única vez
+_TABELA = {}
+for _codigo in range(0xC0, 0x180):
+    _base = unicodedata.normalize("NFKD", chr(_codigo)).encode("ascii", "ignore").decode("ascii")
+    if _base:
+        _TABELA[_codigo] = _base.lower()
+_TABELA.update({ord(c): " " for c in ".,;:-–—/\\()[]{}\"'`´ºª°#|"})
+_TABELA.update({ord("ß"): "ss", ord("æ"): "ae", ord("ø"): "o"})
+
+ABREVIACOES = {
+    "r": "rua", "av": "avenida", "ave": "avenida", "al": "alameda", "tv": "travessa", "trav": "travessa",
+    "pca": "praca", "pc": "praca", "lgo": "largo", "lg": "largo", "estr": "estrada",
+    "rod": "rodovia", "rdv": "rodovia", "vl": "vila", "jd": "jardim", "jard": "jardim", "pq": "parque",
+    "cj": "conjunto", "conj": "conjunto", "res": "residencial", "dr": "doutor", "prof": "professor",
+    "profa": "professora", "eng": "engenheiro", "cel": "coronel", "gen": "general", "gal": "general",
+    "mal": "marechal", "brig": "brigadeiro", "cons": "conselheiro", "des": "desembargador",
+    "pres": "presidente", "sen": "senador", "dep": "deputado", "sta": "santa", "sto": "santo",
+    "apto": "apartamento", "ap": "apartamento", "bl": "bloco",
+}
+# "est." fica de fora: nos editais é tanto "estrada" quanto "estado" ou "estação"
+
+TIPOS_LOGRADOURO = {"rua", "avenida", "alameda", "travessa", "praca", "largo", "estrada", "rodovia", "viela"}
+
+# Ponto de milhar ("1.500", "12.345.678"): removido antes da tradução, para que
+# números separados por vírgula ou espaço ("nº 5, 100") continuem separados
+_PONTO_MILHAR = re.compile(r"(?<=\d)\.(?=\d{3}(?!\d))")
+
+# Marcadores de número ("nº 100", "número 100"): descartados antes de um número
+_MARCADORES_NUMERO = {"n", "no", "num", "numero"}
+
+# Uma grafia só é trocada pela conhecida se for parecida (Dice dos trigramas),
+# estiver a uma edição dela e tiver a mesma primeira e a mesma última letra:
+# erros de digitação ("brigadero") são corrigidos, mas variações de final,
+# como "augusto"/"augusta", "faria"/"farias" ou "paulistano"/"paulista" (duas
+# edições), são palavras distintas
+SIMILARIDADE_MINIMA = 0.7
+DISTANCIA_MAXIMA = 1
+
+
+def _palavras(endereco):
+    texto = (endereco or "").lower()
+    if "." in texto:
+        texto = _PONTO_MILHAR.sub("", texto)
+    return texto.translate(_TABELA).split()
+
+
+def normalizar_endereco(endereco):
+    """Forma canônica do endereço: "R. Agusta, nº 1.500" → "rua agusta 1500"."""
+    palavras = [ABREVIACOES.get(p, p) for p in _palavras(endereco)]
+    return " ".join(
+        p for i, p in enumerate(palavras)
+        if not (p in _MARCADORES_NUMERO and i + 1 < len(palavras) and palavras[i + 1].isdigit())
+    )
+
+
+def prepare_address(endereco):
+    """Endereço usado nas consultas de busca: forma canônica sem o tipo de logradouro.
+
+    Só o tipo no início é removido; no meio do endereço a palavra faz parte do
+    nome ("Travessa Estrada Santa Cruz" → "estrada santa cruz").
+    """
+    palavras = normalizar_endereco(endereco).split()
+    if len(palavras) > 1 and palavras[0] in TIPOS_LOGRADOURO:
+        palavras = palavras[1:]
+    return " ".join(palavras)
+
+
+def distancia_edicao(a, b, limite=DISTANCIA_MAXIMA):
+    """Distância de Damerau-Levenshtein (restrita) entre `a` e `b`.
+
+    Para de calcular assim que passa de `limite` e devolve `limite + 1`.
+    """
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    anterior = None
+    atual = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        antes_anterior, anterior = anterior, atual
+        atual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            custo = a[i - 1] != b[j - 1]
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                atual[j] = min(atual[j], antes_anterior[j - 2] + 1)
+        if min(atual) > limite:
+            return limite + 1
+    return min(atual[-1], limite + 1)
+
+
+def trigramas(texto):
+    """Trigramas de cada palavra, com as bordas marcadas por espaços."""
+    grams = set()
+    for palavra in texto.split():
+        palavra = f"  {palavra} "
+        grams.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return grams
+
+
+class IndiceTrigramas:
+    """Índice invertido de trigramas para achar o texto conhecido mais parecido.
+
+    A similaridade é o coeficiente de Dice entre os conjuntos de trigramas;
+    só os textos que compartilham algum trigrama com a consulta são pontuados.
+    """
+
+    def __init__(self, textos=()):
+        self._postings = defaultdict(set)
+        self._tamanhos = {}
+        for texto in textos:
+            self.adicionar(texto)
+
+    def __len__(self):
+        return len(self._tamanhos)
+
+    def __contains__(self, texto):
+        return texto in self._tamanhos
+
+    def adicionar(self, texto):
+        if texto in self._tamanhos:
+            return
+        grams = trigramas(texto)
+        self._tamanhos[texto] = len(grams)
+        for gram in grams:
+            self._postings[gram].add(texto)
+
+    def buscar(self, texto, minimo=SIMILARIDADE_MINIMA, limite=5):
+        """[(similaridade, texto)] dos textos mais parecidos, em ordem decrescente."""
+        grams = trigramas(texto)
+        comuns = Counter()
+        for gram in grams:
+            comuns.update(self._postings.get(gram, ()))
+        pontuados = ((2 * n / (len(grams) + self._tamanhos[t]), t) for t, n in comuns.items())
+        return sorted((p for p in pontuados if p[0] >= minimo), reverse=True)[:limite]
+
+    def mais_proximo(self, texto, minimo=SIMILARIDADE_MINIMA, distancia_maxima=DISTANCIA_MAXIMA):
+        """O próprio texto, se conhecido; senão o mais parecido com as mesmas
+        letras inicial e final e a até `distancia_maxima` edições, ou None."""
+        if texto in self._tamanhos:
+            return texto
+        for _, candidato in self.buscar(texto, minimo):
+            if (candidato[:1], candidato[-1:]) != (texto[:1], texto[-1:]):
+                continue
+            if distancia_edicao(texto, candidato, distancia_maxima) <= distancia_maxima:
+                return candidato
+        return None
@@ -0,0 +1,216 @@
+"""Estatísticas robustas dos preços de comparáveis.
+
+A média simples é sensível a um único anúncio de aluguel ou a uma mansão no
+meio da amostra. Aqui os valores passam por rejeição de outliers (MAD ou IQR)
+e são resumidos por mediana e média aparada. Quando há áreas, o resumo é
+feito sobre o R$/m² e escalado pela área do lote.
+
+Em `resumir`, os quantis vêm de `ResumoStreaming`, exato até `capacidade`
+valores e, acima disso, aproximado por uma amostra de reservatório, de modo
+que o mesmo código serve para poucos preços e para fluxos com milhões de
+valores. `estatisticas_comparaveis` rejeita outliers por anúncio, sobre a
+lista inteira.
+"""
+import math
+import random
+
+CAPACIDADE_PADRAO = 10000
+
+# |x - mediana| / (1,4826·MAD) acima deste limite é outlier (Iglewicz-Hoaglin)
+LIMITE_MAD = 3.5
+FATOR_IQR = 1.5
+PROPORCAO_APARADA = 0.1
+
+# Mínimo de anúncios com área para estimar pelo R$/m²
+MINIMO_COM_AREA = 2
+
+
+class ResumoStreaming:
+    """Acumula valores em fluxo e responde quantis.
+
+    Guarda todos os valores até `capacidade`; depois mantém uma amostra
+    uniforme de reservatório desse tamanho. Contagem, soma, mínimo e máximo
+    são sempre exatos.
+    """
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO, seed=0):
+        self.capacidade = capacidade
+        self.n = 0
+        self.soma = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        self._amostra = []
+        self._ordenada = True
+        self._rng = random.Random(seed)
+
+    def adicionar(self, valor):
+        self.n += 1
+        self.soma += valor
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+        if len(self._amostra) < self.capacidade:
+            self._amostra.append(valor)
+        else:
+            j = self._rng.randrange(self.n)
+            if j >= self.capacidade:
+                return
+            self._amostra[j] = valor
+        self._ordenada = False
+
+    def estender(self, valores):
+        for valor in valores:
+            self.adicionar(valor)
+        return self
+
+    @property
+    def exato(self):
+        return self.n <= self.capacidade
+
+    @property
+    def media(self):
+        return self.soma / self.n if self.n else None
+
+    def amostra(self):
+        """Valores guardados, em ordem crescente."""
+        if not self._ordenada:
+            self._amostra.sort()
+            self._ordenada = True
+        return self._amostra
+
+    def quantil(self, q):
+        """Quantil `q` (0–1) com interpolação linear."""
+        return _quantil_ordenado(self.amostra(), q)
+
+    def mediana(self):
+        return self.quantil(0.5)
+
+
+def _quantil_ordenado(valores, q):
+    if not valores:
+        return None
+    posicao = q * (len(valores) - 1)
+    baixo = math.floor(posicao)
+    alto = min(baixo + 1, len(valores) - 1)
+    return valores[baixo] + (valores[alto] - valores[baixo]) * (posicao - baixo)
+
+
+def media_aparada(valores_ordenados, proporcao=PROPORCAO_APARADA):
+    """Média descartando `proporcao` dos valores em cada ponta."""
+    n = len(valores_ordenados)
+    if not n:
+        return None
+    corte = int(n * proporcao)
+    miolo = valores_ordenados[corte:n - corte] or valores_ordenados
+    return sum(miolo) / len(miolo)
+
+
+def limites_outliers(valores_ordenados, metodo="mad"):
+    """Faixa (baixo, alto) fora da qual um valor é outlier, ou None.
+
+    `metodo` é "mad" (desvio absoluto mediano) ou "iqr" (intervalo
+    interquartil). Com menos de 3 valores ou dispersão nula não há faixa e
+    nada é rejeitado.
+    """
+    if metodo not in ("mad", "iqr"):
+        raise ValueError(f"Método de outliers desconhecido: {metodo}")
+    if len(valores_ordenados) < 3:
+        return None
+    if metodo == "iqr":
+        q1 = _quantil_ordenado(valores_ordenados, 0.25)
+        q3 = _quantil_ordenado(valores_ordenados, 0.75)
+        iqr = q3 - q1
+        return (q1 - FATOR_IQR * iqr, q3 + FATOR_IQR * iqr) if iqr else None
+    mediana = _quantil_ordenado(valores_ordenados, 0.5)
+    mad = _quantil_ordenado(sorted(abs(v - mediana) for v in valores_ordenados), 0.5)
+    if not mad:
+        return None
+    raio = LIMITE_MAD * 1.4826 * mad
+    return mediana - raio, mediana + raio
+
+
+def rejeitar_outliers(valores_ordenados, metodo="mad"):
+    """Separa (inliers, outliers) de uma lista ordenada (ver `limites_outliers`)."""
+    limites = limites_outliers(valores_ordenados, metodo)
+    if limites is None:
+        return list(valores_ordenados), []
+    baixo, alto = limites
+    dentro, fora = [], []
+    for v in valores_ordenados:
+        (dentro if baixo <= v <= alto else fora).append(v)
+    return dentro, fora
+
+
+def resumir(valores, metodo="mad", capacidade=CAPACIDADE_PADRAO):
+    """Resumo robusto de uma sequência (ou `ResumoStreaming`) de valores.
+
+    Retorna None se não houver valores; senão um dicionário com n,
+    n_considerados, rejeitados, mediana, media_aparada, media, q1, q3 e
+    exato (False quando os quantis vêm de amostra).
+    """
+    resumo = valores if isinstance(valores, ResumoStreaming) else ResumoStreaming(capacidade).estender(valores)
+    if not resumo.n:
+        return None
+    dentro, fora = rejeitar_outliers(resumo.amostra(), metodo)
+    return _resumo(dentro, fora, resumo.n, resumo.exato)
+
+
+def _resumo(dentro, fora, n, exato=True):
+    # `dentro` em ordem crescente
+    return {
+        "n": n,
+        "n_considerados": len(dentro),
+        "rejeitados": fora,
+        "mediana": _quantil_ordenado(dentro, 0.5),
+        "media_aparada": media_aparada(dentro),
+        "media": sum(dentro) / len(dentro) if dentro else None,
+        "q1": _quantil_ordenado(dentro, 0.25),
+        "q3": _quantil_ordenado(dentro, 0.75),
+        "exato": exato,
+    }
+
+
+def _preco_m2(anuncio):
+    if anuncio.get("price_per_m2"):
+        return anuncio["price_per_m2"]
+    return anuncio["price"] / anuncio["area"] if anuncio.get("area") else None
+
+
+def _dentro(valor, limites):
+    return limites is None or limites[0] <= valor <= limites[1]
+
+
+def estatisticas_comparaveis(anuncios, area_m2=None, metodo="mad"):
+    """Resume os preços dos comparáveis e estima o valor do lote.
+
+    A rejeição é por anúncio: um anúncio com preço ou R$/m² fora da faixa
+    (ver `limites_outliers`) sai das duas amostras, de modo que um preço
+    digitado errado não entra no R$/m².
+
+    Retorna {'preco': resumo, 'preco_m2': resumo | None, 'valor_estimado',
+    'base'}: com `area_m2` e ao menos `MINIMO_COM_AREA` anúncios com área, o
+    valor estimado é a mediana robusta do R$/m² × área ("m2"); caso
+    contrário, a mediana robusta dos preços ("preco").
+    """
+    anuncios = list(anuncios)
+    if not anuncios:
+        return None
+    precos_m2 = [_preco_m2(a) for a in anuncios]
+    limites_preco = limites_outliers(sorted(a["price"] for a in anuncios), metodo)
+    limites_m2 = limites_outliers(sorted(v for v in precos_m2 if v is not None), metodo)
+    mantidos, rejeitados = [], []
+    for anuncio, valor_m2 in zip(anuncios, precos_m2):
+        dentro = _dentro(anuncio["price"], limites_preco) and (valor_m2 is None or _dentro(valor_m2, limites_m2))
+        (mantidos if dentro else rejeitados).append((anuncio["price"], valor_m2))
+
+    preco = _resumo(sorted(p for p, _ in mantidos), sorted(p for p, _ in rejeitados), len(anuncios))
+    com_area = sum(v is not None for v in precos_m2)
+    preco_m2 = None
+    if sum(v is not None for _, v in mantidos) >= MINIMO_COM_AREA:
+        preco_m2 = _resumo(
+            sorted(v for _, v in mantidos if v is not None),
+            sorted(v for _, v in rejeitados if v is not None),
+            com_area,
+        )
+    if area_m2 and preco_m2 is not None:
+        return {"preco": preco, "preco_m2": preco_m2, "valor_estimado": preco_m2["mediana"] * area_m2, "base": "m2"}
+    return {"preco": preco, "preco_m2": preco_m2, "valor_estimado": preco["mediana"], "base": "preco"}
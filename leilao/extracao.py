@@ -0,0 +1,164 @@
+"""Extração de preço, área e R$/m² de títulos e snippets de anúncios.
+
+Um único padrão pré-compilado reconhece, numa só varredura do texto, preços
+("R$ 850.000", "R$ 1,2 mi", "R$ 850 mil"), preços por m² ("R$ 8.500/m²") e
+áreas ("100 m²", "85,5 metros quadrados"). Usa somente a biblioteca padrão.
+"""
+import re
+from typing import NamedTuple, Optional
+
+from leilao.duplicatas import deduplicar
+
+# Faixas plausíveis; valores fora delas são ignorados
+PRECO_MIN, PRECO_MAX = 10000, 50000000
+AREA_MIN, AREA_MAX = 10, 2000
+PRECO_M2_MIN, PRECO_M2_MAX = 500, 100000
+
+_NUMERO = r"\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:[.,]\d{1,2})?"
+
+# O lookahead inicial deixa o motor pular direto para "r" ou dígitos; o
+# lookbehind (não começar no meio de um número) só é testado nas áreas
+PADRAO = re.compile(
+    rf"""
+    (?=[r\d])(?:
+    r\$\s*(?P<valor>{_NUMERO})
+        (?:\s*(?P<mult>milh(?:ões|oes|ão|ao)|mi|mil|k)\b)?
+        (?P<por_m2>\s*/\s*m(?:²|2)(?!\w))?
+    |
+    (?<![\d.,])(?P<area>{_NUMERO})\s*(?:m²|m2\b|metros?\s+quadrados)
+    )""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Pré-filtro: sem nenhum dígito não há preço nem área a extrair
+_DIGITO = re.compile(r"\d")
+
+_MILHAR = re.compile(r"\d{1,3}(?:\.\d{3})+")
+
+_MULTIPLICADORES = {"mi": 1e6, "milhão": 1e6, "milhao": 1e6, "milhões": 1e6, "milhoes": 1e6, "mil": 1e3, "k": 1e3}
+
+
+class Extracao(NamedTuple):
+    preco: Optional[float] = None
+    area: Optional[float] = None
+    preco_m2: Optional[float] = None
+
+
+def numero_br(texto):
+    """Converte "1.234.567,89", "1,2" ou "2.5" em float.
+
+    Um ponto seguido de exatamente três dígitos é separador de milhar; caso
+    contrário é separador decimal.
+    """
+    if "," in texto:
+        inteiro, decimal = texto.split(",", 1)
+        return float(f"{inteiro.replace('.', '')}.{decimal}")
+    if "." in texto and _MILHAR.fullmatch(texto):
+        return float(texto.replace(".", ""))
+    return float(texto)
+
+
+def classificar(m):
+    valor, mult, por_m2, area = m.groups()
+    if area is not None:
+        return "area", numero_br(area)
+    valor = numero_br(valor)
+    if mult:
+        valor *= _MULTIPLICADORES[mult.lower()]
+    return ("preco_m2" if por_m2 else "preco"), valor
+
+
+def varrer(texto):
+    """Gera ('preco' | 'preco_m2' | 'area', valor) para cada ocorrência no texto."""
+    for m in PADRAO.finditer(texto):
+        yield classificar(m)
+
+
+def plausivel(tipo, valor):
+    """Se o valor está na faixa plausível do seu tipo ('preco', 'area' ou 'preco_m2')."""
+    if tipo == "preco":
+        return PRECO_MIN <= valor <= PRECO_MAX
+    if tipo == "area":
+        return AREA_MIN <= valor <= AREA_MAX
+    return PRECO_M2_MIN <= valor <= PRECO_M2_MAX
+
+
+def completar(preco=None, area=None, preco_m2=None):
+    """Extracao com o terceiro valor derivado dos outros dois, quando possível."""
+    if preco_m2 is None and preco and area:
+        preco_m2 = preco / area
+    elif preco is None and preco_m2 and area:
+        preco = preco_m2 * area
+    return Extracao(preco, area, preco_m2)
+
+
+def extrair(texto):
+    """Primeiro preço, área e R$/m² plausíveis do texto, numa única varredura.
+
+    Quando só dois dos três aparecem, o terceiro é derivado deles.
+    """
+    if not _DIGITO.search(texto):
+        return Extracao()
+    encontrados = {}
+    for m in PADRAO.finditer(texto):
+        tipo, valor = classificar(m)
+        if tipo not in encontrados and plausivel(tipo, valor):
+            encontrados[tipo] = valor
+            if len(encontrados) == 3:
+                break
+    return completar(**encontrados)
+
+
+def extract_prices_from_search(search_results):
+    """Extrai preços dos resultados da busca"""
+    prices = set()
+    for result in search_results:
+        full_text = f"{result.get('title', '')} {result.get('snippet', '')} {result.get('link', '')}"
+        for tipo, price in varrer(full_text):
+            if tipo == "preco" and 100000 <= price <= 10000000:  # Filtra preços improváveis
+                prices.add(price)
+
+    return sorted(prices)  # Remove duplicatas e ordena
+
+
+def extrair_anuncios(respostas):
+    """Extrai o primeiro preço plausível de cada portal.
+
+    Recebe o dicionário devolvido por `buscar_portais` e retorna a lista de
+    anúncios [{'price', 'area', 'price_per_m2', 'site', 'title', 'link'}];
+    portais que falharam são ignorados.
+    """
+    resultados = []
+    for site, organic_results in respostas.items():
+        if isinstance(organic_results, Exception):
+            continue
+
+        for item in organic_results:
+            title = item.get("title", "")
+            snippet = item.get("snippet", "")
+            link = item.get("link", "")
+            extracao = extrair(f"{title} {snippet}")
+            if extracao.preco is not None:
+                resultados.append({
+                    "price": extracao.preco,
+                    "area": extracao.area,
+                    "price_per_m2": extracao.preco_m2,
+                    "site": site,
+                    "title": title,
+                    "link": link,
+                })
+                break  # pega apenas primeiro preço por portal
+    return resultados
+
+
+def anuncios_unicos(resultados):
+    """Um anúncio por imóvel, unindo o mesmo imóvel publicado em vários portais.
+
+    Ver `leilao.duplicatas.deduplicar`.
+    """
+    return deduplicar(resultados)
+
+
+def precos_unicos(resultados):
+    """Preços dos anúncios, contando cada imóvel uma única vez."""
+    return [r["price"] for r in anuncios_unicos(resultados)]
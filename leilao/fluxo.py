@@ -0,0 +1,138 @@
+"""Fluxo de caixa mensal do arremate, com TIR e VPL.
+
+`simular` trata todos os custos como pagos no dia do arremate. Aqui cada
+custo entra no mês em que é pago: no mês 0 a entrada, ITBI, registro,
+comissão do leiloeiro e assessoria; o saldo do arremate em parcelas mensais
+(corrigidas sobre o saldo devedor) e quitado na venda; a reforma distribuída
+nos primeiros meses; IPTU e condomínio mês a mês; e, no mês da venda, o preço
+de venda menos a comissão de venda e o IRPF.
+
+Como em `simular`, as entradas aceitam escalares ou arrays combinados por
+broadcasting; o fluxo ganha um último eixo com os meses. Sem correção das
+parcelas, a soma do fluxo é exatamente o `resultado` de `simular`.
+"""
+import numpy as np
+
+from leilao.calculo import simular
+
+# Condições usuais de pagamento parcelado em leilão
+ENTRADA_PERCENT = 25.0
+PARCELAS = 30
+MESES_REFORMA = 3
+
+# Componentes do fluxo devolvidos por `fluxo_caixa`
+COMPONENTES = ("arremate", "despesas_arremate", "reforma", "mensais", "venda")
+
+# Intervalo de busca da TIR mensal e número de bissecções (precisão < 1e-12)
+_TIR_MINIMA = -0.99
+_TIR_MAXIMA = 1.0
+_ITERACOES = 60
+
+
+def taxa_mensal(taxa_anual_percent):
+    """Converte uma taxa anual (%) na taxa mensal equivalente (fração)."""
+    return (1 + np.asarray(taxa_anual_percent, dtype=float) / 100) ** (1 / 12) - 1
+
+
+def fluxo_caixa(
+    parametros,
+    agio_percent=0.0,
+    entrada_percent=100.0,
+    parcelas=0,
+    correcao_mensal_percent=0.0,
+    meses_reforma=MESES_REFORMA,
+):
+    """Fluxo mês a mês, por componente.
+
+    `parametros` são os argumentos de `simular` (sem o ágio). Com
+    `entrada_percent=100` o arremate é à vista; senão o restante é pago em
+    `parcelas` mensais, com `correcao_mensal_percent` sobre o saldo, e o que
+    faltar na venda é quitado nela. Retorna {componente: array (..., meses + 1)}
+    com saídas negativas e entradas positivas, mais a chave "total".
+    """
+    r = simular(**parametros, agio_percent=agio_percent)
+    prazo = np.broadcast_to(np.asarray(parametros["prazo_venda_meses"], dtype=float), r["resultado"].shape)
+    prazo = np.maximum(np.rint(prazo), 1)
+    meses = np.arange(int(prazo.max()) + 1)
+    prazo = prazo[..., np.newaxis]
+    mes = meses.reshape((1,) * (prazo.ndim - 1) + (-1,))
+
+    def coluna(nome):
+        return r[nome][..., np.newaxis]
+
+    arremate = coluna("valor_arremate")
+    entrada = arremate * min(max(entrada_percent, 0.0), 100.0) / 100
+    saldo_inicial = arremate - entrada
+    n = max(int(parcelas), 1)
+    # Saldo devedor no início de cada mês (amortização constante)
+    saldo = saldo_inicial * np.clip(1 - (mes - 1) / n, 0, 1)
+    parcela = np.where((mes >= 1) & (mes <= np.minimum(n, prazo)), saldo_inicial / n + saldo * correcao_mensal_percent / 100, 0.0)
+    quitacao = np.where(mes == prazo, saldo_inicial * np.clip(1 - prazo / n, 0, 1), 0.0)
+    fluxo_arremate = np.where(mes == 0, -entrada, 0.0) - parcela - quitacao
+
+    despesas = coluna("itbi") + coluna("registro") + coluna("total_leiloeiro_assessoria")
+    fluxo_despesas = np.where(mes == 0, -despesas, 0.0)
+
+    duracao_reforma = np.clip(np.minimum(meses_reforma, prazo), 1, None)
+    fluxo_reforma = np.where((mes >= 1) & (mes <= duracao_reforma), -coluna("total_reforma") / duracao_reforma, 0.0)
+
+    mensal = (coluna("total_iptu") + coluna("total_condominio")) / prazo
+    fluxo_mensais = np.where((mes >= 1) & (mes <= prazo), -mensal, 0.0)
+
+    valor_mercado = np.broadcast_to(np.asarray(parametros["valor_mercado"], dtype=float), r["resultado"].shape)
+    liquido_venda = valor_mercado[..., np.newaxis] - coluna("comissao_venda") - coluna("irpf")
+    fluxo_venda = np.where(mes == prazo, liquido_venda, 0.0)
+
+    fluxo = dict(zip(COMPONENTES, np.broadcast_arrays(fluxo_arremate, fluxo_despesas, fluxo_reforma, fluxo_mensais, fluxo_venda)))
+    fluxo["total"] = sum(fluxo[c] for c in COMPONENTES)
+    return fluxo
+
+
+def vpl(fluxos, taxa_mensal):
+    """Valor presente líquido de cada fluxo (último eixo = meses)."""
+    fluxos = np.asarray(fluxos, dtype=float)
+    desconto = 1 / (1 + np.asarray(taxa_mensal, dtype=float))
+    # Horner do último mês para o primeiro: sem potências, um passo por mês
+    total = np.zeros(np.broadcast_shapes(fluxos.shape[:-1], desconto.shape))
+    for mes in range(fluxos.shape[-1] - 1, -1, -1):
+        total = total * desconto + fluxos[..., mes]
+    return total
+
+
+def tir(fluxos):
+    """TIR mensal (fração) de cada fluxo, por bissecção vetorizada.
+
+    Vale para fluxos com saídas antes das entradas (VPL decrescente na taxa);
+    NaN quando não há TIR entre -99% e 100% ao mês.
+    """
+    fluxos = np.asarray(fluxos, dtype=float)
+    forma = fluxos.shape[:-1]
+    baixa = np.full(forma, _TIR_MINIMA)
+    alta = np.full(forma, _TIR_MAXIMA)
+    vpl_baixa = vpl(fluxos, baixa)
+    valida = (vpl_baixa > 0) & (vpl(fluxos, alta) < 0)
+    for _ in range(_ITERACOES):
+        meio = (baixa + alta) / 2
+        positivo = vpl(fluxos, meio) > 0
+        baixa = np.where(positivo, meio, baixa)
+        alta = np.where(positivo, alta, meio)
+    return np.where(valida, (baixa + alta) / 2, np.nan)
+
+
+def simular_fluxo(parametros, agio_percent=0.0, taxa_desconto_anual_percent=0.0, **condicoes):
+    """TIR, VPL e exposição máxima do fluxo de caixa, por ágio.
+
+    `condicoes` são as de `fluxo_caixa` (entrada, parcelas, correção, meses de
+    reforma). Retorna arrays com `tir_mensal` e `tir_anual` (%), `vpl` à taxa
+    de desconto anual informada e `exposicao_maxima` (maior saldo negativo
+    acumulado, isto é, o capital próprio necessário).
+    """
+    total = fluxo_caixa(parametros, agio_percent, **condicoes)["total"]
+    taxa = tir(total)
+    return {
+        "agio_percent": np.broadcast_to(np.asarray(agio_percent, dtype=float), total.shape[:-1]),
+        "tir_mensal": taxa * 100,
+        "tir_anual": ((1 + taxa) ** 12 - 1) * 100,
+        "vpl": vpl(total, taxa_mensal(taxa_desconto_anual_percent)),
+        "exposicao_maxima": -np.minimum(np.cumsum(total, axis=-1).min(axis=-1), 0),
+    }
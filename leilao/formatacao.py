@@ -0,0 +1,30 @@
+"""Formatação e leitura de números no padrão brasileiro (1.000.000,00)."""
+
+
+def format_number(value):
+    """Formata número com pontos a cada 3 dígitos durante digitação"""
+    if not value:
+        return ""
+    try:
+        # Remove pontos e vírgulas existentes
+        clean_value = value.replace(".", "").replace(",", "")
+        # Converte para número
+        number = int(clean_value)
+        # Formata com pontos manualmente
+        str_number = str(number)
+        parts = []
+        for i in range(len(str_number) - 1, -1, -3):
+            start = max(0, i - 2)
+            parts.append(str_number[start:i + 1])
+        return ".".join(reversed(parts))
+    except:
+        return value
+
+
+def parse_number(value):
+    """Converte string formatada para número"""
+    if not value:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(value.replace(".", "").replace(",", "."))
@@ -0,0 +1,472 @@
+"""Histórico de resultados de leilões em colunas, com percentis regionais.
+
+Uso:
+    python -m leilao.historico leiloes_2019.csv leiloes_2020.csv
+    python -m leilao.historico --consultar "Rua Fradique Coutinho, Pinheiros, São Paulo - SP" --area 80
+
+Os arquivos (.csv, ou .parquet com `pyarrow`) trazem um leilão por linha:
+`lance_inicial`, `arremate` (vazio se o leilão foi deserto), `valor_mercado`
+(avaliação, opcional), `cidade`, `bairro`, `area_m2` e `data`, com números no
+padrão brasileiro. Cada coluna vira um arquivo `.npy` na pasta do histórico,
+aberto por `np.load(mmap_mode="r")`, e a ingestão já calcula os índices
+pré-agregados: para cada cidade, bairro e faixa de área (e suas combinações),
+os quantis de 0% a 100% (de 5 em 5) do ágio do arremate, do desconto do
+arremate para o valor de mercado e do desconto do lance inicial, mais o
+número de leilões vendidos e desertos.
+
+`consultar` acha a cidade e o bairro no endereço do lote e devolve, em
+microssegundos, os percentis do grupo mais específico com pelo menos
+`minimo` leilões vendidos (bairro e faixa de área → bairro → cidade e faixa →
+cidade → todos). Esses números sugerem a faixa de ágios da tabela, o valor de
+mercado de um lote sem avaliação e a curva de chance de vitória do lance
+ótimo (`leilao.otimizacao`).
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from leilao.enderecos import IndiceTrigramas, normalizar_endereco
+
+CAMINHO_PADRAO = os.getenv("LEILAO_HISTORICO_PATH", os.path.join(os.path.expanduser("~"), ".cache", "simulador_leilao", "historico"))
+MINIMO_PADRAO = 30
+
+# Colunas guardadas e os nomes aceitos para cada uma nos arquivos de entrada
+COLUNAS = {
+    "lance_inicial": ("lance_inicial", "valor_lance", "lance"),
+    "arremate": ("arremate", "valor_arremate"),
+    "valor_mercado": ("valor_mercado", "avaliacao", "valor_avaliacao"),
+    "area_m2": ("area_m2", "area"),
+    "data": ("data", "data_leilao"),
+    "cidade": ("cidade", "municipio"),
+    "bairro": ("bairro",),
+}
+NUMERICAS = ("lance_inicial", "arremate", "valor_mercado", "area_m2")
+TEXTO = ("cidade", "bairro")
+
+# Limites das faixas de área (m²); a última faixa é aberta
+FAIXAS_AREA = (0, 40, 70, 100, 150, 250)
+NIVEIS = np.linspace(0, 1, 21)
+PERCENTIS = {"p10": 2, "p25": 5, "p50": 10, "p75": 15, "p90": 18}
+METRICAS = ("agio", "desconto", "desconto_lance")
+
+# Grupos, do mais específico ao mais geral
+NIVEIS_GRUPO = (("cidade", "bairro", "faixa"), ("cidade", "bairro"), ("cidade", "faixa"), ("cidade",), ())
+
+TAMANHO_BLOCO = 500_000
+FORMATOS_DATA = ({"format": "%d/%m/%Y"}, {"format": "%Y-%m-%d"}, {"format": "mixed", "dayfirst": True})
+
+
+class EstatisticaRegional(NamedTuple):
+    chave: str
+    descricao: str
+    n: int
+    desertos: int
+    agio: list
+    desconto: Optional[list]
+    desconto_lance: Optional[list]
+
+
+def rotulo_faixa(i):
+    if i + 1 < len(FAIXAS_AREA):
+        return f"{FAIXAS_AREA[i]}-{FAIXAS_AREA[i + 1]} m²"
+    return f"{FAIXAS_AREA[i]}+ m²"
+
+
+def faixa_area(area_m2):
+    """Índice da faixa de área (-1 sem área); aceita escalares ou arrays."""
+    area = np.asarray(area_m2, dtype=float)
+    faixa = np.searchsorted(FAIXAS_AREA, area, side="right") - 1
+    return np.where(np.isfinite(area) & (area > 0), faixa, -1)
+
+
+def percentis(quantis):
+    """{'p10', 'p25', 'p50', 'p75', 'p90'} de uma lista de quantis de `NIVEIS`."""
+    if quantis is None:
+        return None
+    return {nome: quantis[i] for nome, i in PERCENTIS.items()}
+
+
+def _numeros(serie):
+    # Mesmo formato de `parse_number` ("1.500.000,50"), vetorizado; números já lidos passam direto
+    if serie.dtype.kind in "if":
+        return serie.to_numpy(dtype=float, na_value=np.nan)
+    import pandas as pd
+
+    texto = serie.astype("string").str.strip().str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def _datas(serie):
+    # Segundos desde 1970; cada data distinta é lida uma vez, primeiro nos
+    # formatos usuais (caminho rápido do pandas) e só o resto por inferência
+    import pandas as pd
+
+    distintas, inverso = np.unique(serie.astype(str).str.strip().to_numpy(dtype=str), return_inverse=True)
+    distintas = pd.Series(distintas)
+    datas = pd.Series(pd.NaT, index=distintas.index, dtype="datetime64[ns]")
+    for formato in FORMATOS_DATA:
+        faltam = datas.isna() & (distintas != "")
+        if not faltam.any():
+            break
+        datas[faltam] = pd.to_datetime(distintas[faltam], errors="coerce", **formato)
+    segundos = ((datas - pd.Timestamp("1970-01-01")) / pd.Timedelta(seconds=1)).to_numpy(dtype=float, na_value=np.nan)
+    return segundos[inverso.reshape(-1)]
+
+
+def _ler_blocos(caminho):
+    import pandas as pd
+
+    if caminho.lower().endswith(".parquet"):
+        yield pd.read_parquet(caminho)
+        return
+    yield from pd.read_csv(caminho, dtype=str, keep_default_na=False, chunksize=TAMANHO_BLOCO, encoding="utf-8-sig")
+
+
+def ler_arquivo(caminho):
+    """Colunas (`COLUNAS`) de um arquivo de leilões: arrays de float e listas de texto."""
+    import pandas as pd
+
+    partes = {coluna: [] for coluna in COLUNAS}
+    for bloco in _ler_blocos(caminho):
+        nomes = {c.strip().lower(): c for c in bloco.columns}
+        for coluna, aceitos in COLUNAS.items():
+            origem = next((nomes[a] for a in aceitos if a in nomes), None)
+            if origem is None:
+                valores = np.full(len(bloco), np.nan) if coluna not in TEXTO else np.full(len(bloco), "", dtype=object)
+            elif coluna in NUMERICAS:
+                valores = _numeros(bloco[origem])
+            elif coluna == "data":
+                valores = _datas(bloco[origem])
+            else:
+                valores = bloco[origem].fillna("").astype(str).str.strip().to_numpy(dtype=object)
+            partes[coluna].append(valores)
+    if not partes["lance_inicial"]:
+        return {coluna: np.array([], dtype=object if coluna in TEXTO else float) for coluna in COLUNAS}
+    return {coluna: np.concatenate(blocos) for coluna, blocos in partes.items()}
+
+
+def _codificar(textos):
+    # Nomes normalizados (chaves do índice) → códigos, normalizando cada grafia
+    # distinta uma única vez; guarda a grafia mais comum de cada nome para exibição
+    originais, inverso, contagens = np.unique(np.asarray(textos, dtype=str), return_inverse=True, return_counts=True)
+    normalizados = [normalizar_endereco(t) for t in originais]
+    vocabulario = sorted(set(normalizados))
+    posicao = {nome: i for i, nome in enumerate(vocabulario)}
+    codigos = np.array([posicao[nome] for nome in normalizados], dtype=np.int32)[inverso.reshape(-1)]
+    exibicao = {}
+    for original, normalizado, n in zip(originais.tolist(), normalizados, contagens.tolist()):
+        if normalizado and n > exibicao.get(normalizado, ("", 0))[1]:
+            exibicao[normalizado] = (original, n)
+    return vocabulario, codigos, {nome: grafia for nome, (grafia, _) in exibicao.items()}
+
+
+def _quantis_por_grupo(grupos, valores):
+    # Quantis (interpolação linear, como np.quantile) de todos os grupos numa passada
+    validos = np.isfinite(valores)
+    grupos, valores = grupos[validos], valores[validos]
+    if not len(grupos):
+        return np.array([], dtype=np.int64), np.empty((0, len(NIVEIS)))
+    ordem = np.lexsort((valores, grupos))
+    grupos, valores = grupos[ordem], valores[ordem]
+    unicos, inicio, n = np.unique(grupos, return_index=True, return_counts=True)
+    posicao = inicio[:, np.newaxis] + NIVEIS[np.newaxis, :] * (n[:, np.newaxis] - 1)
+    baixo = np.floor(posicao).astype(np.int64)
+    fracao = posicao - baixo
+    alto = np.minimum(baixo + 1, (inicio + n - 1)[:, np.newaxis])
+    return unicos, valores[baixo] * (1 - fracao) + valores[alto] * fracao
+
+
+def _metricas(colunas):
+    lance, arremate, mercado = colunas["lance_inicial"], colunas["arremate"], colunas["valor_mercado"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        com_lance = np.where(lance > 0, lance, np.nan)
+        com_mercado = np.where(mercado > 0, mercado, np.nan)
+        return {
+            "agio": (arremate / com_lance - 1) * 100,
+            "desconto": (1 - arremate / com_mercado) * 100,
+            "desconto_lance": (1 - lance / com_mercado) * 100,
+        }
+
+
+def agregar(colunas):
+    """Índices pré-agregados e grafias dos nomes: ({chave: {'n', 'desertos',
+    'agio', 'desconto', 'desconto_lance'}}, {nome normalizado: grafia}).
+
+    A chave é "cidade|bairro|faixa" com os nomes normalizados e "" nos campos
+    que o grupo não usa (o grupo "||" é o histórico inteiro).
+    """
+    cidades, codigo_cidade, nomes_cidades = _codificar(colunas["cidade"])
+    bairros, codigo_bairro, nomes_bairros = _codificar(colunas["bairro"])
+    faixa = faixa_area(colunas["area_m2"])
+    metricas = _metricas(colunas)
+    com_lance = colunas["lance_inicial"] > 0
+    vendido = com_lance & np.isfinite(metricas["agio"])
+    deserto = com_lance & ~np.isfinite(colunas["arremate"])
+
+    campos = {"cidade": (codigo_cidade, len(cidades), cidades), "bairro": (codigo_bairro, len(bairros), bairros), "faixa": (faixa, len(FAIXAS_AREA), None)}
+    indice = {}
+    for nivel in NIVEIS_GRUPO:
+        grupo = np.zeros(len(faixa), dtype=np.int64)
+        presente = np.ones(len(faixa), dtype=bool)
+        for campo in nivel:
+            codigos, tamanho, vocabulario = campos[campo]
+            grupo = grupo * (tamanho + 1) + codigos + 1
+            presente &= codigos >= 0 if vocabulario is None else np.asarray([v != "" for v in vocabulario])[codigos]
+
+        def chave(codigo):
+            partes = {}
+            for campo in reversed(nivel):
+                _, tamanho, vocabulario = campos[campo]
+                codigo, resto = divmod(codigo, tamanho + 1)
+                partes[campo] = vocabulario[resto - 1] if vocabulario is not None else str(resto - 1)
+            return "|".join(partes.get(campo, "") for campo in ("cidade", "bairro", "faixa"))
+
+        unicos, vendidos = np.unique(grupo[presente & vendido], return_counts=True)
+        desertos_unicos, desertos = np.unique(grupo[presente & deserto], return_counts=True)
+        desertos = dict(zip(desertos_unicos.tolist(), desertos.tolist()))
+        grupos = {int(g): {"n": int(n), "desertos": desertos.get(int(g), 0)} for g, n in zip(unicos, vendidos)}
+        for metrica in METRICAS:
+            valores = np.where(presente & vendido, metricas[metrica], np.nan)
+            for g, quantis in zip(*_quantis_por_grupo(grupo, valores)):
+                grupos[int(g)][metrica] = np.round(quantis, 4).tolist()
+        for g, estatistica in grupos.items():
+            indice[chave(g)] = {"desconto": None, "desconto_lance": None, **estatistica}
+    return indice, {**nomes_bairros, **nomes_cidades}
+
+
+def _carregar_colunas(diretorio):
+    if not os.path.exists(os.path.join(diretorio, "indice.json")):
+        return None
+    colunas = {coluna: np.load(os.path.join(diretorio, f"{coluna}.npy")) for coluna in NUMERICAS + ("data",)}
+    for coluna in TEXTO:
+        with open(os.path.join(diretorio, f"{coluna}.json"), encoding="utf-8") as f:
+            vocabulario = np.array(json.load(f), dtype=object)
+        colunas[coluna] = vocabulario[np.load(os.path.join(diretorio, f"{coluna}.npy"))] if len(vocabulario) else np.array([], dtype=object)
+    return colunas
+
+
+def ingerir(arquivos, diretorio=CAMINHO_PADRAO, substituir=False):
+    """Acrescenta os leilões de `arquivos` ao histórico e recalcula os índices.
+
+    Linhas repetidas (entre os arquivos ou já no histórico) contam uma vez.
+    A pasta é trocada de uma vez no fim, sem afetar quem já a está lendo.
+    Devolve o número de leilões no histórico.
+    """
+    import pandas as pd
+
+    partes = [] if substituir else [c for c in [_carregar_colunas(diretorio)] if c is not None]
+    partes += [ler_arquivo(caminho) for caminho in arquivos]
+    quadro = pd.concat([pd.DataFrame(p) for p in partes], ignore_index=True) if partes else pd.DataFrame(columns=list(COLUNAS))
+    quadro = quadro.drop_duplicates(ignore_index=True)
+    colunas = {coluna: quadro[coluna].to_numpy(dtype=object if coluna in TEXTO else float) for coluna in COLUNAS}
+    indice, nomes = agregar(colunas)
+
+    temporario = f"{diretorio.rstrip(os.sep)}.{os.getpid()}.tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+    for coluna in NUMERICAS + ("data",):
+        np.save(os.path.join(temporario, f"{coluna}.npy"), colunas[coluna])
+    for coluna in TEXTO:
+        vocabulario, codigos = np.unique(colunas[coluna].astype(str), return_inverse=True)
+        np.save(os.path.join(temporario, f"{coluna}.npy"), codigos.astype(np.int32))
+        with open(os.path.join(temporario, f"{coluna}.json"), "w", encoding="utf-8") as f:
+            json.dump(vocabulario.tolist(), f, ensure_ascii=False)
+    with open(os.path.join(temporario, "indice.json"), "w", encoding="utf-8") as f:
+        json.dump({"leiloes": len(quadro), "gerado": time.time(), "nomes": nomes, "grupos": indice}, f, ensure_ascii=False)
+
+    antigo = f"{diretorio.rstrip(os.sep)}.{os.getpid()}.old"
+    if os.path.exists(diretorio):
+        os.replace(diretorio, antigo)
+    os.makedirs(os.path.dirname(os.path.abspath(diretorio)), exist_ok=True)
+    os.replace(temporario, diretorio)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return len(quadro)
+
+
+class HistoricoLeiloes:
+    """Consulta os índices pré-agregados de uma pasta de histórico."""
+
+    def __init__(self, diretorio=CAMINHO_PADRAO):
+        self.diretorio = diretorio
+        self._lock = threading.Lock()
+        self._versao = None
+        self._indice = {}
+        self._nomes = {}
+        self._leiloes = 0
+        self._cidades = IndiceTrigramas()
+        self._bairros = {}
+
+    def _atualizar(self):
+        # Chamado com o lock; relê o índice só quando a pasta foi reingerida
+        caminho = os.path.join(self.diretorio, "indice.json")
+        try:
+            versao = os.stat(caminho).st_mtime_ns
+        except OSError:
+            versao = None
+        if versao == self._versao:
+            return
+        dados = {"grupos": {}, "nomes": {}, "leiloes": 0}
+        if versao is not None:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        self._indice = dados["grupos"]
+        self._nomes = dados["nomes"]
+        self._leiloes = dados["leiloes"]
+        self._cidades = IndiceTrigramas()
+        self._bairros = {}
+        for chave in self._indice:
+            cidade, bairro, _ = chave.split("|")
+            if cidade:
+                self._cidades.adicionar(cidade)
+            if cidade and bairro:
+                self._bairros.setdefault(cidade, IndiceTrigramas()).adicionar(bairro)
+        self._versao = versao
+
+    @property
+    def disponivel(self):
+        """Verdadeiro se já há leilões ingeridos."""
+        with self._lock:
+            self._atualizar()
+            return bool(self._indice)
+
+    def colunas(self):
+        """Colunas brutas do histórico, mapeadas em memória (None se vazio)."""
+        if not os.path.exists(os.path.join(self.diretorio, "indice.json")):
+            return None
+        colunas = {coluna: np.load(os.path.join(self.diretorio, f"{coluna}.npy"), mmap_mode="r") for coluna in NUMERICAS + ("data",)}
+        for coluna in TEXTO:
+            with open(os.path.join(self.diretorio, f"{coluna}.json"), encoding="utf-8") as f:
+                colunas[f"{coluna}_nomes"] = json.load(f)
+            colunas[coluna] = np.load(os.path.join(self.diretorio, f"{coluna}.npy"), mmap_mode="r")
+        return colunas
+
+    def localizar(self, endereco):
+        """(cidade, bairro) normalizados encontrados no endereço; "" quando não achados.
+
+        O endereço é lido em partes separadas por vírgula ou " - ", como em
+        "Rua X, 123, Pinheiros, São Paulo - SP"; grafias próximas valem.
+        """
+        partes = [normalizar_endereco(p) for p in re.split(r",| - ", endereco or "")]
+        partes = [p for p in partes if p and not p.isdigit()]
+        with self._lock:
+            self._atualizar()
+            cidade = next((c for c in (self._cidades.mais_proximo(p) for p in reversed(partes)) if c), "")
+            bairros = self._bairros.get(cidade)
+            bairro = ""
+            if bairros is not None:
+                bairro = next((b for b in (bairros.mais_proximo(p) for p in reversed(partes) if p != cidade) if b), "")
+        return cidade, bairro
+
+    def consultar(self, endereco=None, area_m2=None, cidade=None, bairro=None, minimo=MINIMO_PADRAO):
+        """Percentis do grupo mais específico com `minimo` leilões vendidos.
+
+        Cidade e bairro vêm do `endereco` (ou dos argumentos, já
+        normalizados); sem nenhum grupo com `minimo`, usa o histórico inteiro.
+        Devolve uma `EstatisticaRegional`, ou None se o histórico está vazio.
+        """
+        if endereco is not None and cidade is None:
+            cidade, bairro = self.localizar(endereco)
+        cidade, bairro = cidade or "", bairro or ""
+        faixa = int(faixa_area(area_m2 if area_m2 else np.nan))
+        candidatas = []
+        if cidade:
+            if bairro:
+                if faixa >= 0:
+                    candidatas.append((cidade, bairro, faixa))
+                candidatas.append((cidade, bairro, None))
+            if faixa >= 0:
+                candidatas.append((cidade, "", faixa))
+            candidatas.append((cidade, "", None))
+        candidatas.append(("", "", None))
+        with self._lock:
+            self._atualizar()
+            indice, nomes = self._indice, self._nomes
+        for i, (c, b, f) in enumerate(candidatas):
+            chave = f"{c}|{b}|{'' if f is None else f}"
+            grupo = indice.get(chave)
+            if grupo is None or (grupo["n"] < minimo and i + 1 < len(candidatas)):
+                continue
+            partes = [nomes.get(b, b), nomes.get(c, c), rotulo_faixa(f) if f is not None else ""]
+            descricao = ", ".join(p for p in partes if p) or "todos os leilões"
+            return EstatisticaRegional(chave, descricao, grupo["n"], grupo["desertos"], grupo["agio"], grupo["desconto"], grupo["desconto_lance"])
+        return None
+
+    def estatisticas(self):
+        with self._lock:
+            self._atualizar()
+            return {"leiloes": self._leiloes, "grupos": len(self._indice)}
+
+
+def agios_sugeridos(regiao, n=8):
+    """Faixa de ágios (%) da tabela: `n` valores inteiros do p10 ao p90 da região."""
+    p = percentis(regiao.agio)
+    inicio, fim = max(0.0, p["p10"]), max(0.0, p["p90"])
+    return sorted({int(round(a)) for a in np.linspace(inicio, fim, n)})
+
+
+def valor_mercado_sugerido(regiao, valor_lance):
+    """Valor de mercado típico para o lance inicial: lance / (1 - desconto mediano do lance)."""
+    if regiao.desconto_lance is None or not valor_lance:
+        return None
+    desconto = percentis(regiao.desconto_lance)["p50"]
+    return valor_lance / (1 - desconto / 100) if desconto < 100 else None
+
+
+def curva_vitoria(regiao):
+    """Curva de chance de vitória (`leilao.otimizacao.CurvaEmpirica`) dos ágios da região."""
+    from leilao.otimizacao import CurvaEmpirica
+
+    return CurvaEmpirica(regiao.agio, niveis=NIVEIS, prob_sem_lance=regiao.desertos / (regiao.n + regiao.desertos))
+
+
+_historico = None
+_historico_lock = threading.Lock()
+
+
+def historico_compartilhado():
+    """Instância única do histórico no processo, criada sob demanda."""
+    global _historico
+    with _historico_lock:
+        if _historico is None:
+            _historico = HistoricoLeiloes()
+        return _historico
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("arquivos", nargs="*", help="arquivos .csv ou .parquet de leilões a ingerir")
+    parser.add_argument("--diretorio", default=CAMINHO_PADRAO, help="pasta do histórico")
+    parser.add_argument("--substituir", action="store_true", help="descarta o histórico atual antes de ingerir")
+    parser.add_argument("--consultar", metavar="ENDERECO", help="mostra os percentis da região do endereço")
+    parser.add_argument("--area", type=float, help="área do imóvel consultado (m²)")
+    parser.add_argument("--minimo", type=int, default=MINIMO_PADRAO, help="leilões vendidos mínimos por grupo")
+    args = parser.parse_args(argv)
+    if not args.arquivos and args.consultar is None:
+        parser.error("informe arquivos a ingerir ou --consultar")
+
+    if args.arquivos:
+        inicio = time.perf_counter()
+        total = ingerir(args.arquivos, args.diretorio, args.substituir)
+        print(f"{total} leilões no histórico ({time.perf_counter() - inicio:.1f} s) → {args.diretorio}", file=sys.stderr)
+    if args.consultar is not None:
+        regiao = HistoricoLeiloes(args.diretorio).consultar(args.consultar, args.area, minimo=args.minimo)
+        if regiao is None:
+            print("Histórico vazio.")
+            return
+        print(f"{regiao.descricao}: {regiao.n} leilões vendidos, {regiao.desertos} desertos")
+        for metrica in METRICAS:
+            p = percentis(getattr(regiao, metrica))
+            if p is not None:
+                print(f"  {metrica:<15}" + "  ".join(f"{nome} {valor:7.1f}%" for nome, valor in p.items()))
+
+
+if __name__ == "__main__":
+    main()
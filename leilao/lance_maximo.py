@@ -0,0 +1,116 @@
+"""Lance máximo que ainda atinge uma meta de resultado ou rendimento.
+
+O total investido é linear por partes no valor do arremate: a única quebra é
+o termo de IRPF, `max(valor_mercado - valor_arremate, 0)`. As metas de
+resultado, retorno e rendimento mensal se reduzem todas a um teto para o total
+investido, que é invertido em forma fechada. Para critérios arbitrários
+(p. ex. percentis do modo de risco) há um solver por bissecção.
+"""
+from leilao.calculo import (
+    COMISSAO_LEILOEIRO_PERCENT,
+    IRPF_PERCENT,
+    ITBI_PERCENT,
+    REGISTRO_PERCENT,
+    simular,
+)
+
+
+def teto_investimento(valor_mercado, prazo_venda_meses, resultado_minimo=None, percentual_minimo=None, rendimento_mensal_minimo=None):
+    """Maior total investido compatível com todas as metas informadas."""
+    tetos = []
+    if resultado_minimo is not None:
+        tetos.append(valor_mercado - resultado_minimo)
+    if rendimento_mensal_minimo is not None:
+        retorno = ((1 + rendimento_mensal_minimo / 100) ** prazo_venda_meses - 1) * 100
+        percentual_minimo = retorno if percentual_minimo is None else max(percentual_minimo, retorno)
+    if percentual_minimo is not None:
+        tetos.append(valor_mercado / (1 + percentual_minimo / 100))
+    if not tetos:
+        raise ValueError("Informe ao menos uma meta")
+    return min(tetos)
+
+
+def lance_maximo(
+    parametros,
+    resultado_minimo=None,
+    percentual_minimo=None,
+    rendimento_mensal_minimo=None,
+    irpf_percent=IRPF_PERCENT,
+    itbi_percent=ITBI_PERCENT,
+    registro_percent=REGISTRO_PERCENT,
+    comissao_leiloeiro_percent=COMISSAO_LEILOEIRO_PERCENT,
+):
+    """Maior valor de arremate que atende às metas, em forma fechada.
+
+    `parametros` são os argumentos escalares de `simular` (sem o ágio), com
+    `valor_lance` positivo. Retorna None se nenhuma meta é atingível nem com
+    arremate zero; caso contrário, o detalhamento de `simular` no lance
+    máximo (floats).
+    """
+    _validar_lance(parametros)
+    valor_mercado = float(parametros["valor_mercado"])
+    prazo = float(parametros["prazo_venda_meses"])
+    teto = teto_investimento(valor_mercado, prazo, resultado_minimo, percentual_minimo, rendimento_mensal_minimo)
+
+    # total_investido = k·A + t·max(M - A, 0) + C
+    k = 1 + (itbi_percent + registro_percent + comissao_leiloeiro_percent + parametros.get("assessoria_percent", 0.0)) / 100
+    t = irpf_percent / 100
+    fixos = (
+        parametros["area_m2"] * parametros["custo_reforma_m2"]
+        + (parametros["iptu_mensal"] + parametros["condominio_mensal"]) * prazo
+        + valor_mercado * parametros.get("comissao_venda_percent", 0.0) / 100
+    )
+
+    # Trecho A ≤ M (com IRPF sobre o ganho) e, se passar do mercado, trecho A > M
+    valor_arremate = (teto - t * valor_mercado - fixos) / (k - t)
+    if valor_arremate > valor_mercado:
+        valor_arremate = (teto - fixos) / k
+    if valor_arremate < 0:
+        return None
+    return _detalhar(parametros, valor_arremate, irpf_percent, itbi_percent, registro_percent, comissao_leiloeiro_percent)
+
+
+def lance_maximo_bisseccao(parametros, criterio, limite_superior=None, tolerancia=0.01, max_iteracoes=100, **taxas):
+    """Maior valor de arremate para o qual `criterio(resultado)` é verdadeiro.
+
+    `criterio` recebe o dicionário devolvido por `simular` e deve ser monótono:
+    verdadeiro para arremates baixos e falso a partir de algum ponto.
+    """
+    _validar_lance(parametros)
+    baixo = 0.0
+    alto = float(limite_superior or 4 * parametros["valor_mercado"])
+    if not criterio(_simular_arremate(parametros, baixo, taxas)):
+        return None
+    if criterio(_simular_arremate(parametros, alto, taxas)):
+        return _detalhar(parametros, alto, **taxas)
+    for _ in range(max_iteracoes):
+        if alto - baixo <= tolerancia:
+            break
+        meio = (baixo + alto) / 2
+        if criterio(_simular_arremate(parametros, meio, taxas)):
+            baixo = meio
+        else:
+            alto = meio
+    return _detalhar(parametros, baixo, **taxas)
+
+
+def _validar_lance(parametros):
+    # O arremate é simulado como ágio sobre o lance inicial: sem lance, não há
+    # ágio que leve ao valor calculado
+    if not float(parametros["valor_lance"]) > 0:
+        raise ValueError("O lance inicial deve ser positivo para calcular o lance máximo")
+
+
+def _agio(parametros, valor_arremate):
+    return (valor_arremate / float(parametros["valor_lance"]) - 1) * 100
+
+
+def _simular_arremate(parametros, valor_arremate, taxas):
+    return simular(**parametros, agio_percent=_agio(parametros, valor_arremate), **taxas)
+
+
+def _detalhar(parametros, valor_arremate, irpf_percent=IRPF_PERCENT, itbi_percent=ITBI_PERCENT,
+              registro_percent=REGISTRO_PERCENT, comissao_leiloeiro_percent=COMISSAO_LEILOEIRO_PERCENT):
+    taxas = dict(irpf_percent=irpf_percent, itbi_percent=itbi_percent, registro_percent=registro_percent,
+                 comissao_leiloeiro_percent=comissao_leiloeiro_percent)
+    return {k: float(v) for k, v in _simular_arremate(parametros, valor_arremate, taxas).items()}
@@ -0,0 +1,275 @@
+"""Modo em lote (sem Streamlit): avalia um CSV/JSON de lotes de leilão.
+
+Uso:
+    python -m leilao.lote lotes.csv -o resultados.csv
+    python -m leilao.lote lotes.json -o resultados.parquet --comparaveis
+
+Cada lote tem os mesmos campos do formulário do simulador (valores no padrão
+brasileiro, p. ex. "500.000"). Os lotes são avaliados num pool de processos e
+cada resultado é gravado assim que fica pronto. Com `--comparaveis`, os preços
+de anúncios similares são buscados numa fila concorrente limitada. Com
+`--relatorios pasta`, cada lote ganha um relatório em PDF, gerado no próprio
+pool de processos; lotes iguais reaproveitam o mesmo arquivo.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+
+from leilao.busca import buscar_portais
+from leilao.calculo import COLUNAS, simular
+from leilao.comparaveis import base_compartilhada, precisa_atualizar
+from leilao.enderecos import prepare_address
+from leilao.estatisticas import estatisticas_comparaveis
+from leilao.extracao import anuncios_unicos, extrair_anuncios
+from leilao.formatacao import parse_number
+from leilao.relatorio import caminho_relatorio, dados_relatorio, obter_relatorio
+
+# Campos do formulário e seus valores padrão
+CAMPOS = {
+    "endereco": "",
+    "valor_lance": 500000.0,
+    "valor_mercado": 1000000.0,
+    "area_m2": 100.0,
+    "custo_reforma_m2": 1000.0,
+    "iptu_mensal": 100.0,
+    "condominio_mensal": 1500.0,
+    "prazo_venda_meses": 12,
+    "assessoria_percent": 6.0,
+    "comissao_venda_percent": 0.0,
+}
+
+AGIOS_PADRAO = (10, 20, 30, 40, 50, 60, 70, 80)
+
+COLUNAS_COMPARAVEIS = ("comparaveis_n", "comparaveis_mediana", "comparaveis_media_aparada", "comparaveis_valor_estimado", "comparaveis_erro")
+
+# Colunas de texto na saída; as demais são numéricas
+COLUNAS_TEXTO = ("endereco", "comparaveis_erro", "relatorio", "erro")
+
+
+def ler_lotes(caminho):
+    """Lê os lotes de um arquivo .csv ou .json (lista de objetos)."""
+    if caminho.lower().endswith(".json"):
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    with open(caminho, encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def colunas_saida(agios_percent, comparaveis=False, relatorios=False):
+    colunas = list(CAMPOS)
+    colunas += [c for c in COLUNAS if c != "agio_percent"]
+    for agio in agios_percent:
+        colunas += [f"resultado_agio_{agio:g}", f"rendimento_mensal_agio_{agio:g}"]
+    if comparaveis:
+        colunas += COLUNAS_COMPARAVEIS
+    if relatorios:
+        colunas.append("relatorio")
+    colunas.append("erro")
+    return colunas
+
+
+def ler_campos(lote):
+    """Campos do lote convertidos em número (ausentes ou em branco usam o padrão).
+
+    Devolve a linha {campo: valor} e a mensagem de erro dos campos inválidos
+    (None se todos são válidos).
+    """
+    linha = {"endereco": lote.get("endereco") or ""}
+    erros = []
+    for campo, padrao in CAMPOS.items():
+        if campo == "endereco":
+            continue
+        valor = lote.get(campo)
+        # Células vazias do CSV ("") e nulos do JSON contam como ausentes
+        if valor is None or (isinstance(valor, str) and not valor.strip()):
+            valor = padrao
+        try:
+            linha[campo] = parse_number(valor)
+        except (TypeError, ValueError, AttributeError) as e:
+            linha[campo] = None
+            erros.append(f"{campo}: {e}")
+    return linha, "; ".join(erros) or None
+
+
+def avaliar_lote(lote, agios_percent=AGIOS_PADRAO):
+    """Avalia um lote com o modelo de custos; campos inválidos vão para `erro`."""
+    linha, erro = ler_campos(lote)
+    if erro:
+        linha["erro"] = erro
+        return linha
+
+    parametros = {campo: linha[campo] for campo in CAMPOS if campo != "endereco"}
+    detalhe = simular(**parametros, agio_percent=0.0)
+    linha.update({k: float(v) for k, v in detalhe.items() if k != "agio_percent"})
+    tabela = simular(**parametros, agio_percent=list(agios_percent))
+    for i, agio in enumerate(agios_percent):
+        linha[f"resultado_agio_{agio:g}"] = float(tabela["resultado"][i])
+        linha[f"rendimento_mensal_agio_{agio:g}"] = float(tabela["rendimento_mensal"][i])
+    return linha
+
+
+def avaliar_e_relatar(lote, agios_percent=AGIOS_PADRAO, diretorio=None):
+    """`avaliar_lote` e, para lotes válidos, o PDF em `diretorio` (coluna `relatorio`)."""
+    linha = avaliar_lote(lote, agios_percent)
+    if linha.get("erro"):
+        return linha
+    parametros = {campo: linha[campo] for campo in CAMPOS if campo != "endereco"}
+    dados = dados_relatorio(parametros, agios_percent, endereco=linha["endereco"])
+    try:
+        obter_relatorio(dados, diretorio)
+        linha["relatorio"] = caminho_relatorio(dados, diretorio)
+    except Exception as e:
+        linha["erro"] = f"relatório: {e}"
+    return linha
+
+
+def _avaliar_bloco(lotes, agios_percent, relatorios):
+    if relatorios is not None:
+        return [avaliar_e_relatar(lote, agios_percent, relatorios) for lote in lotes]
+    return [avaliar_lote(lote, agios_percent) for lote in lotes]
+
+
+def _avaliados(pool, lotes, agios_percent, relatorios):
+    """Linhas avaliadas na ordem em que os blocos de lotes ficam prontos."""
+    tamanho = max(1, len(lotes) // 64)
+    futuros = [pool.submit(_avaliar_bloco, lotes[i:i + tamanho], agios_percent, relatorios) for i in range(0, len(lotes), tamanho)]
+    for futuro in as_completed(futuros):
+        yield from futuro.result()
+
+
+def buscar_comparaveis(linha, api_key):
+    """Acrescenta à linha o resumo robusto dos preços de anúncios similares.
+
+    Usa a base local de comparáveis quando ela cobre a região; senão busca
+    na SerpApi e grava os anúncios na base.
+    """
+    if not linha.get("endereco"):
+        return linha
+    try:
+        base = base_compartilhada()
+        estimativa = base.estimar(linha["endereco"], linha.get("area_m2"))
+        if precisa_atualizar(estimativa):
+            anuncios = extrair_anuncios(buscar_portais(prepare_address(base.canonizar(linha["endereco"])), api_key))
+            base.ingerir(anuncios, linha["endereco"])
+        else:
+            anuncios = estimativa.anuncios
+        estatisticas = estatisticas_comparaveis(anuncios_unicos(anuncios), linha.get("area_m2"))
+        linha["comparaveis_n"] = estatisticas["preco"]["n_considerados"] if estatisticas else 0
+        if estatisticas:
+            linha["comparaveis_mediana"] = estatisticas["preco"]["mediana"]
+            linha["comparaveis_media_aparada"] = estatisticas["preco"]["media_aparada"]
+            linha["comparaveis_valor_estimado"] = estatisticas["valor_estimado"]
+    except Exception as e:
+        linha["comparaveis_erro"] = str(e)
+    return linha
+
+
+@contextmanager
+def escritor(caminho, colunas, tamanho_bloco=256):
+    """Abre a saída (.csv ou .parquet) e devolve uma função que grava uma linha."""
+    if caminho.lower().endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        esquema = pa.schema([(c, pa.string() if c in COLUNAS_TEXTO else pa.float64()) for c in colunas])
+        bloco = []
+        gravador = None
+
+        def descarregar():
+            nonlocal gravador
+            if not bloco:
+                return
+            if gravador is None:
+                gravador = pq.ParquetWriter(caminho, esquema)
+            gravador.write_table(pa.Table.from_pylist(bloco, schema=esquema))
+            bloco.clear()
+
+        def gravar(linha):
+            bloco.append({c: linha.get(c) for c in colunas})
+            if len(bloco) >= tamanho_bloco:
+                descarregar()
+
+        try:
+            yield gravar
+            descarregar()
+        finally:
+            if gravador is not None:
+                gravador.close()
+    else:
+        with open(caminho, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=colunas, extrasaction="ignore")
+            writer.writeheader()
+
+            def gravar(linha):
+                writer.writerow(linha)
+                f.flush()
+
+            yield gravar
+
+
+def executar(lotes, saida, agios_percent=AGIOS_PADRAO, processos=None, comparaveis=False, concorrencia=4, api_key=None, relatorios=None):
+    """Avalia `lotes` em paralelo e grava cada resultado em `saida`.
+
+    Com `relatorios` (uma pasta), gera também o PDF de cada lote.
+    Retorna o número de lotes gravados.
+    """
+    total = 0
+    colunas = colunas_saida(agios_percent, comparaveis, relatorios is not None)
+    with ProcessPoolExecutor(processos) as pool, escritor(saida, colunas) as gravar:
+        avaliados = _avaliados(pool, list(lotes), agios_percent, relatorios)
+        if not comparaveis:
+            for linha in avaliados:
+                gravar(linha)
+                total += 1
+            return total
+
+        # Fila de buscas limitada: no máximo 2×concorrencia buscas pendentes
+        vagas = threading.BoundedSemaphore(2 * concorrencia)
+        pendentes = set()
+        with ThreadPoolExecutor(concorrencia) as buscas:
+            for linha in avaliados:
+                vagas.acquire()
+                futuro = buscas.submit(buscar_comparaveis, linha, api_key)
+                futuro.add_done_callback(lambda _: vagas.release())
+                pendentes.add(futuro)
+                prontos = {f for f in pendentes if f.done()}
+                for f in prontos:
+                    gravar(f.result())
+                    total += 1
+                pendentes -= prontos
+            while pendentes:
+                prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                for f in prontos:
+                    gravar(f.result())
+                    total += 1
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Avalia em lote os lotes de leilão de um CSV/JSON.")
+    parser.add_argument("entrada", help="arquivo .csv ou .json com os lotes")
+    parser.add_argument("-o", "--saida", default="resultados.csv", help="arquivo .csv ou .parquet de saída")
+    parser.add_argument("--agios", default=",".join(str(a) for a in AGIOS_PADRAO), help="ágios (%%) separados por vírgula")
+    parser.add_argument("--processos", type=int, default=None, help="número de processos (padrão: CPUs)")
+    parser.add_argument("--comparaveis", action="store_true", help="buscar preços de anúncios similares (SerpApi)")
+    parser.add_argument("--concorrencia", type=int, default=4, help="buscas de comparáveis simultâneas")
+    parser.add_argument("--relatorios", metavar="PASTA", help="gera o relatório em PDF de cada lote nesta pasta")
+    args = parser.parse_args(argv)
+
+    api_key = os.getenv("SERPAPI_KEY")
+    if args.comparaveis and not api_key:
+        parser.error("defina SERPAPI_KEY para usar --comparaveis")
+
+    agios_percent = tuple(float(a) for a in args.agios.split(",") if a.strip())
+    lotes = ler_lotes(args.entrada)
+    total = executar(lotes, args.saida, agios_percent, args.processos, args.comparaveis, args.concorrencia, api_key, args.relatorios)
+    print(f"{total} lotes avaliados → {args.saida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Tempos por etapa e contadores do processo, exportáveis em JSON ou Prometheus.
+
+`medir("etapa", site=...)` cronometra um bloco; `contar("nome", site=...)`
+incrementa um contador. Tudo vai para `METRICAS`, única no processo e
+compartilhada pelas sessões do Streamlit, que guarda as últimas `JANELA`
+durações de cada etapa para os percentis p50/p95.
+
+Cada execução do script pode abrir uma rodada (`iniciar_rodada`): os tempos
+medidos na mesma execução, inclusive nas threads da busca que copiam o
+contexto (`contextvars`), também ficam na rodada, para o painel de depuração.
+
+Com `LEILAO_METRICAS_PATH`, `gravar` escreve o arquivo de métricas (texto do
+Prometheus, ou JSON se terminar em `.json`), p. ex. para o coletor de arquivos
+de texto do node_exporter.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+ARQUIVO_PADRAO = os.getenv("LEILAO_METRICAS_PATH")
+JANELA = 1000
+PREFIXO = "leilao"
+QUANTIS = (0.5, 0.95)
+
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted(rotulos.items()))
+
+
+def _quantil(ordenados, q):
+    return ordenados[int(round(q * (len(ordenados) - 1)))]
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos_prometheus(rotulos, extra=()):
+    pares = list(rotulos) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+class Metricas:
+    """Registro thread-safe de durações por etapa e de contadores."""
+
+    def __init__(self, janela=JANELA):
+        self.janela = janela
+        self._amostras = {}
+        self._totais = {}
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, etapa, segundos, **rotulos):
+        chave = _chave(etapa, rotulos)
+        with self._lock:
+            if chave not in self._amostras:
+                self._amostras[chave] = deque(maxlen=self.janela)
+                self._totais[chave] = [0, 0.0]
+            self._amostras[chave].append(segundos)
+            total = self._totais[chave]
+            total[0] += 1
+            total[1] += segundos
+
+    def contar(self, nome, n=1, **rotulos):
+        chave = _chave(nome, rotulos)
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + n
+
+    def resumo(self):
+        """{'etapas': [...], 'contadores': [...]}, ordenados por nome."""
+        with self._lock:
+            amostras = {chave: list(valores) for chave, valores in self._amostras.items()}
+            totais = {chave: tuple(total) for chave, total in self._totais.items()}
+            contadores = dict(self._contadores)
+        etapas = []
+        for (etapa, rotulos), valores in sorted(amostras.items()):
+            valores.sort()
+            p50, p95 = (_quantil(valores, q) for q in QUANTIS)
+            n, soma = totais[(etapa, rotulos)]
+            etapas.append({
+                "etapa": etapa,
+                "rotulos": dict(rotulos),
+                "n": n,
+                "soma": soma,
+                "p50": p50,
+                "p95": p95,
+                "max": valores[-1],
+            })
+        return {
+            "etapas": etapas,
+            "contadores": [{"nome": nome, "rotulos": dict(rotulos), "valor": valor} for (nome, rotulos), valor in sorted(contadores.items())],
+        }
+
+    def json(self):
+        return json.dumps(self.resumo(), ensure_ascii=False, indent=2)
+
+    def prometheus(self):
+        """Texto no formato de exposição do Prometheus (summary + counters)."""
+        resumo = self.resumo()
+        linhas = []
+        if resumo["etapas"]:
+            nome = f"{PREFIXO}_etapa_segundos"
+            linhas += [f"# HELP {nome} Duração das etapas do simulador.", f"# TYPE {nome} summary"]
+            for item in resumo["etapas"]:
+                rotulos = [("etapa", item["etapa"])] + sorted(item["rotulos"].items())
+                for q, valor in zip(QUANTIS, (item["p50"], item["p95"])):
+                    linhas.append(f"{nome}{_rotulos_prometheus(rotulos, [('quantile', q)])} {valor:.6f}")
+                linhas.append(f"{nome}_sum{_rotulos_prometheus(rotulos)} {item['soma']:.6f}")
+                linhas.append(f"{nome}_count{_rotulos_prometheus(rotulos)} {item['n']}")
+        declarados = set()
+        for item in resumo["contadores"]:
+            nome = f"{PREFIXO}_{item['nome']}_total"
+            if nome not in declarados:
+                declarados.add(nome)
+                linhas.append(f"# TYPE {nome} counter")
+            linhas.append(f"{nome}{_rotulos_prometheus(sorted(item['rotulos'].items()))} {item['valor']}")
+        return "\n".join(linhas) + "\n"
+
+    def gravar(self, caminho=ARQUIVO_PADRAO):
+        """Grava as métricas em `caminho` (troca atômica); nada sem caminho."""
+        if not caminho:
+            return
+        texto = self.json() if caminho.endswith(".json") else self.prometheus()
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(temporario, caminho)
+
+
+METRICAS = Metricas()
+
+_rodada = ContextVar("rodada", default=None)
+
+
+def iniciar_rodada():
+    """Abre uma rodada no contexto atual e a devolve (lista de medições)."""
+    rodada = []
+    _rodada.set(rodada)
+    return rodada
+
+
+@contextmanager
+def medir(etapa, **rotulos):
+    """Cronometra o bloco e registra a duração em `METRICAS` e na rodada."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        METRICAS.registrar(etapa, segundos, **rotulos)
+        rodada = _rodada.get()
+        if rodada is not None:
+            rodada.append({"etapa": etapa, **rotulos, "segundos": segundos})
+
+
+def contar(nome, n=1, **rotulos):
+    METRICAS.contar(nome, n, **rotulos)
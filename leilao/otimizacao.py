@@ -0,0 +1,136 @@
+"""Lance ótimo: lucro (ou VPL) esperado sob uma curva de chance de vitória.
+
+A tabela de ágios diz quanto se ganha *se* o lote for arrematado a cada
+preço, mas não a chance de vencer. Aqui uma curva de probabilidade de vitória
+por ágio é combinada com o modelo de custos numa grade fina de lances,
+avaliada de uma só vez, e o lance que maximiza o valor esperado é escolhido:
+
+    esperado(ágio) = P(vencer com o ágio) × valor(ágio)
+
+Quem perde o leilão não investe nada, então o valor de uma derrota é zero.
+Por isso só há objetivos em reais: a TIR não é um valor que se possa ponderar
+pela chance de vitória (e nem existe quando o fluxo não muda de sinal).
+
+Curvas disponíveis:
+
+- `CurvaConcorrentes`: `concorrentes` rivais independentes, cada um disposto a
+  ir até um ágio ~ Normal(`media`, `desvio`), ou a não dar lance com
+  probabilidade `prob_sem_lance`; vence-se quando o ágio supera todos;
+- `CurvaLogistica`: curva em S dada pelo ágio com 50% de chance e a escala;
+- `CurvaEmpirica`: proporção de arremates históricos com ágio abaixo do lance
+  (os ágios finais de leilões passados, p. ex. de `leilao.historico`).
+"""
+import math
+
+import numpy as np
+
+from leilao.calculo import faixa_agios, simular
+
+OBJETIVOS = {
+    "resultado": "Lucro esperado",
+    "vpl": "VPL esperado",
+}
+
+AGIO_MAXIMO = 200.0
+PASSO_AGIO = 0.1
+
+
+def _normal_cdf(x):
+    return 0.5 * (1 + _erf(x / math.sqrt(2)))
+
+
+_erf = np.vectorize(math.erf, otypes=[float])
+
+
+class CurvaConcorrentes:
+    """P(vencer) = F(ágio)^concorrentes, com F a chance de um rival não cobrir o ágio."""
+
+    def __init__(self, concorrentes=3, media=25.0, desvio=15.0, prob_sem_lance=0.3):
+        self.concorrentes = concorrentes
+        self.media = media
+        self.desvio = desvio
+        self.prob_sem_lance = prob_sem_lance
+
+    def __call__(self, agios_percent):
+        agios = np.asarray(agios_percent, dtype=float)
+        # Rivais não dão lance abaixo do inicial: a normal é truncada em 0%
+        base = _normal_cdf(-self.media / self.desvio)
+        cdf = np.clip((_normal_cdf((agios - self.media) / self.desvio) - base) / (1 - base), 0, 1)
+        individual = self.prob_sem_lance + (1 - self.prob_sem_lance) * cdf
+        return np.where(agios >= 0, individual ** self.concorrentes, 0.0)
+
+
+class CurvaLogistica:
+    """P(vencer) = 1 / (1 + exp(-(ágio - mediana) / escala))."""
+
+    def __init__(self, mediana=25.0, escala=8.0):
+        self.mediana = mediana
+        self.escala = escala
+
+    def __call__(self, agios_percent):
+        agios = np.asarray(agios_percent, dtype=float)
+        return 1 / (1 + np.exp(-(agios - self.mediana) / self.escala))
+
+
+class CurvaEmpirica:
+    """P(vencer) = fração dos ágios históricos menores que o ágio (interpolada).
+
+    Com `niveis`, `agios_historicos` são os quantis da distribuição nesses
+    níveis (0 a 1), como nos índices de `leilao.historico`. `prob_sem_lance`
+    é a chance de o leilão ficar sem nenhum outro lance (leilões desertos).
+    """
+
+    def __init__(self, agios_historicos, niveis=None, prob_sem_lance=0.0):
+        agios = np.asarray(agios_historicos, dtype=float)
+        if niveis is None:
+            agios = np.sort(agios[np.isfinite(agios)])
+            niveis = np.arange(1, len(agios) + 1) / max(1, len(agios))
+        if not len(agios):
+            raise ValueError("Sem ágios históricos para ajustar a curva")
+        self.agios = agios
+        self.niveis = np.asarray(niveis, dtype=float)
+        self.prob_sem_lance = prob_sem_lance
+
+    def __call__(self, agios_percent):
+        # Distribuição empírica com degraus suavizados entre ágios consecutivos
+        cdf = np.interp(agios_percent, self.agios, self.niveis, left=0.0, right=1.0)
+        return self.prob_sem_lance + (1 - self.prob_sem_lance) * cdf
+
+
+def otimizar_lance(parametros, curva, agios_percent=None, objetivo="resultado", taxa_desconto_anual_percent=0.0, **condicoes):
+    """Avalia o valor esperado em toda a grade de ágios e escolhe o melhor.
+
+    `parametros` são os argumentos de `simular` (sem o ágio); `curva` é uma das
+    curvas deste módulo (ou qualquer função ágio → probabilidade). A grade
+    padrão vai de 0% a 200% em passos de 0,1%. `objetivo` é uma chave de
+    `OBJETIVOS`; "vpl" usa o fluxo de caixa de `leilao.fluxo`, com
+    `taxa_desconto_anual_percent` e as `condicoes` de pagamento.
+
+    Retorna {'agio_percent', 'valor_arremate', 'prob_vitoria', 'valor',
+    'esperado'} (arrays da curva inteira) e 'otimo' com os mesmos campos
+    (floats) no lance de maior valor esperado, ou None se nenhum é positivo.
+    """
+    if objetivo not in OBJETIVOS:
+        raise ValueError(f"Objetivo desconhecido: {objetivo}")
+    agios = faixa_agios(0.0, AGIO_MAXIMO, PASSO_AGIO) if agios_percent is None else np.asarray(agios_percent, dtype=float)
+    prob = np.clip(np.asarray(curva(agios), dtype=float), 0, 1)
+    tabela = simular(**parametros, agio_percent=agios)
+    if objetivo == "resultado":
+        valor = tabela["resultado"]
+    else:
+        from leilao.fluxo import simular_fluxo
+
+        fluxo = simular_fluxo(parametros, agios, taxa_desconto_anual_percent, **condicoes)
+        valor = fluxo["vpl"]
+    esperado = prob * valor
+
+    curva_completa = {
+        "agio_percent": agios,
+        "valor_arremate": tabela["valor_arremate"],
+        "prob_vitoria": prob,
+        "valor": valor,
+        "esperado": esperado,
+    }
+    i = int(np.argmax(esperado))
+    curva_completa["otimo"] = {k: float(v[i]) for k, v in curva_completa.items()} if esperado[i] > 0 else None
+    return curva_completa
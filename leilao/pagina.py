@@ -0,0 +1,193 @@
+"""Leitura em fluxo de páginas de anúncios, com limite de bytes.
+
+Páginas de portal costumam ter vários megabytes, mas o preço e a área
+aparecem logo no início. `ler_pagina` baixa a resposta em blocos
+(`iter_content`), converte cada bloco em texto (sem tags, scripts e estilos)
+e varre o texto com o padrão de `leilao.extracao`, mantendo uma janela de
+sobreposição entre blocos para não perder valores partidos na fronteira. A
+leitura para assim que preço e área são encontrados, ou quando o limite de
+bytes é atingido, e a conexão é fechada sem baixar o resto da página.
+"""
+import codecs
+import re
+from contextlib import nullcontext
+from html import unescape
+from typing import NamedTuple
+
+from leilao.extracao import PADRAO, Extracao, classificar, completar, extrair, plausivel
+from leilao.metricas import contar, medir
+
+LIMITE_BYTES = 512 * 1024
+TAMANHO_BLOCO = 16 * 1024
+# Depois de achar o preço, lê no máximo isto a mais procurando a área
+LIMITE_APOS_PRECO = 64 * 1024
+TIMEOUT = 10
+
+# Caracteres do fim de uma janela reaproveitados na seguinte; ocorrências que
+# terminam nos últimos `_MARGEM` caracteres só são aceitas na janela seguinte,
+# quando já estão completas
+_SOBREPOSICAO = 160
+_MARGEM = 64
+
+_TAGS_IGNORADAS = ("script", "style", "noscript")
+_NOME_TAG = re.compile(r"/?([a-z][a-z0-9]*)")
+# Uma tag aberta maior que isto é tratada como texto
+_MAXIMO_TAG = 8192
+
+# Leituras de páginas guardadas no cache de respostas, chaveadas pela URL
+SITE_CACHE = "pagina"
+CONSULTA_CACHE = "leitura"
+
+
+class Leitura(NamedTuple):
+    extracao: Extracao
+    trechos: list
+    bytes_lidos: int
+    completa: bool
+
+
+class TextoIncremental:
+    """Converte HTML em texto bloco a bloco, sem depender de onde os blocos
+    são cortados (tags, entidades e scripts partidos entre blocos)."""
+
+    def __init__(self):
+        self._pendente = ""
+        self._ignorando = None
+
+    def alimentar(self, html, final=False):
+        html = self._pendente + html.lower()
+        self._pendente = ""
+        partes = []
+        pos = 0
+        while pos < len(html):
+            if self._ignorando:
+                fim = html.find("</" + self._ignorando, pos)
+                if fim < 0:
+                    self._pendente = html[-len(self._ignorando) - 2:]
+                    pos = len(html)
+                    break
+                self._ignorando = None
+                pos = fim
+            inicio = html.find("<", pos)
+            if inicio < 0:
+                partes.append(html[pos:])
+                pos = len(html)
+                break
+            partes.append(html[pos:inicio])
+            fim = html.find(">", inicio)
+            if fim < 0:
+                if len(html) - inicio > _MAXIMO_TAG or final:
+                    partes.append(html[inicio:])
+                else:
+                    self._pendente = html[inicio:]
+                pos = len(html)
+                break
+            nome = _NOME_TAG.match(html, inicio + 1)
+            if nome and not nome.group(0).startswith("/") and nome.group(1) in _TAGS_IGNORADAS:
+                self._ignorando = nome.group(1)
+            partes.append(" ")
+            pos = fim + 1
+        texto = "".join(partes)
+        # Entidade partida no fim do bloco ("&nbs" + "p;") espera o próximo
+        e = texto.rfind("&")
+        if not final and not self._pendente and e >= 0 and len(texto) - e < 10 and ";" not in texto[e:]:
+            self._pendente = texto[e:]
+            texto = texto[:e]
+        return unescape(texto)
+
+
+def ler_resposta(resposta, limite_bytes=LIMITE_BYTES, tamanho_bloco=TAMANHO_BLOCO):
+    """Varre uma resposta aberta com `stream=True`; devolve `Leitura`."""
+    decodificador = codecs.getincrementaldecoder(resposta.encoding or "utf-8")(errors="replace")
+    conversor = TextoIncremental()
+    encontrados = {}
+    trechos = []
+    lidos = 0
+    lidos_no_preco = None
+    janela = ""
+    completa = True
+
+    def varrer(texto, margem):
+        limite = len(texto) - margem
+        for m in PADRAO.finditer(texto):
+            if m.end() > limite:
+                break
+            tipo, valor = classificar(m)
+            if tipo not in encontrados and plausivel(tipo, valor):
+                encontrados[tipo] = valor
+                trechos.append(" ".join(m.group(0).split()))
+
+    for bloco in resposta.iter_content(tamanho_bloco):
+        lidos += len(bloco)
+        janela = janela[-_SOBREPOSICAO:] + conversor.alimentar(decodificador.decode(bloco))
+        varrer(janela, _MARGEM)
+        if "preco" in encontrados and lidos_no_preco is None:
+            lidos_no_preco = lidos
+        if "preco" in encontrados and "area" in encontrados:
+            completa = False
+            break
+        if lidos >= limite_bytes or (lidos_no_preco is not None and lidos - lidos_no_preco >= LIMITE_APOS_PRECO):
+            completa = False
+            break
+    else:
+        janela = janela[-_SOBREPOSICAO:] + conversor.alimentar(decodificador.decode(b"", final=True), final=True)
+        varrer(janela, 0)
+    return Leitura(completar(**encontrados), trechos, lidos, completa)
+
+
+def ler_pagina(url, sessao, limite_bytes=LIMITE_BYTES, tamanho_bloco=TAMANHO_BLOCO, timeout=TIMEOUT):
+    """Baixa `url` em fluxo até achar preço e área; devolve `Leitura`.
+
+    Respostas que não são HTML (PDFs, imagens) são fechadas sem ler o corpo e
+    devolvem uma leitura vazia. Levanta a exceção do `requests` se a página
+    não puder ser lida.
+    """
+    with medir("leitura_pagina"), sessao.get(url, stream=True, timeout=timeout) as resposta:
+        resposta.raise_for_status()
+        if "text/html" not in resposta.headers.get("Content-Type", ""):
+            contar("paginas_ignoradas", motivo="tipo")
+            return Leitura(Extracao(), [], 0, True)
+        leitura = ler_resposta(resposta, limite_bytes, tamanho_bloco)
+    contar("bytes_paginas", leitura.bytes_lidos)
+    return leitura
+
+
+def ler_pagina_guardada(url, sessao, limite_bytes=LIMITE_BYTES, cache=None, provedor=None):
+    """`ler_pagina` com a leitura guardada em `cache` (um `CacheRespostas`).
+
+    Com `provedor`, a leitura ocupa uma vaga dele (semáforo e limitador de
+    taxa). Só leituras bem-sucedidas são guardadas.
+    """
+    if cache:
+        guardada = cache.obter(url, SITE_CACHE, CONSULTA_CACHE)
+        if guardada is not None:
+            return Leitura(Extracao(*guardada[0]), *guardada[1:])
+    with provedor.vaga() if provedor is not None else nullcontext():
+        leitura = ler_pagina(url, sessao, limite_bytes)
+    if cache:
+        cache.gravar(url, SITE_CACHE, CONSULTA_CACHE, leitura)
+    return leitura
+
+
+def completar_com_pagina(resultados, sessao, max_paginas=2, limite_bytes=LIMITE_BYTES, cache=None, provedor=None):
+    """Se nenhum resultado traz preço no título/snippet, visita as páginas.
+
+    Lê em fluxo as páginas dos primeiros `max_paginas` resultados e devolve a
+    lista com o snippet do primeiro que tiver preço acrescido dos trechos
+    encontrados ("R$ 850.000 · 85 m²"). Falhas de rede são ignoradas. As
+    leituras passam pelo `cache` e pelo `provedor` (ver `ler_pagina_guardada`),
+    de modo que uma busca repetida não visita as páginas de novo.
+    """
+    if any(extrair(f"{r.get('title', '')} {r.get('snippet', '')}").preco for r in resultados):
+        return resultados
+    for i, resultado in enumerate(resultados[:max_paginas]):
+        if not resultado.get("link"):
+            continue
+        try:
+            leitura = ler_pagina_guardada(resultado["link"], sessao, limite_bytes, cache, provedor)
+        except Exception:
+            continue
+        if leitura.extracao.preco is not None:
+            completado = dict(resultado, snippet=f"{resultado.get('snippet', '')} {' · '.join(leitura.trechos)}".strip())
+            return resultados[:i] + [completado] + resultados[i + 1:]
+    return resultados
@@ -0,0 +1,257 @@
+"""Provedores de resultados de busca de anúncios.
+
+Cada provedor sabe montar a requisição para um portal e um endereço, fazer a
+consulta com seu próprio timeout, limite de conexões simultâneas e limitador
+de taxa, e converter a resposta numa lista no formato `organic_results` da
+SerpApi ([{'title', 'snippet', 'link'}]), que é o que `leilao.extracao` lê.
+
+- `ProvedorSerpApi`: JSON da SerpApi (padrão, requer chave).
+- `ProvedorGoogleHtml`: página de resultados do Google, sem chave.
+- `ProvedorPortal`: página de busca do próprio portal, lida em fluxo.
+
+As URLs vêm de variáveis de ambiente e podem apontar para o servidor de
+`leilao.servidor_local`, que devolve respostas gravadas: assim a busca inteira
+pode ser medida e testada numa máquina sem rede.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote_plus
+
+from leilao.pagina import LIMITE_BYTES, ler_pagina
+
+SERPAPI_URL = os.getenv("LEILAO_SERPAPI_URL", "https://serpapi.com/search.json")
+GOOGLE_URL = os.getenv("LEILAO_GOOGLE_URL", "https://www.google.com/search")
+# Modelo da URL de busca dos portais; {site} e {endereco} são substituídos
+PORTAL_URL = os.getenv("LEILAO_PORTAL_URL", "https://www.{site}/busca?q={endereco}")
+
+PROVEDOR_PADRAO = os.getenv("LEILAO_PROVEDOR", "serpapi")
+
+# Se definido, cada página do Google é gravada neste arquivo para depuração
+DEPURACAO_HTML = os.getenv("LEILAO_DEBUG_HTML")
+
+# Contêineres de resultado na página do Google e o snippet dentro deles
+CLASSES_RESULTADO = ("g", "tF2Cxc")
+CLASSE_SNIPPET = "VwiC3b"
+
+# Modelo da consulta enviada ao Google; faz parte da chave do cache
+CONSULTA_TEMPLATE = 'site:{site} "{endereco}" venda apartamento'
+
+
+class LimitadorTaxa:
+    """Token bucket thread-safe: até `rajada` chamadas imediatas e depois
+    `taxa` chamadas por segundo."""
+
+    def __init__(self, taxa, rajada=1):
+        self.taxa = float(taxa)
+        self.rajada = float(rajada)
+        self._tokens = float(rajada)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        """Bloqueia até haver um token disponível e o consome."""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.rajada, self._tokens + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.taxa
+            time.sleep(espera)
+
+
+class Provedor:
+    """Base dos provedores: limites de uso e o ciclo requisição → resposta.
+
+    Subclasses definem `nome`, `consulta` (que entra na chave do cache),
+    `requisicao` e `interpretar`, ou sobrescrevem `consultar` inteiro.
+    """
+
+    nome = None
+    consulta = CONSULTA_TEMPLATE
+    # Créditos do plano gastos por consulta bem-sucedida (contados nas métricas)
+    creditos_por_consulta = 0
+
+    def __init__(self, url, timeout=20, concorrencia=8, taxa=5, rajada=4):
+        self.url = url
+        self.timeout = timeout
+        self.concorrencia = concorrencia
+        self.limitador = LimitadorTaxa(taxa, rajada)
+        self._semaforo = threading.BoundedSemaphore(concorrencia)
+
+    def montar_consulta(self, site, endereco):
+        return CONSULTA_TEMPLATE.format(site=site, endereco=endereco)
+
+    @contextmanager
+    def vaga(self):
+        """Ocupa uma das conexões do provedor, depois de passar pelo limitador de taxa."""
+        with self._semaforo:
+            self.limitador.aguardar()
+            yield
+
+    def requisicao(self, site, endereco, api_key):
+        """(url, params) da consulta."""
+        raise NotImplementedError
+
+    def interpretar(self, resposta):
+        """Lista de resultados {'title', 'snippet', 'link'} da resposta HTTP."""
+        raise NotImplementedError
+
+    def consultar(self, site, endereco, sessao, api_key=None):
+        url, params = self.requisicao(site, endereco, api_key)
+        with self.vaga():
+            resp = sessao.get(url, params=params, timeout=self.timeout)
+            resp.raise_for_status()
+            return self.interpretar(resp)
+
+
+class ProvedorSerpApi(Provedor):
+    nome = "serpapi"
+    creditos_por_consulta = 1
+
+    def __init__(self, url=SERPAPI_URL, timeout=20, concorrencia=8, taxa=5, rajada=4):
+        super().__init__(url, timeout, concorrencia, taxa, rajada)
+
+    def requisicao(self, site, endereco, api_key):
+        params = {
+            "engine": "google",
+            "q": self.montar_consulta(site, endereco),
+            "hl": "pt-BR",
+            "num": 10,
+            "api_key": api_key,
+        }
+        return self.url, params
+
+    def interpretar(self, resposta):
+        return resposta.json().get("organic_results", [])
+
+
+def _xpath_classe(classe):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {classe} ")'
+
+
+def _interpretar_google_lxml(html):
+    from lxml import html as lxml_html
+
+    documento = lxml_html.fromstring(html)
+    for classe in CLASSES_RESULTADO:
+        blocos = documento.xpath(f"//div[{_xpath_classe(classe)}]")
+        if blocos:
+            break
+    resultados = []
+    for bloco in blocos:
+        titulo = bloco.xpath(".//h3")
+        link = bloco.xpath(".//a[@href]")
+        snippet = bloco.xpath(f".//div[{_xpath_classe(CLASSE_SNIPPET)}]")
+        if titulo and link:
+            resultados.append({
+                "title": titulo[0].text_content(),
+                "snippet": snippet[0].text_content() if snippet else "",
+                "link": link[0].get("href"),
+            })
+    return resultados
+
+
+def _interpretar_google_bs4(html):
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    # Só os contêineres de resultado viram árvore; o resto da página é descartado
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("div", class_=list(CLASSES_RESULTADO)))
+    blocos = []
+    for classe in CLASSES_RESULTADO:
+        blocos = soup.find_all("div", class_=classe)
+        if blocos:
+            break
+    resultados = []
+    for bloco in blocos:
+        titulo = bloco.find("h3")
+        link = bloco.find("a", href=True)
+        snippet = bloco.find("div", class_=CLASSE_SNIPPET)
+        if titulo and link:
+            resultados.append({
+                "title": titulo.get_text(),
+                "snippet": snippet.get_text() if snippet else "",
+                "link": link["href"],
+            })
+    return resultados
+
+
+def interpretar_google(html, depuracao=DEPURACAO_HTML):
+    """Resultados [{'title', 'snippet', 'link'}] de uma página do Google.
+
+    Usa o lxml (XPath direto nos contêineres de resultado) quando instalado;
+    senão, BeautifulSoup montando só os contêineres (`SoupStrainer`). Com
+    `depuracao`, o HTML recebido é gravado nesse arquivo.
+    """
+    if depuracao:
+        with open(depuracao, "w", encoding="utf-8") as f:
+            f.write(html)
+    if not html.strip():
+        return []
+    try:
+        return _interpretar_google_lxml(html)
+    except ImportError:
+        return _interpretar_google_bs4(html)
+
+
+class ProvedorGoogleHtml(Provedor):
+    """Raspagem da página de resultados do Google (sujeita a bloqueio)."""
+
+    nome = "google"
+    consulta = "google-html:" + CONSULTA_TEMPLATE
+
+    def __init__(self, url=GOOGLE_URL, timeout=10, concorrencia=2, taxa=1, rajada=1):
+        super().__init__(url, timeout, concorrencia, taxa, rajada)
+
+    def requisicao(self, site, endereco, api_key):
+        return self.url, {"q": self.montar_consulta(site, endereco), "num": 10, "hl": "pt-BR"}
+
+    def interpretar(self, resposta):
+        return interpretar_google(resposta.text)
+
+
+class ProvedorPortal(Provedor):
+    """Página de busca do próprio portal, lida em fluxo até o primeiro preço.
+
+    Devolve um único resultado cujo snippet são os trechos com preço e área
+    encontrados na página ("R$ 850.000 · 85 m²"); no máximo `limite_bytes`
+    são baixados (ver `leilao.pagina`).
+    """
+
+    nome = "portal"
+
+    def __init__(self, url=PORTAL_URL, timeout=10, concorrencia=4, taxa=2, rajada=4, limite_bytes=LIMITE_BYTES):
+        super().__init__(url, timeout, concorrencia, taxa, rajada)
+        self.consulta = "portal:" + url
+        self.limite_bytes = limite_bytes
+
+    def requisicao(self, site, endereco, api_key):
+        return self.url.format(site=site, endereco=quote_plus(endereco)), None
+
+    def consultar(self, site, endereco, sessao, api_key=None):
+        url, _ = self.requisicao(site, endereco, api_key)
+        with self.vaga():
+            leitura = ler_pagina(url, sessao, self.limite_bytes, timeout=self.timeout)
+        if leitura.extracao.preco is None:
+            return []
+        return [{"title": site, "snippet": " · ".join(leitura.trechos), "link": url}]
+
+
+# Instâncias únicas do processo: limites de taxa e de conexões valem para
+# todas as buscas, de todas as sessões
+PROVEDORES = {p.nome: p for p in (ProvedorSerpApi(), ProvedorGoogleHtml(), ProvedorPortal())}
+
+
+def obter_provedor(provedor=None):
+    """Aceita uma instância, um nome de `PROVEDORES` ou None (o padrão)."""
+    if isinstance(provedor, Provedor):
+        return provedor
+    nome = provedor or PROVEDOR_PADRAO
+    try:
+        return PROVEDORES[nome]
+    except KeyError:
+        raise ValueError(f"Provedor de busca desconhecido: {nome}") from None
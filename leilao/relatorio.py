@@ -0,0 +1,270 @@
+"""Relatório em PDF da análise de um lote.
+
+O relatório traz as entradas, o detalhamento de custos do lance inicial, a
+tabela de ágios com gráficos, o lance máximo para a meta, o resumo do modo de
+risco e os comparáveis encontrados. É gerado com o `reportlab` (tabelas e
+gráficos nativos, sem matplotlib).
+
+Os PDFs ficam num cache em disco indexado pelo hash dos dados do relatório:
+pedir de novo o mesmo relatório devolve o arquivo pronto. `agendar_relatorio`
+gera em segundo plano, num pool de threads compartilhado, e agrupa pedidos
+simultâneos do mesmo relatório.
+
+Em lote, `python -m leilao.lote ... --relatorios pasta/` gera um PDF por lote
+no pool de processos.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from leilao.busca import VooUnico
+from leilao.calculo import simular
+from leilao.metricas import contar, medir
+
+DIRETORIO_PADRAO = os.getenv("LEILAO_RELATORIOS_PATH", os.path.join(os.path.expanduser("~"), ".cache", "simulador_leilao", "relatorios"))
+TRABALHADORES = 2
+
+ROTULOS_ENTRADAS = {
+    "valor_lance": "Lance inicial (R$)",
+    "valor_mercado": "Valor de mercado (R$)",
+    "area_m2": "Área (m²)",
+    "custo_reforma_m2": "Reforma por m² (R$)",
+    "iptu_mensal": "IPTU mensal (R$)",
+    "condominio_mensal": "Condomínio mensal (R$)",
+    "prazo_venda_meses": "Prazo de venda (meses)",
+    "assessoria_percent": "Assessoria (%)",
+    "comissao_venda_percent": "Comissão de venda (%)",
+}
+
+ROTULOS_CUSTOS = {
+    "valor_arremate": "Valor do arremate",
+    "irpf": "IRPF",
+    "itbi": "ITBI",
+    "registro": "Registro",
+    "comissao_leiloeiro": "Comissão do leiloeiro",
+    "assessoria": "Assessoria",
+    "custo_reforma": "Reforma",
+    "total_iptu": "IPTU no período",
+    "total_condominio": "Condomínio no período",
+    "comissao_venda": "Comissão de venda",
+    "total_outros_custos": "Total de custos",
+    "total_investido": "Total investido",
+    "resultado": "Resultado",
+}
+
+
+def _lista(valores):
+    return [float(v) for v in valores]
+
+
+def dados_relatorio(parametros, agios_percent, endereco="", estatisticas=None, anuncios=None, lance_maximo=None, risco=None):
+    """Dados serializáveis do relatório, a partir dos parâmetros de `simular`.
+
+    `estatisticas` vem de `estatisticas_comparaveis`, `anuncios` é a lista de
+    anúncios, `lance_maximo` o dicionário de `lance_maximo` e `risco` o de
+    `simular_risco` (todos opcionais).
+    """
+    detalhe = {k: float(v) for k, v in simular(**parametros, agio_percent=0.0).items()}
+    tabela = simular(**parametros, agio_percent=list(agios_percent))
+    dados = {
+        "endereco": endereco,
+        "parametros": {k: float(v) for k, v in parametros.items()},
+        "detalhe": detalhe,
+        "agios_percent": _lista(agios_percent),
+        "tabela": {k: _lista(tabela[k]) for k in ("valor_arremate", "total_investido", "resultado", "percentual", "rendimento_mensal")},
+        "comparaveis": None,
+        "lance_maximo": {k: float(v) for k, v in lance_maximo.items()} if lance_maximo else None,
+        "risco": {k: _lista(v) for k, v in risco.items()} if risco else None,
+    }
+    if estatisticas:
+        dados["comparaveis"] = {
+            "mediana": estatisticas["preco"]["mediana"],
+            "media_aparada": estatisticas["preco"]["media_aparada"],
+            "n": estatisticas["preco"]["n_considerados"],
+            "rejeitados": _lista(estatisticas["preco"]["rejeitados"]),
+            "preco_m2": estatisticas["preco_m2"]["mediana"] if estatisticas["preco_m2"] else None,
+            "valor_estimado": estatisticas["valor_estimado"],
+            "base": estatisticas["base"],
+            "anuncios": [
+                {k: a.get(k) for k in ("site", "title", "price", "area", "link")} for a in (anuncios or [])
+            ],
+        }
+    return dados
+
+
+def chave_relatorio(dados):
+    """Hash estável dos dados; identifica o PDF no cache."""
+    return hashlib.sha256(json.dumps(dados, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _moeda(valor):
+    return f"R$ {valor:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _grafico_barras(rotulos, valores, titulo, largura=480, altura=170):
+    from reportlab.graphics.charts.barcharts import VerticalBarChart
+    from reportlab.graphics.shapes import Drawing, String
+    from reportlab.lib import colors
+
+    desenho = Drawing(largura, altura)
+    desenho.add(String(0, altura - 12, titulo, fontName="Helvetica-Bold", fontSize=9))
+    grafico = VerticalBarChart()
+    grafico.x, grafico.y = 50, 20
+    grafico.width, grafico.height = largura - 70, altura - 45
+    grafico.data = [valores]
+    grafico.categoryAxis.categoryNames = rotulos
+    grafico.categoryAxis.labels.fontSize = 7
+    grafico.valueAxis.labels.fontSize = 7
+    grafico.valueAxis.labelTextFormat = lambda v: f"{v / 1000:,.0f} mil".replace(",", ".") if abs(v) >= 1000 else f"{v:.1f}"
+    grafico.bars[0].fillColor = colors.HexColor("#2e6da4")
+    for i, valor in enumerate(valores):
+        if valor < 0:
+            grafico.bars[(0, i)].fillColor = colors.HexColor("#c0392b")
+    desenho.add(grafico)
+    return desenho
+
+
+def _tabela(linhas, larguras=None, cabecalho=True):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    tabela = Table(linhas, colWidths=larguras, hAlign="LEFT")
+    estilo = [
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+    ]
+    if cabecalho:
+        estilo += [("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#eeeeee")), ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold")]
+    tabela.setStyle(TableStyle(estilo))
+    return tabela
+
+
+def gerar_pdf(dados):
+    """Monta o PDF do relatório e devolve os bytes."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    estilos = getSampleStyleSheet()
+    detalhe = dados["detalhe"]
+    tabela = dados["tabela"]
+    agios = [f"{a:g}%" for a in dados["agios_percent"]]
+    partes = [Paragraph("Simulação de Arremate de Imóvel em Leilão", estilos["Title"])]
+    if dados["endereco"]:
+        partes.append(Paragraph(f"Endereço: {dados['endereco']}", estilos["Normal"]))
+    partes.append(Spacer(1, 8))
+
+    partes.append(Paragraph("Entradas", estilos["Heading2"]))
+    entradas = [[ROTULOS_ENTRADAS.get(k, k), f"{v:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")] for k, v in dados["parametros"].items()]
+    partes.append(_tabela(entradas, [200, 120], cabecalho=False))
+
+    partes.append(Paragraph("Custos do lance inicial", estilos["Heading2"]))
+    custos = [[rotulo, _moeda(detalhe[k])] for k, rotulo in ROTULOS_CUSTOS.items() if k in detalhe]
+    custos.append(["Retorno", f"{detalhe['percentual']:.1f}%"])
+    custos.append(["Rendimento mensal", f"{detalhe['rendimento_mensal']:.2f}%"])
+    partes.append(_tabela(custos, [200, 120], cabecalho=False))
+
+    partes.append(Paragraph("Simulações por ágio", estilos["Heading2"]))
+    linhas = [["Ágio", "Valor final", "Total investido", "Resultado", "Retorno %", "Rend. mensal %"]]
+    for i, agio in enumerate(agios):
+        linhas.append([agio, _moeda(tabela["valor_arremate"][i]), _moeda(tabela["total_investido"][i]), _moeda(tabela["resultado"][i]),
+                       f"{tabela['percentual'][i]:.1f}", f"{tabela['rendimento_mensal'][i]:.2f}"])
+    partes.append(_tabela(linhas))
+    partes.append(Spacer(1, 6))
+    partes.append(_grafico_barras(agios, tabela["resultado"], "Resultado por ágio (R$)"))
+    partes.append(_grafico_barras(agios, tabela["rendimento_mensal"], "Rendimento mensal por ágio (%)"))
+
+    maximo = dados.get("lance_maximo")
+    if maximo:
+        partes.append(Paragraph("Lance máximo para a meta", estilos["Heading2"]))
+        partes.append(_tabela([
+            ["Arremate máximo", _moeda(maximo["valor_arremate"])],
+            ["Ágio máximo", f"{maximo['agio_percent']:.2f}%"],
+            ["Resultado", _moeda(maximo["resultado"])],
+            ["Rendimento mensal", f"{maximo['rendimento_mensal']:.2f}%"],
+        ], [200, 120], cabecalho=False))
+
+    risco = dados.get("risco")
+    if risco:
+        partes.append(Paragraph("Modo de risco (Monte Carlo)", estilos["Heading2"]))
+        linhas = [["Ágio", "Resultado P5", "Resultado P50", "Resultado P95", "Prob. prejuízo"]]
+        for i, agio in enumerate(risco["agio_percent"]):
+            linhas.append([f"{agio:g}%", _moeda(risco["resultado_p5"][i]), _moeda(risco["resultado_p50"][i]),
+                           _moeda(risco["resultado_p95"][i]), f"{risco['prob_prejuizo'][i] * 100:.1f}%"])
+        partes.append(_tabela(linhas))
+
+    comparaveis = dados.get("comparaveis")
+    if comparaveis:
+        partes.append(Paragraph("Comparáveis", estilos["Heading2"]))
+        resumo = [
+            ["Mediana dos preços", _moeda(comparaveis["mediana"])],
+            ["Média aparada", _moeda(comparaveis["media_aparada"])],
+            ["Anúncios considerados", str(comparaveis["n"])],
+            ["Valor estimado", f"{_moeda(comparaveis['valor_estimado'])} ({'R$/m² × área' if comparaveis['base'] == 'm2' else 'mediana dos preços'})"],
+        ]
+        if comparaveis["preco_m2"]:
+            resumo.insert(2, ["Mediana do R$/m²", _moeda(comparaveis["preco_m2"])])
+        if comparaveis["rejeitados"]:
+            resumo.append(["Descartados (outliers)", ", ".join(_moeda(v) for v in comparaveis["rejeitados"])])
+        partes.append(_tabela(resumo, [200, 280], cabecalho=False))
+        anuncios = comparaveis["anuncios"]
+        if anuncios:
+            partes.append(Spacer(1, 6))
+            linhas = [["Portal", "Anúncio", "Preço", "Área"]]
+            for a in anuncios[:30]:
+                linhas.append([a["site"] or "", Paragraph((a["title"] or "")[:90], estilos["BodyText"]), _moeda(a["price"]),
+                               f"{a['area']:.0f} m²" if a.get("area") else ""])
+            partes.append(_tabela(linhas, [80, 260, 80, 50]))
+            partes.append(_grafico_barras([a["site"] or "" for a in anuncios[:12]], [a["price"] for a in anuncios[:12]], "Preços dos comparáveis (R$)"))
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4, title="Simulação de arremate", leftMargin=40, rightMargin=40, topMargin=40, bottomMargin=40).build(partes)
+    return buffer.getvalue()
+
+
+def caminho_relatorio(dados, diretorio=DIRETORIO_PADRAO):
+    return os.path.join(diretorio, f"{chave_relatorio(dados)}.pdf")
+
+
+def obter_relatorio(dados, diretorio=DIRETORIO_PADRAO):
+    """PDF do relatório, do cache em disco ou recém-gerado (e gravado)."""
+    caminho = caminho_relatorio(dados, diretorio)
+    try:
+        with open(caminho, "rb") as f:
+            pdf = f.read()
+        contar("relatorios", origem="cache")
+        return pdf
+    except FileNotFoundError:
+        pass
+    with medir("geracao_pdf"):
+        pdf = gerar_pdf(dados)
+    contar("relatorios", origem="gerado")
+    os.makedirs(diretorio, exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temporario, "wb") as f:
+        f.write(pdf)
+    os.replace(temporario, caminho)
+    return pdf
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_voos = VooUnico()
+
+
+def executor_compartilhado():
+    """Pool de threads único do processo para gerar relatórios."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(TRABALHADORES, thread_name_prefix="relatorio")
+        return _executor
+
+
+def agendar_relatorio(dados, diretorio=DIRETORIO_PADRAO):
+    """Gera o relatório em segundo plano; devolve um `Future` com os bytes do PDF."""
+    return executor_compartilhado().submit(_voos.executar, chave_relatorio(dados), obter_relatorio, dados, diretorio)
@@ -0,0 +1,117 @@
+"""Modo de risco: simulação de Monte Carlo do arremate.
+
+Preço de venda, prazo até a venda e custo de reforma deixam de ser valores
+fixos e passam a ser sorteados de distribuições. Para cada ágio, todos os
+sorteios são avaliados de uma vez pelo modelo vetorizado de `leilao.calculo`.
+"""
+import numpy as np
+
+from leilao.calculo import simular
+
+PERCENTIS = (5, 50, 95)
+
+# Sorteios usados para localizar cada percentil antes da seleção exata
+AMOSTRA_PERCENTIS = 20_000
+
+
+def sortear_preco(rng, valor_mercado, n):
+    """Sorteia preços de venda da triangular (mínimo, mais provável, máximo).
+
+    Com mínimo igual ao máximo o preço é constante.
+    """
+    minimo, provavel, maximo = valor_mercado
+    if minimo >= maximo:
+        return np.full(n, float(provavel))
+    return rng.triangular(minimo, min(max(provavel, minimo), maximo), maximo, size=n)
+
+
+def percentis(valores, percentis=PERCENTIS, amostra=AMOSTRA_PERCENTIS):
+    """Percentis pelo posto mais próximo, sem particionar o array inteiro.
+
+    Os sorteios são independentes, então uma amostra espaçada deles localiza
+    uma faixa de valores que quase certamente contém cada posto; só os
+    valores dentro da faixa são particionados. Se o posto cair fora da faixa,
+    o array inteiro é particionado (o resultado é sempre exato).
+    """
+    valores = np.asarray(valores)
+    n = len(valores)
+    postos = np.round(np.asarray(percentis) / 100 * (n - 1)).astype(np.int64)
+    if n <= 4 * amostra:
+        return np.partition(valores, postos)[postos]
+    sub = np.sort(valores[:: n // amostra])
+    m = len(sub)
+    resultado = np.empty(len(postos))
+    for j, (p, posto) in enumerate(zip(percentis, postos)):
+        q = p / 100
+        # Folga de 5 desvios-padrão do posto na amostra
+        folga = int(5 * np.sqrt(m * q * (1 - q))) + 2
+        i = int(round(q * (m - 1)))
+        baixo, alto = sub[max(i - folga, 0)], sub[min(i + folga, m - 1)]
+        faixa = valores[(valores >= baixo) & (valores <= alto)]
+        k = posto - np.count_nonzero(valores < baixo)
+        if 0 <= k < len(faixa):
+            resultado[j] = np.partition(faixa, k)[k]
+        else:
+            resultado[j] = np.partition(valores, posto)[posto]
+    return resultado
+
+
+def sortear_prazo(rng, prazo_meses, n):
+    """Sorteia prazos de venda (meses, ≥ 1).
+
+    `prazo_meses` pode ser um número (média de uma Poisson) ou um dicionário
+    {meses: probabilidade} para uma distribuição discreta.
+    """
+    if isinstance(prazo_meses, dict):
+        meses = np.fromiter(prazo_meses.keys(), dtype=float)
+        probs = np.fromiter(prazo_meses.values(), dtype=float)
+        return rng.choice(meses, size=n, p=probs / probs.sum())
+    return np.maximum(rng.poisson(prazo_meses, size=n), 1).astype(float)
+
+
+def simular_risco(
+    parametros,
+    agios_percent,
+    valor_mercado,
+    prazo_meses,
+    custo_reforma_m2,
+    n=100_000,
+    seed=None,
+):
+    """Roda `n` sorteios por ágio e resume a distribuição dos resultados.
+
+    `parametros` são os argumentos de `simular` (sem ágio); os três itens
+    incertos os substituem:
+      - valor_mercado: (mínimo, mais provável, máximo) — triangular
+        (constante se mínimo = máximo)
+      - prazo_meses: média (Poisson) ou {meses: probabilidade}
+      - custo_reforma_m2: (mínimo, máximo) — uniforme
+
+    Retorna um dicionário de arrays indexados pelo ágio com os percentis
+    P5/P50/P95 de resultado e rendimento mensal e a probabilidade de prejuízo.
+    """
+    rng = np.random.default_rng(seed)
+    precos = sortear_preco(rng, valor_mercado, n)
+    prazos = sortear_prazo(rng, prazo_meses, n)
+    reformas = rng.uniform(*custo_reforma_m2, size=n)
+
+    base = dict(parametros)
+    base.update(valor_mercado=precos, prazo_venda_meses=prazos, custo_reforma_m2=reformas)
+
+    agios_percent = np.atleast_1d(np.asarray(agios_percent, dtype=float))
+    resumo = {"agio_percent": agios_percent, "prob_prejuizo": np.empty(len(agios_percent))}
+    for p in PERCENTIS:
+        resumo[f"resultado_p{p}"] = np.empty(len(agios_percent))
+        resumo[f"rendimento_mensal_p{p}"] = np.empty(len(agios_percent))
+
+    # Os mesmos sorteios valem para todos os ágios; um ágio por vez mantém a
+    # memória em O(n) mesmo com 1M de sorteios
+    for i, agio in enumerate(agios_percent):
+        r = simular(**base, agio_percent=agio)
+        resultado_p = percentis(r["resultado"])
+        rendimento_p = percentis(r["rendimento_mensal"])
+        for j, p in enumerate(PERCENTIS):
+            resumo[f"resultado_p{p}"][i] = resultado_p[j]
+            resumo[f"rendimento_mensal_p{p}"][i] = rendimento_p[j]
+        resumo["prob_prejuizo"][i] = np.count_nonzero(r["resultado"] < 0) / n
+    return resumo
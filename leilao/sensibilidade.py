@@ -0,0 +1,32 @@
+"""Grades de sensibilidade 2-D (ágio × outro parâmetro).
+
+A grade inteira sai de uma única chamada a `simular`: os ágios variam nas
+linhas e o segundo parâmetro nas colunas, combinados por broadcasting.
+"""
+import numpy as np
+
+from leilao.calculo import simular
+
+# Eixos suportados: parâmetro de `simular` → rótulo para exibição
+EIXOS = {
+    "prazo_venda_meses": "Prazo de venda (meses)",
+    "valor_mercado": "Valor de mercado (variação %)",
+}
+
+
+def grade_sensibilidade(parametros, agios_percent, eixo, valores, metrica="resultado"):
+    """Calcula `metrica` para cada combinação de ágio (linhas) e `valores`
+    do parâmetro `eixo` (colunas). Retorna um array (len(agios), len(valores)).
+    """
+    if eixo not in EIXOS:
+        raise ValueError(f"Eixo de sensibilidade desconhecido: {eixo}")
+    entradas = dict(parametros)
+    entradas[eixo] = np.asarray(valores, dtype=float)[np.newaxis, :]
+    agios = np.asarray(agios_percent, dtype=float)[:, np.newaxis]
+    return simular(**entradas, agio_percent=agios)[metrica]
+
+
+def variacoes_mercado(amplitude_percent=30.0, passo_percent=5.0):
+    """Variações percentuais do valor de mercado, de -amplitude a +amplitude."""
+    n = int(round(2 * amplitude_percent / passo_percent)) + 1
+    return np.linspace(-amplitude_percent, amplitude_percent, n)
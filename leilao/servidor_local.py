@@ -0,0 +1,189 @@
+"""Servidor HTTP local que substitui a SerpApi, o Google e os portais.
+
+Serve respostas gravadas: o próprio cache de buscas (`leilao.cache`) ou um
+arquivo JSONL com uma consulta por linha, {"q": "...", "organic_results": [...]}.
+Consultas sem gravação recebem resultados sintéticos determinísticos (o mesmo
+endereço sempre gera os mesmos anúncios), de modo que qualquer endereço
+funciona sem rede. A latência de cada resposta pode ser simulada.
+
+Rotas, no formato de cada provedor de `leilao.provedores`:
+
+- `/search.json?q=...`: JSON da SerpApi;
+- `/search?q=...`: página de resultados do Google;
+- `/portal/<site>?q=...`: página de busca de um portal.
+
+Para usar o simulador sem rede:
+
+    python -m leilao.servidor_local --porta 8765 --cache ~/.cache/simulador_leilao/serpapi.sqlite3
+    LEILAO_SERPAPI_URL=http://127.0.0.1:8765/search.json streamlit run simulador_leilao_web.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from leilao.provedores import CONSULTA_TEMPLATE
+
+_SITE = re.compile(r"site:(\S+)")
+_ENDERECO = re.compile(r'"([^"]+)"')
+
+TIPOS = ["Apartamento", "Apto", "Cobertura", "Studio"]
+
+
+def carregar_gravacoes(caminho):
+    """{consulta: organic_results} de um cache SQLite ou de um arquivo JSONL."""
+    gravacoes = {}
+    if caminho.endswith((".sqlite3", ".sqlite", ".db")):
+        conn = sqlite3.connect(caminho)
+        try:
+            for endereco, site, consulta, valor in conn.execute("SELECT endereco, site, consulta, valor FROM respostas"):
+                if consulta == CONSULTA_TEMPLATE:
+                    gravacoes[consulta.format(site=site, endereco=endereco)] = json.loads(valor)
+        finally:
+            conn.close()
+        return gravacoes
+    with open(caminho, encoding="utf-8") as f:
+        for linha in f:
+            if linha.strip():
+                item = json.loads(linha)
+                gravacoes[item["q"]] = item["organic_results"]
+    return gravacoes
+
+
+def resultados_sinteticos(consulta, n=10):
+    """Resultados plausíveis e determinísticos para uma consulta."""
+    rng = random.Random(hashlib.sha256(consulta.encode("utf-8")).digest())
+    site = _SITE.search(consulta)
+    site = site.group(1) if site else "portal.com.br"
+    endereco = _ENDERECO.search(consulta)
+    endereco = endereco.group(1) if endereco else consulta
+    preco_m2 = rng.randrange(60, 160) * 100
+    resultados = []
+    for i in range(n):
+        area = rng.randrange(35, 250)
+        preco = round(area * preco_m2 * rng.uniform(0.85, 1.15), -3)
+        preco_texto = f"{preco:,.0f}".replace(",", ".")
+        resultados.append({
+            "position": i + 1,
+            "title": f"{rng.choice(TIPOS)} à venda com {area} m² - {endereco.title()}",
+            "snippet": f"{rng.randrange(1, 5)} quartos, {rng.randrange(0, 4)} vagas. R$ {preco_texto}",
+            "link": f"https://www.{site}/imovel/{hashlib.md5(f'{consulta}{i}'.encode()).hexdigest()[:12]}",
+        })
+    return resultados
+
+
+def pagina_google(resultados):
+    blocos = "".join(
+        f'<div class="g"><div class="tF2Cxc"><a href="{escape(r["link"])}"><h3>{escape(r["title"])}</h3></a>'
+        f'<div class="VwiC3b">{escape(r.get("snippet", ""))}</div></div></div>'
+        for r in resultados
+    )
+    return f"<html><head><title>Google</title></head><body><div id=\"search\">{blocos}</div></body></html>"
+
+
+def pagina_portal(resultados, tamanho=0):
+    """Página de busca de portal; `tamanho` acrescenta conteúdo até ~N bytes."""
+    itens = "".join(
+        f'<li class="card"><h2>{escape(r["title"])}</h2><p>{escape(r.get("snippet", ""))}</p></li>'
+        for r in resultados[:1]
+    )
+    enchimento = '<div class="recomendados">' + "<p>Veja também outros imóveis da região.</p>" * max(0, tamanho // 45) + "</div>"
+    return f"<html><head><title>Busca</title><script>var x = 1;</script></head><body><ul>{itens}</ul>{enchimento}</body></html>"
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        servidor = self.server
+        partes = urlsplit(self.path)
+        consulta = parse_qs(partes.query).get("q", [""])[0]
+        if servidor.latencia:
+            time.sleep(servidor.latencia)
+        with servidor.lock:
+            servidor.requisicoes += 1
+
+        if partes.path.startswith("/portal/"):
+            site = partes.path.rsplit("/", 1)[-1]
+            consulta = CONSULTA_TEMPLATE.format(site=site, endereco=consulta)
+        resultados = servidor.gravacoes.get(consulta)
+        if resultados is None:
+            resultados = resultados_sinteticos(consulta)
+
+        if partes.path == "/search.json":
+            self._responder(json.dumps({"organic_results": resultados}, ensure_ascii=False), "application/json")
+        elif partes.path == "/search":
+            self._responder(pagina_google(resultados), "text/html; charset=utf-8")
+        elif partes.path.startswith("/portal/"):
+            self._responder(pagina_portal(resultados, servidor.tamanho_pagina), "text/html; charset=utf-8")
+        else:
+            self._responder(json.dumps({"erro": "rota desconhecida"}), "application/json", 404)
+
+    def _responder(self, corpo, tipo, status=200):
+        dados = corpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, requisicao, endereco_cliente):
+        # Clientes que leem em fluxo fecham a conexão no meio da página
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(requisicao, endereco_cliente)
+
+
+def iniciar(porta=0, gravacoes=None, latencia=0.0, tamanho_pagina=0, host="127.0.0.1"):
+    """Sobe o servidor numa thread e o devolve; `servidor.url` é a URL base.
+
+    `porta=0` escolhe uma porta livre. Encerre com `servidor.shutdown()`.
+    """
+    servidor = _Servidor((host, porta), _Manipulador)
+    servidor.gravacoes = gravacoes or {}
+    servidor.latencia = latencia
+    servidor.tamanho_pagina = tamanho_pagina
+    servidor.requisicoes = 0
+    servidor.lock = threading.Lock()
+    servidor.url = f"http://{host}:{servidor.server_address[1]}"
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--cache", help="cache SQLite ou arquivo JSONL com respostas gravadas")
+    parser.add_argument("--latencia", type=float, default=0.0, help="atraso de cada resposta, em segundos")
+    parser.add_argument("--tamanho-pagina", type=int, default=0, help="tamanho aproximado das páginas de portal, em bytes")
+    args = parser.parse_args(argv)
+
+    gravacoes = carregar_gravacoes(args.cache) if args.cache else {}
+    servidor = iniciar(args.porta, gravacoes, args.latencia, args.tamanho_pagina)
+    print(f"{len(gravacoes)} respostas gravadas; servindo em {servidor.url}")
+    print(f"  LEILAO_SERPAPI_URL={servidor.url}/search.json")
+    print(f"  LEILAO_GOOGLE_URL={servidor.url}/search")
+    print(f"  LEILAO_PORTAL_URL='{servidor.url}/portal/{{site}}?q={{endereco}}'")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
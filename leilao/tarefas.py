@@ -0,0 +1,230 @@
+"""Fila de buscas de comparáveis em segundo plano, com tabela persistente.
+
+`FilaBuscas.submeter` registra a busca de um endereço numa tabela SQLite e a
+executa num pool de threads do processo; a interface apenas consulta
+`estado`, que traz o andamento de cada portal e os anúncios já encontrados,
+sem ficar bloqueada durante a busca.
+
+O identificador da tarefa é o hash do endereço normalizado, da área e do
+provedor: a mesma busca pedida por outra sessão (ou depois de recarregar a
+página) reaproveita a tarefa em andamento ou já concluída, dentro da
+`validade`. Tarefas com falha em algum portal ou interrompidas por um reinício
+do servidor são refeitas no próximo pedido (os portais que já responderam vêm
+do cache de respostas).
+
+Se a base local já tem anúncios recentes suficientes para a região, eles são
+usados sem consultar os portais; caso contrário cada portal é consultado em
+paralelo (`leilao.busca`) e os anúncios encontrados são gravados na base.
+"""
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from leilao.busca import SITES, buscar_portais
+from leilao.comparaveis import base_compartilhada, precisa_atualizar
+from leilao.enderecos import prepare_address
+from leilao.extracao import extrair_anuncios
+from leilao.metricas import contar, medir
+from leilao.provedores import obter_provedor
+
+CAMINHO_PADRAO = os.getenv("LEILAO_TAREFAS_PATH", os.path.join(os.path.expanduser("~"), ".cache", "simulador_leilao", "tarefas.sqlite3"))
+VALIDADE_PADRAO = float(os.getenv("LEILAO_TAREFAS_VALIDADE", 24 * 3600))
+TRABALHADORES = 4
+
+# Estados de uma tarefa e de cada portal dentro dela
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+ERRO = "erro"
+DISPENSADO = "dispensado"
+TERMINAIS = (CONCLUIDA, ERRO)
+
+
+def id_tarefa(endereco_busca, area_m2=None, provedor=None):
+    chave = json.dumps([endereco_busca, area_m2, obter_provedor(provedor).nome])
+    return hashlib.sha256(chave.encode("utf-8")).hexdigest()[:20]
+
+
+class FilaBuscas:
+    """Tarefas de busca em SQLite, executadas por um pool de threads."""
+
+    def __init__(self, caminho=CAMINHO_PADRAO, trabalhadores=TRABALHADORES, validade=VALIDADE_PADRAO, sites=SITES, base=None, cache=None, sessao=None, provedor=None):
+        self.caminho = caminho
+        self.validade = validade
+        self.sites = list(sites)
+        self.base = base
+        self.cache = cache
+        self.sessao = sessao
+        self.provedor = obter_provedor(provedor)
+        self._ativas = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(trabalhadores, thread_name_prefix="busca")
+        if caminho != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        self._conn = sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tarefas (
+                   id TEXT PRIMARY KEY,
+                   endereco TEXT NOT NULL,
+                   area_m2 REAL,
+                   estado TEXT NOT NULL,
+                   mensagem TEXT,
+                   erro TEXT,
+                   anuncios TEXT,
+                   criada REAL NOT NULL,
+                   atualizada REAL NOT NULL
+               )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS portais (
+                   tarefa TEXT NOT NULL,
+                   site TEXT NOT NULL,
+                   estado TEXT NOT NULL,
+                   erro TEXT,
+                   anuncios TEXT,
+                   atualizada REAL NOT NULL,
+                   PRIMARY KEY (tarefa, site)
+               )"""
+        )
+        # Tarefas em andamento quando o processo anterior terminou não têm mais quem as execute
+        self._conn.execute(
+            "UPDATE tarefas SET estado = ?, erro = ? WHERE estado IN (?, ?)",
+            (ERRO, "interrompida por reinício do servidor", PENDENTE, EXECUTANDO),
+        )
+
+    def submeter(self, endereco, area_m2=None, api_key=None):
+        """Agenda a busca (ou reaproveita uma igual) e devolve o id da tarefa."""
+        base = self.base or base_compartilhada()
+        # Grafias diferentes do mesmo endereço caem na mesma tarefa
+        endereco_busca = prepare_address(base.canonizar(endereco))
+        tarefa = id_tarefa(endereco_busca, area_m2, self.provedor)
+        agora = time.time()
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT estado, atualizada, (SELECT COUNT(*) FROM portais WHERE tarefa = id AND estado = ?) FROM tarefas WHERE id = ?",
+                (ERRO, tarefa),
+            ).fetchone()
+            if tarefa in self._ativas or (linha is not None and linha[0] == CONCLUIDA and not linha[2] and agora - linha[1] <= self.validade):
+                contar("tarefas_busca", origem="reaproveitada")
+                return tarefa
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tarefas (id, endereco, area_m2, estado, mensagem, erro, anuncios, criada, atualizada) VALUES (?, ?, ?, ?, NULL, NULL, NULL, ?, ?)",
+                (tarefa, endereco, area_m2, PENDENTE, agora, agora),
+            )
+            self._conn.execute("DELETE FROM portais WHERE tarefa = ?", (tarefa,))
+            self._conn.executemany(
+                "INSERT INTO portais (tarefa, site, estado, atualizada) VALUES (?, ?, ?, ?)",
+                [(tarefa, site, PENDENTE, agora) for site in self.sites],
+            )
+            self._conn.execute("COMMIT")
+            self._ativas.add(tarefa)
+        contar("tarefas_busca", origem="nova")
+        self._executor.submit(self._executar, tarefa, endereco, endereco_busca, area_m2, api_key)
+        return tarefa
+
+    def estado(self, tarefa):
+        """Andamento da tarefa, ou None se não existe.
+
+        {'id', 'estado', 'mensagem', 'erro', 'portais': [{'site', 'estado',
+        'n', 'erro'}], 'anuncios'}: enquanto a tarefa roda, `anuncios` traz os
+        dos portais já concluídos; no fim, a lista completa.
+        """
+        with self._lock:
+            linha = self._conn.execute("SELECT estado, mensagem, erro, anuncios FROM tarefas WHERE id = ?", (tarefa,)).fetchone()
+            portais = self._conn.execute("SELECT site, estado, erro, anuncios FROM portais WHERE tarefa = ?", (tarefa,)).fetchall()
+        if linha is None:
+            return None
+        ordem = {site: i for i, site in enumerate(self.sites)}
+        portais.sort(key=lambda p: ordem.get(p[0], len(ordem)))
+        parciais = {site: json.loads(anuncios) if anuncios else [] for site, _, _, anuncios in portais}
+        estado, mensagem, erro, anuncios = linha
+        return {
+            "id": tarefa,
+            "estado": estado,
+            "mensagem": mensagem,
+            "erro": erro,
+            "portais": [{"site": site, "estado": e, "n": len(parciais[site]), "erro": erro_site} for site, e, erro_site, _ in portais],
+            "anuncios": json.loads(anuncios) if anuncios is not None else [a for site in parciais for a in parciais[site]],
+        }
+
+    def _atualizar(self, sql, parametros):
+        with self._lock:
+            self._conn.execute(sql, parametros)
+
+    def _executar(self, tarefa, endereco, endereco_busca, area_m2, api_key):
+        try:
+            with medir("busca"):
+                self._atualizar("UPDATE tarefas SET estado = ?, atualizada = ? WHERE id = ?", (EXECUTANDO, time.time(), tarefa))
+                base = self.base or base_compartilhada()
+                estimativa = base.estimar(endereco, area_m2)
+                if not precisa_atualizar(estimativa):
+                    self._atualizar("UPDATE portais SET estado = ?, atualizada = ? WHERE tarefa = ?", (DISPENSADO, time.time(), tarefa))
+                    mensagem = f"{estimativa.n} anúncios recentes da região na base local; busca dispensada."
+                    self._concluir(tarefa, estimativa.anuncios, mensagem)
+                    return
+                anuncios, erros = self._buscar_portais(tarefa, endereco_busca, api_key)
+                if len(erros) == len(self.sites):
+                    raise RuntimeError(f"Todos os portais falharam: {erros[0]}")
+                base.ingerir(anuncios, endereco)
+                self._concluir(tarefa, anuncios, None if anuncios else "Nenhum portal trouxe anúncios com preço.")
+        except Exception as e:
+            self._atualizar("UPDATE tarefas SET estado = ?, erro = ?, atualizada = ? WHERE id = ?", (ERRO, str(e), time.time(), tarefa))
+        finally:
+            with self._lock:
+                self._ativas.discard(tarefa)
+
+    def _buscar_portais(self, tarefa, endereco_busca, api_key):
+        # Um portal por thread; cada um é gravado na tabela assim que termina
+        por_site = {}
+        erros = []
+        with ThreadPoolExecutor(max_workers=max(1, len(self.sites))) as executor:
+            futuros = {
+                executor.submit(
+                    contextvars.copy_context().run, buscar_portais, endereco_busca, api_key,
+                    sites=[site], sessao=self.sessao, cache=self.cache, provedor=self.provedor, visitar_paginas=True,
+                ): site
+                for site in self.sites
+            }
+            for futuro in as_completed(futuros):
+                site = futuros[futuro]
+                resposta = futuro.result()[site]
+                if isinstance(resposta, Exception):
+                    erros.append(str(resposta))
+                    self._atualizar(
+                        "UPDATE portais SET estado = ?, erro = ?, atualizada = ? WHERE tarefa = ? AND site = ?",
+                        (ERRO, str(resposta), time.time(), tarefa, site),
+                    )
+                    continue
+                with medir("extracao", site=site):
+                    por_site[site] = extrair_anuncios({site: resposta})
+                self._atualizar(
+                    "UPDATE portais SET estado = ?, anuncios = ?, atualizada = ? WHERE tarefa = ? AND site = ?",
+                    (CONCLUIDA, json.dumps(por_site[site], ensure_ascii=False), time.time(), tarefa, site),
+                )
+        return [a for site in self.sites for a in por_site.get(site, [])], erros
+
+    def _concluir(self, tarefa, anuncios, mensagem):
+        self._atualizar(
+            "UPDATE tarefas SET estado = ?, mensagem = ?, anuncios = ?, atualizada = ? WHERE id = ?",
+            (CONCLUIDA, mensagem, json.dumps(anuncios, ensure_ascii=False), time.time(), tarefa),
+        )
+
+
+_fila = None
+_fila_lock = threading.Lock()
+
+
+def fila_compartilhada():
+    """Fila única do processo, criada sob demanda."""
+    global _fila
+    with _fila_lock:
+        if _fila is None:
+            _fila = FilaBuscas()
+        return _fila
@@ -1,74 +1,39 @@
 import streamlit as st
-import re
-import requests
 import os
-from bs4 import BeautifulSoup
 from urllib.parse import quote
 import json
+import hashlib
 import time
 
-def format_number(value):
-    """Formata número com pontos a cada 3 dígitos durante digitação"""
-    if not value:
-        return ""
-    try:
-        # Remove pontos e vírgulas existentes
-        clean_value = value.replace(".", "").replace(",", "")
-        # Converte para número
-        number = int(clean_value)
-        # Formata com pontos manualmente
-        str_number = str(number)
-        parts = []
-        for i in range(len(str_number) - 1, -1, -3):
-            start = max(0, i - 2)
-            parts.append(str_number[start:i + 1])
-        return ".".join(reversed(parts))
-    except:
-        return value
-
-def parse_number(value):
-    """Converte string formatada para número"""
-    if not value:
-        return 0.0
-    return float(value.replace(".", "").replace(",", "."))
-
-def extract_prices_from_search(search_results):
-    """Extrai preços dos resultados da busca"""
-    prices = []
-    for result in search_results:
-        # Procura por padrões de preço nos snippets
-        snippet = result.get('snippet', '').lower()
-        title = result.get('title', '').lower()
-        link = result.get('link', '').lower()
-        full_text = f"{title} {snippet} {link}"
-        
-        # Procura por padrões de preço (R$ XXX.XXX,XX ou R$ X.XXX.XXX)
-        price_patterns = [
-            r'r\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
-            r'r\$\s*(\d+\.?\d*)',
-        ]
-        
-        for pattern in price_patterns:
-            matches = re.findall(pattern, full_text)
-            for match in matches:
-                try:
-                    # Remove pontos e vírgulas e converte para float
-                    price = float(match.replace(".", "").replace(",", "."))
-                    if 100000 <= price <= 10000000:  # Filtra preços improváveis
-                        prices.append(price)
-                except:
-                    continue
-    
-    return sorted(list(set(prices)))  # Remove duplicatas e ordena
-
-def prepare_address(endereco):
-    # Remove caracteres especiais e palavras comuns que podem atrapalhar a busca
-    endereco = endereco.lower()
-    endereco = endereco.replace('rua', '').replace('avenida', '').replace('av.', '')
-    endereco = endereco.replace('número', '').replace('n°', '').replace('nº', '')
-    # Remove espaços extras
-    endereco = ' '.join(endereco.split())
-    return endereco
+import numpy as np
+import pandas as pd
+
+from leilao.busca import sessao_compartilhada
+from leilao.cache import cache_compartilhado
+from leilao.calculo import simular
+from leilao.comparaveis import base_compartilhada
+from leilao.estatisticas import estatisticas_comparaveis
+from leilao.extracao import anuncios_unicos, extrair, precos_unicos
+from leilao.fluxo import ENTRADA_PERCENT, MESES_REFORMA, PARCELAS, fluxo_caixa, simular_fluxo
+from leilao.formatacao import parse_number
+from leilao.historico import EstatisticaRegional, agios_sugeridos, curva_vitoria, historico_compartilhado, percentis, valor_mercado_sugerido
+from leilao.lance_maximo import lance_maximo
+from leilao.lote import AGIOS_PADRAO
+from leilao.metricas import METRICAS, iniciar_rodada, medir
+from leilao.otimizacao import OBJETIVOS, CurvaConcorrentes, CurvaLogistica, otimizar_lance
+from leilao.provedores import PROVEDOR_PADRAO, interpretar_google
+from leilao.relatorio import agendar_relatorio, chave_relatorio, dados_relatorio
+from leilao.risco import simular_risco
+from leilao.sensibilidade import EIXOS, grade_sensibilidade, variacoes_mercado
+from leilao.tarefas import CONCLUIDA, ERRO, PENDENTE, TERMINAIS, fila_compartilhada
+
+def formatar_taxa(taxa):
+    """Taxa em % com duas casas; traço quando não há TIR"""
+    return "—" if np.isnan(taxa) else f"{taxa:.2f}%"
+
+def hash_entradas(entradas):
+    """Hash estável das entradas do formulário, usado como chave dos resultados"""
+    return hashlib.sha256(json.dumps(entradas, sort_keys=True, default=str).encode("utf-8")).hexdigest()
 
 def search_real_estate_google_legacy(endereco):
     """
@@ -76,6 +41,8 @@ def search_real_estate_google_legacy(endereco):
     NÃO É MAIS UTILIZADA.
 
     """
+    import requests
+
     # Prepara a query de busca para o Google
     search_query = f'"{endereco}" venda de apartamento'
     encoded_query = quote(search_query)
@@ -95,87 +62,33 @@ def search_real_estate_google_legacy(endereco):
         response = requests.get(url, headers=headers)
         response.raise_for_status()  # Lança exceção se a requisição falhar
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # DEBUG: Salva o HTML para análise
-        try:
-            with open("google_results.html", "w", encoding="utf-8") as f:
-                f.write(soup.prettify())
-            st.info("Arquivo de depuração 'google_results.html' foi salvo para análise.")
-        except Exception as e:
-            st.warning(f"Não foi possível salvar o arquivo de depuração: {e}")
-
-
-        # Encontra todos os contêineres de resultados de busca
-        # A estrutura do Google muda, esta é uma tentativa baseada em padrões comuns.
-        search_results = soup.find_all('div', class_='g')
-        if not search_results:
-            # Tenta um seletor alternativo se o primeiro falhar
-            search_results = soup.find_all('div', class_='tF2Cxc')
+        # Só os contêineres de resultado são analisados (lxml, se instalado);
+        # o HTML só é gravado em disco com LEILAO_DEBUG_HTML definido
+        search_results = interpretar_google(response.text)
 
         if not search_results:
             st.warning("Não foi possível encontrar os contêineres de resultados na página do Google. A estrutura pode ter mudado.")
             return []
 
-        # Padrões de preço e área (reutilizados)
-        price_patterns = [
-            r'R\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
-            r'R\$\s*(\d+\.?\d*)'
-        ]
-        area_patterns = [
-            r'(\d+)\s*m²',
-            r'(\d+)\s*metros quadrados'
-        ]
+        for item in search_results:
+            title = item['title']
+            link = item['link']
+            snippet = item['snippet']
 
-        for result_div in search_results:
-            title_element = result_div.find('h3')
-            link_element = result_div.find('a')
-            snippet_element = result_div.find('div', class_='VwiC3b') # Classe comum para snippets
+            # Preço e área numa única varredura do texto
+            extracao = extrair(f"{title} {snippet}")
 
-            if title_element and link_element:
-                title = title_element.get_text()
-                link = link_element['href']
-                snippet = snippet_element.get_text() if snippet_element else ""
-                
-                full_text = f"{title} {snippet}".lower()
-
-                # Extrai preço
-                price = None
-                for pattern in price_patterns:
-                    matches = re.findall(pattern, full_text)
-                    if matches:
-                        try:
-                            price_str = matches[0].replace('.', '').replace(',', '.')
-                            price_val = float(price_str)
-                            if 10000 <= price_val <= 50000000: # Filtro de preço razoável
-                                price = price_val
-                                break
-                        except:
-                            continue
-                
-                # Se não encontrou preço, pula para o próximo resultado
-                if price is None:
-                    continue
-
-                # Extrai área
-                area = None
-                for pattern in area_patterns:
-                    matches = re.findall(pattern, full_text)
-                    if matches:
-                        try:
-                            area = float(matches[0])
-                            if 10 <= area <= 2000: # Filtro de área razoável
-                                break
-                        except:
-                            continue
-
-                results.append({
-                    'title': title,
-                    'link': link,
-                    'price': price,
-                    'area': area,
-                    'price_per_m2': price / area if area and price else None
-                })
+            # Se não encontrou preço, pula para o próximo resultado
+            if extracao.preco is None:
+                continue
+
+            results.append({
+                'title': title,
+                'link': link,
+                'price': extracao.preco,
+                'area': extracao.area,
+                'price_per_m2': extracao.preco_m2
+            })
         
         # Delay para evitar ser bloqueado
         time.sleep(1)
@@ -249,6 +162,9 @@ def search_real_estate_google_legacy(endereco):
 
 st.set_page_config(page_title="Simulador de Arremate de Imóvel em Leilão", layout="centered")
 
+# Tempos das etapas desta execução do script (painel de depuração no fim)
+rodada = iniciar_rodada()
+
 st.markdown("""
     <style>
         .stTextInput > label {
@@ -263,323 +179,77 @@ st.markdown("""
 
 st.title("Simulador de Arremate de Imóvel em Leilão")
 
-def prepare_address(endereco):
-    # Remove caracteres especiais e palavras comuns que podem atrapalhar a busca
-    endereco = endereco.lower()
-    endereco = endereco.replace('rua', '').replace('avenida', '').replace('av.', '')
-    endereco = endereco.replace('número', '').replace('n°', '').replace('nº', '')
-    # Remove espaços extras
-    endereco = ' '.join(endereco.split())
-    return endereco
-
-def search_real_estate(endereco):
-    """Busca preços de imóveis semelhantes usando a SerpApi (Google).
-
-    Para cada portal (Zap, VivaReal, Imovelweb, OLX) executa uma busca
-    `site:<portal> "<endereço>" venda apartamento` e extrai o primeiro
-    preço que aparecer no título ou snippet.   
-    Retorna uma lista de preços (float) únicos e também exibe um resumo
-    no Streamlit.
-    """
-
-    # ------------------------------------------------------------------
-    # Configurações iniciais
-    # ------------------------------------------------------------------
-    api_key = os.getenv("SERPAPI_KEY", "4d35af028f15b5832f7a07975c1818cbf39adc858aed394c72a83a2dea86c6c5")
-    if not api_key:
-        st.error("Chave SerpApi não configurada")
-        return []
-
-    search_address = prepare_address(endereco)
-    sites = [
-        "zapimoveis.com.br",
-        "vivareal.com.br",
-        "imovelweb.com.br",
-        "olx.com.br",
-    ]
-    price_regex = re.compile(r"r\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)", re.IGNORECASE)
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-    }
-
-    resultados = []  # [{'price': float, 'site': str, 'title': str, 'link': str}]
-
-    for site in sites:
-        st.write(f"🔍 Buscando em {site} …")
-        params = {
-            "engine": "google",
-            "q": f'site:{site} "{search_address}" venda apartamento',
-            "hl": "pt-BR",
-            "num": 10,
-            "api_key": api_key,
-        }
-        try:
-            resp = requests.get("https://serpapi.com/search.json", params=params, timeout=20, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
-        except Exception as e:
-            st.warning(f"⚠️ Erro na SerpApi para {site}: {e}")
-            continue
-
-        for item in data.get("organic_results", []):
-            title = item.get("title", "")
-            snippet = item.get("snippet", "")
-            link = item.get("link", "")
-            texto = f"{title} {snippet}"
-            m = price_regex.search(texto)
-            if m:
-                try:
-                    preco = float(m.group(1).replace(".", "").replace(",", "."))
-                    if 10000 <= preco <= 50000000:  # filtro
-                        resultados.append({"price": preco, "site": site, "title": title, "link": link})
-                        break  # pega apenas primeiro preço por portal
-                except ValueError:
-                    continue
-        time.sleep(1)  # pequeno delay
-
-    # ------------------------------------------------------------------
-    # Pós-processamento e exibição
-    # ------------------------------------------------------------------
-    if not resultados:
-        st.warning("Não foram encontrados preços de imóveis similares. Tente um endereço mais específico ou confirme se a SerpApi possui créditos.")
-        return []
-
-    # remover duplicados
-    precos_unicos = {round(r["price"]): r["price"] for r in resultados}.values()
-
+def exibir_precos_coletados(resultados):
     st.markdown("### Preços coletados")
     for r in resultados:
         st.write(f"{r['site']}: R$ {r['price']:,.0f} — [{r['title']}]({r['link']})")
 
-    return list(precos_unicos)
-
-    # ------------------------------------------------------------------
-    # 1. Consulta SerpApi (Google) e extrai preços do JSON
-    # ------------------------------------------------------------------
-    search_address = prepare_address(endereco)
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
-    sites = ['zapimoveis.com.br', 'vivareal.com.br', 'imovelweb.com.br', 'olx.com.br']
-    price_regex = re.compile(r'r\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)', re.IGNORECASE)
-
-    resultados = []  # lista de dicts
-
-    for site in sites:
-        st.write(f"Buscando em {site} via SerpApi …")
-        params = {
-            'engine': 'google',
-            'q': f'site:{site} "{search_address}" venda apartamento',
-            'hl': 'pt-BR',
-            'num': 10,
-            'api_key': api_key
-        }
-        url = 'https://serpapi.com/search.json'
-        try:
-            resp = requests.get(url, params=params, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-        except Exception as e:
-            st.warning(f"SerpApi falhou para {site}: {e}")
-            continue
-
-        results = data.get('organic_results', [])
-        if not results:
-            continue
-
-
-        if not hits:
-            hits = []  # mantém compatível abaixo
-        
-
-            link_tag = hit.find('a', class_='result__a')
-            snippet_tag = hit.find('a', class_='result__snippet')
-            if not link_tag:
-                continue
-            titulo = link_tag.get_text(" ", strip=True)
-            link = link_tag.get('href')
-            snippet = snippet_tag.get_text(" ", strip=True) if snippet_tag else ''
-            texto_completo = f"{titulo} {snippet}".lower()
-
-            # 1ª tentativa: preço no snippet
-            preco = None
-            m = price_regex.search(texto_completo)
-            if m:
-                try:
-                    preco = float(m.group(1).replace('.', '').replace(',', '.'))
-                except ValueError:
-                    preco = None
-
-            # 2ª tentativa: visitar a página, caso ainda não tenha preço
-            if preco is None:
-                try:
-                    page = requests.get(link, headers=headers, timeout=10)
-                    # alguns portais bloqueiam; pulamos se status != 200
-                    if page.status_code == 200 and 'text/html' in page.headers.get('Content-Type', ''):
-                        texto_html = page.text.lower()
-                        m2 = price_regex.search(texto_html)
-                        if m2:
-                            preco = float(m2.group(1).replace('.', '').replace(',', '.'))
-                except Exception:
-                    pass  # ignora erro de conexão / timeout
-                time.sleep(1)  # pequena pausa para não sobrecarregar
-
-            if preco and 10000 <= preco <= 50000000:
-                resultados.append({'price': preco, 'link': link, 'title': titulo, 'site': site})
-
-
-
-
-        # ------------------------------------------------------------------
-        if not any(r['site'] == site for r in resultados):
-            google_url = f"https://www.google.com/search?q=" + quote(f'site:{site} "{search_address}" venda apartamento') + "&num=10&hl=pt-BR"
-            try:
-                g_resp = requests.get(google_url, headers=headers, timeout=10)
-                if g_resp.status_code == 200:
-                    texto_html = g_resp.text.lower()
-                    for m in price_regex.finditer(texto_html):
-                        try:
-                            preco = float(m.group(1).replace('.', '').replace(',', '.'))
-                            if 10000 <= preco <= 50000000:
-                                resultados.append({'price': preco, 'link': google_url, 'title': 'Google snippet', 'site': site})
-                        except ValueError:
-                            continue
-            except Exception as e:
-                st.warning(f"Google fallback falhou para {site}: {e}")
-
-    # ------------------------------------------------------------------
-    # 2. Pós-processamento dos resultados
-    # ------------------------------------------------------------------
-    if not resultados:
-        return []
-
-    # remove preços duplicados (variação centavos irrelevante -> arredonda)
-    precos_unicos = {}
-    for r in resultados:
-        chave = round(r['price'])
-        if chave not in precos_unicos:
-            precos_unicos[chave] = r['price']
-
-    return list(precos_unicos.values())
-
-    # Headers para parecer um navegador normal
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
+@st.fragment(run_every=0.5)
+def aguardar_relatorio(futuro):
+    """Redesenha só este trecho da página até o relatório ficar pronto."""
+    if futuro.done():
+        st.rerun()
+    st.caption("⏳ Gerando relatório em PDF…")
+
+def exibir_relatorio(futuro):
+    if not futuro.done():
+        aguardar_relatorio(futuro)
+    elif futuro.exception() is not None:
+        st.error(f"Não foi possível gerar o PDF: {futuro.exception()}")
+    else:
+        st.download_button("Baixar PDF", futuro.result(), file_name="analise_imovel.pdf", mime="application/pdf")
 
-    # Lista para armazenar os resultados
-    results = []
+@st.cache_resource
+def recursos_busca():
+    """Sessão HTTP (pool keep-alive), cache, base de comparáveis e fila de buscas compartilhados por todas as sessões do servidor."""
+    return sessao_compartilhada(), cache_compartilhado(), base_compartilhada(), fila_compartilhada()
 
+def chave_serpapi():
+    """Chave da SerpApi lida de `st.secrets` ou da variável de ambiente SERPAPI_KEY; None se não houver."""
     try:
-        # Usa a API do DuckDuckGo para buscar
-        sites = ['zapimoveis.com.br', 'vivareal.com.br', 'imovelweb.com.br']
-
-        for site in sites:
-            st.write(f"Buscando em {site}...")
-
-            # Monta a URL de busca
-            search_query = f"site:{site} {search_address}"
-            encoded_query = quote(search_query)
-            url = f"https://duckduckgo.com/?q={encoded_query}&format=json&no_html=1&no_redirect=1"
-
-            try:
-                response = requests.get(url, headers=headers)
-                
-                if response.status_code == 200:
-                    text = response.text
-                    price_patterns = [
-                        r'R\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)',
-                        r'R\$\s*(\d+\.?\d*)'
-                    ]
-                    area_patterns = [
-                        r'(\d+)\s*m²',
-                        r'(\d+)\s*metros quadrados',
-                        r'área\s*(?:total|privativa|útil)?\s*(?:de)?\s*(\d+)\s*m²'
-                    ]
-                    for pattern in price_patterns:
-                        matches = re.findall(pattern, text, re.IGNORECASE)
-                        for match in matches:
-                            try:
-                                price_str = match.replace('.', '').replace(',', '.')
-                                price = float(price_str)
-                                if 100000 <= price <= 10000000:
-                                    area = None
-                                    for area_pattern in area_patterns:
-                                        area_matches = re.findall(area_pattern, text, re.IGNORECASE)
-                                        if area_matches:
-                                            try:
-                                                area = float(area_matches[0])
-                                                if 20 <= area <= 1000:
-                                                    break
-                                            except:
-                                                continue
-                                    results.append({
-                                        'price': price,
-                                        'area': area,
-                                        'price_per_m2': price/area if area else None,
-                                        'site': site
-                                    })
-                            except:
-                                continue
-                else:
-                    st.warning(f"Não foi possível acessar resultados de {site}")
-            except Exception as e:
-                st.warning(f"Erro ao buscar em {site}: {str(e)}")
-                continue
-            
-
-            time.sleep(1)
-    
-    except Exception as e:
-        st.error(f"Erro durante a busca: {str(e)}")
-        return []
-    
-    unique_results = []
-    seen_prices = set()
-    for r in results:
-        if r['price'] not in seen_prices:
-            unique_results.append(r)
-            seen_prices.add(r['price'])
-    final_results = unique_results[:5]
-    
-    if final_results:
-        st.markdown("### Anúncios Similares Encontrados")
-        cols = st.columns(min(len(final_results), 5))
-        prices = []
-        areas = []
-        prices_per_m2 = []
-        for idx, (result, col) in enumerate(zip(final_results, cols)):
-            with col:
-                st.markdown(f"**Anúncio {idx+1}**")
-                st.markdown(f"Fonte: {result['site']}")
-                st.markdown(f"Preço: R$ {result['price']:,.2f}")
-                if result['area']:
-                    st.markdown(f"Área: {result['area']:.0f} m²")
-                if result['price_per_m2']:
-                    st.markdown(f"R$/m²: {result['price_per_m2']:,.2f}")
-                prices.append(result['price'])
-                if result['area']:
-                    areas.append(result['area'])
-                if result['price_per_m2']:
-                    prices_per_m2.append(result['price_per_m2'])
-        
-        st.markdown("### Médias Calculadas")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            avg_price = sum(prices) / len(prices)
-            st.metric("Preço Médio", f"R$ {avg_price:,.2f}")
-        with col2:
-            if areas:
-                avg_area = sum(areas) / len(areas)
-                st.metric("Área Média", f"{avg_area:.0f} m²")
-        with col3:
-            if prices_per_m2:
-                avg_price_per_m2 = sum(prices_per_m2) / len(prices_per_m2)
-                st.metric("R$/m² Médio", f"R$ {avg_price_per_m2:,.2f}")
-        return prices
-    else:
-        st.warning("Não foram encontrados anúncios similares. Tente um endereço mais específico.")
-        return []
+        chave = st.secrets.get("SERPAPI_KEY")
+    except FileNotFoundError:  # sem secrets.toml
+        chave = None
+    return chave or os.getenv("SERPAPI_KEY")
+
+@st.fragment(run_every=1.0)
+def acompanhar_busca(tarefa):
+    """Andamento da busca em segundo plano, portal a portal, com os preços já encontrados."""
+    estado = recursos_busca()[3].estado(tarefa)
+    if estado is None or estado["estado"] in TERMINAIS:
+        st.rerun()
+    portais = estado["portais"]
+    prontos = sum(p["estado"] != PENDENTE for p in portais)
+    st.progress(prontos / len(portais), text=f"Buscando ofertas similares… {prontos}/{len(portais)} portais")
+    for portal in portais:
+        if portal["estado"] == PENDENTE:
+            st.caption(f"🔍 {portal['site']} …")
+        elif portal["estado"] == ERRO:
+            st.caption(f"⚠️ {portal['site']}: {portal['erro']}")
+        else:
+            st.caption(f"✅ {portal['site']}: {portal['n']} anúncio(s) com preço")
+    if estado["anuncios"]:
+        exibir_precos_coletados(estado["anuncios"])
+
+def carregar_busca(analise, endereco, area_m2):
+    """Se a tarefa de busca da análise terminou, guarda os anúncios e as estatísticas na análise."""
+    estado = recursos_busca()[3].estado(analise["tarefa"])
+    if estado is None:
+        analise["erro_busca"] = "A busca não foi encontrada; simule novamente."
+    elif estado["estado"] == ERRO:
+        analise["erro_busca"] = estado["erro"]
+    elif estado["estado"] == CONCLUIDA:
+        analise["mensagem_busca"] = estado["mensagem"]
+        analise["erros_portais"] = [(p["site"], p["erro"]) for p in estado["portais"] if p["estado"] == ERRO]
+        with medir("estatisticas_comparaveis"):
+            analise["estimativa"] = recursos_busca()[2].estimar(endereco, area_m2)
+            if estado["anuncios"]:
+                analise["estatisticas"] = estatisticas_comparaveis(anuncios_unicos(estado["anuncios"]), area_m2)
+        analise["resultados"] = estado["anuncios"]
+
+# Histórico de leilões (leilao.historico): só entra no formulário depois de ingerido
+historico = historico_compartilhado()
+historico_disponivel = historico.disponivel
 
 with st.form("simulador_form"):
     # Seção de Endereço
@@ -631,73 +301,273 @@ with st.form("simulador_form"):
         else:
             comissao_venda_percent = 0.0
 
+    usar_faixa_historica = estimar_mercado = False
+    if historico_disponivel:
+        with st.expander("Histórico de leilões da região"):
+            usar_faixa_historica = st.checkbox("Usar a faixa de ágios típica da região na tabela", value=True)
+            estimar_mercado = st.checkbox("Estimar o valor de mercado pelo histórico (ignora o valor informado acima)", value=False)
+
+    with st.expander("Pagamento e fluxo de caixa"):
+        parcelado = st.checkbox("Arremate parcelado", value=False)
+        col_fluxo1, col_fluxo2 = st.columns(2)
+        with col_fluxo1:
+            entrada_percent = st.number_input("Entrada (%)", min_value=0.0, max_value=100.0, step=5.0, value=ENTRADA_PERCENT)
+            parcelas = st.number_input("Número de parcelas", min_value=1, max_value=120, step=1, value=PARCELAS)
+            correcao_mensal_percent = st.number_input("Correção das parcelas (% ao mês)", min_value=0.0, max_value=5.0, step=0.1, format="%.2f", value=0.0)
+        with col_fluxo2:
+            meses_reforma = st.number_input("Duração da reforma (meses)", min_value=1, step=1, value=MESES_REFORMA)
+            taxa_desconto_anual = st.number_input("Taxa de desconto para o VPL (% ao ano)", min_value=0.0, max_value=50.0, step=0.5, value=10.0)
+
+    with st.expander("Lance máximo para uma meta"):
+        meta_tipo = st.selectbox("Meta", ["Nenhuma", "Rendimento mensal mínimo (%)", "Resultado mínimo (R$)"])
+        meta_valor_str = st.text_input("Valor da meta", value="1", key="meta_valor")
+        meta_valor = parse_number(meta_valor_str)
+
+    with st.expander("Lance ótimo contra a concorrência"):
+        otimizar = st.checkbox("Buscar o lance de maior valor esperado", value=False)
+        col_otimo1, col_otimo2 = st.columns(2)
+        with col_otimo1:
+            modelo_concorrencia = st.selectbox("Chance de vitória", ["Concorrentes", "Curva logística"] + ["Histórico da região"] * historico_disponivel)
+            objetivo = st.selectbox("Maximizar", list(OBJETIVOS), format_func=OBJETIVOS.get)
+            concorrentes = st.number_input("Número de concorrentes", min_value=1, max_value=50, step=1, value=3)
+            prob_sem_lance = st.number_input("Chance de um concorrente não dar lance (%)", min_value=0.0, max_value=100.0, step=5.0, value=30.0)
+        with col_otimo2:
+            agio_concorrentes = st.number_input("Ágio médio dos concorrentes (%)", min_value=0.0, max_value=200.0, step=1.0, value=25.0)
+            desvio_concorrentes = st.number_input("Desvio do ágio dos concorrentes (p.p.)", min_value=0.5, max_value=100.0, step=1.0, value=15.0)
+            agio_mediano = st.number_input("Ágio com 50% de chance (logística, %)", min_value=0.0, max_value=200.0, step=1.0, value=25.0)
+            escala_logistica = st.number_input("Escala da logística (p.p.)", min_value=0.5, max_value=100.0, step=0.5, value=8.0)
+
+    with st.expander("Modo de risco (Monte Carlo)"):
+        modo_risco = st.checkbox("Simular incerteza de preço, prazo e reforma", value=False)
+        col_risco1, col_risco2 = st.columns(2)
+        with col_risco1:
+            preco_min_percent = st.number_input("Preço de venda mínimo (% do mercado)", min_value=10.0, max_value=100.0, step=5.0, value=85.0)
+            preco_max_percent = st.number_input("Preço de venda máximo (% do mercado)", min_value=100.0, max_value=200.0, step=5.0, value=110.0)
+            prazo_medio_meses = st.number_input("Prazo médio até a venda (meses, Poisson)", min_value=1, step=1, value=12)
+        with col_risco2:
+            reforma_min_m2 = parse_number(st.text_input("Reforma mínima por m² (R$)", value="800", key="reforma_min"))
+            reforma_max_m2 = parse_number(st.text_input("Reforma máxima por m² (R$)", value="1.500", key="reforma_max"))
+            sorteios = st.selectbox("Número de sorteios por ágio", [100_000, 300_000, 1_000_000], format_func=lambda n: f"{n:,}".replace(",", "."))
+
     submitted = st.form_submit_button("Simular")
 
-if submitted:
-    # Se marcou para analisar ofertas, faz a busca
+# Percentis de ágio e desconto da região do endereço, lidos dos índices
+# pré-agregados do histórico; sugerem a faixa de ágios e o valor de mercado
+regiao = historico.consultar(endereco, area_m2) if historico_disponivel else None
+agios_tabela = list(AGIOS_PADRAO)
+mercado_historico = None
+if regiao is not None:
+    if usar_faixa_historica:
+        agios_tabela = agios_sugeridos(regiao)
+    if estimar_mercado:
+        mercado_historico = valor_mercado_sugerido(regiao, valor_lance)
+        valor_mercado = mercado_historico or valor_mercado
+
+# ----------------------------------------------------------------------
+# Resultados guardados em st.session_state, indexados pelo hash das entradas.
+# Reruns disparados por widgets fora do formulário (PDF, exportação, gráficos)
+# apenas redesenham a análise, sem refazer buscas nem cálculos.
+# ----------------------------------------------------------------------
+entradas = dict(
+    endereco=endereco,
+    analisar_ofertas=analisar_ofertas,
+    valor_lance=valor_lance,
+    valor_mercado=valor_mercado,
+    area_m2=area_m2,
+    custo_reforma_m2=custo_reforma_m2,
+    iptu_mensal=iptu_mensal,
+    condominio_mensal=condominio_mensal,
+    prazo_venda_meses=prazo_venda_meses,
+    assessoria_percent=assessoria_percent,
+    comissao_venda_percent=comissao_venda_percent,
+    meta=(meta_tipo, meta_valor) if meta_tipo != "Nenhuma" else None,
+    agios_percent=agios_tabela,
+    historico=dict(regiao._asdict(), valor_mercado_estimado=mercado_historico) if regiao is not None else None,
+    fluxo=dict(
+        entrada_percent=entrada_percent if parcelado else 100.0,
+        parcelas=parcelas if parcelado else 0,
+        correcao_mensal_percent=correcao_mensal_percent if parcelado else 0.0,
+        meses_reforma=meses_reforma,
+    ),
+    taxa_desconto_anual=taxa_desconto_anual,
+    lance_otimo=dict(
+        objetivo=objetivo,
+        modelo=modelo_concorrencia,
+        curva=dict(concorrentes=concorrentes, media=agio_concorrentes, desvio=desvio_concorrentes, prob_sem_lance=prob_sem_lance / 100)
+        if modelo_concorrencia == "Concorrentes" else dict(mediana=agio_mediano, escala=escala_logistica)
+        if modelo_concorrencia == "Curva logística" else None,
+    ) if otimizar else None,
+    modo_risco=modo_risco,
+    risco=dict(
+        preco_min_percent=preco_min_percent,
+        preco_max_percent=preco_max_percent,
+        prazo_medio_meses=prazo_medio_meses,
+        reforma_min_m2=reforma_min_m2,
+        reforma_max_m2=reforma_max_m2,
+        sorteios=sorteios,
+    ) if modo_risco else None,
+)
+chave_analise = hash_entradas(entradas)
+
+def parametros_simulacao(entradas):
+    """Subconjunto das entradas que corresponde aos argumentos de `simular`."""
+    parametros = dict(entradas)
+    for chave in ("endereco", "analisar_ofertas", "meta", "agios_percent", "historico", "fluxo", "taxa_desconto_anual", "lance_otimo", "modo_risco", "risco"):
+        del parametros[chave]
+    return parametros
+
+analise = st.session_state.get("analise")
+
+if submitted and (analise is None or analise["chave"] != chave_analise):
+    analise = {"chave": chave_analise, "resultados": None, "erro_busca": None}
+
+    # Se marcou para analisar ofertas, a busca vira uma tarefa em segundo plano
+    # (SerpApi ou o provedor de LEILAO_PROVEDOR, em todos os portais): a
+    # simulação aparece já e os comparáveis chegam conforme os portais respondem
     if analisar_ofertas and endereco:
-        st.markdown("### Análise de Ofertas Similares")
-        with st.spinner('Buscando ofertas similares...'):
+        api_key = chave_serpapi()
+        if not api_key and PROVEDOR_PADRAO == "serpapi":
+            analise["erro_busca"] = "Chave SerpApi não configurada: defina SERPAPI_KEY em st.secrets ou no ambiente."
+        else:
             try:
-                st.write("Iniciando busca de preços...")  # Debug: indica início da busca
-                prices = search_real_estate(endereco)
-                
-                if prices:
-                    avg_price = sum(prices) / len(prices)
-                    st.markdown("#### Preços encontrados na região:")
-                    
-                    # Mostra até 5 preços em colunas
-                    price_cols = st.columns(min(5, len(prices)))
-                    for i, price in enumerate(prices[:5]):
-                        with price_cols[i]:
-                            st.markdown(f"**R$ {price:,.2f}**")
-                    
-                    st.markdown(f"**Média dos preços:** R$ {avg_price:,.2f}")
-                    st.markdown(f"**Total de preços encontrados:** {len(prices)}")
-                    
-                    if valor_mercado > 0:
-                        diff_percent = ((valor_mercado - avg_price) / avg_price) * 100
-                        st.markdown(f"**Diferença para valor estimado:** {diff_percent:+.1f}%")
-                else:
-                    st.warning("Não foram encontrados preços de imóveis similares. Tente fornecer um endereço mais específico.")
+                analise["tarefa"] = recursos_busca()[3].submeter(endereco, area_m2, api_key)
             except Exception as e:
-                st.error(f"Erro ao buscar ofertas similares: {str(e)}")
-                st.write("Detalhes do erro para debug:", str(e))  # Debug: mostra detalhes do erro
-
-    # Parâmetros fixos
-    irpf_percent = 15.0
-    itbi_percent = 3.0
-    registro_percent = 1.0
-    comissao_leiloeiro_percent = 5.0
-
-    # Primeiro, mostrar os resultados detalhados para o lance inicial (ágio 0%)
-    agio_percent = 0.0
-    valor_arremate = valor_lance * (1 + agio_percent / 100)
-    ganho_capital = max(valor_mercado - valor_arremate, 0)
-    irpf = ganho_capital * (irpf_percent / 100)
-    itbi = valor_arremate * (itbi_percent / 100)
-    registro = valor_arremate * (registro_percent / 100)
-    total_tributos = irpf + itbi + registro
-
-    comissao_leiloeiro = valor_arremate * (comissao_leiloeiro_percent / 100)
-    assessoria = valor_arremate * (assessoria_percent / 100)
-    total_leiloeiro_assessoria = comissao_leiloeiro + assessoria
-
-    custo_reforma = area_m2 * custo_reforma_m2
-    outros_custos = 0.0
-    total_reforma = custo_reforma + outros_custos
-
-    total_iptu = iptu_mensal * prazo_venda_meses
-    total_condominio = condominio_mensal * prazo_venda_meses
-    total_mensal = total_iptu + total_condominio
-
-    comissao_venda = valor_mercado * (comissao_venda_percent / 100)
-
-    total_outros_custos = total_tributos + total_leiloeiro_assessoria + total_reforma + total_mensal + comissao_venda
-    total_investido = valor_arremate + total_outros_custos
-    resultado = valor_mercado - total_investido
-    percentual = (resultado / total_investido) * 100 if total_investido > 0 else 0
-    rendimento_mensal = ((1 + percentual / 100) ** (1 / prazo_venda_meses) - 1) * 100 if prazo_venda_meses > 0 and percentual > -100 else 0
+                analise["erro_busca"] = str(e)
+
+    # Resultados detalhados para o lance inicial (ágio 0%) e tabela de ágios
+    with medir("calculo"):
+        parametros = parametros_simulacao(entradas)
+        analise["detalhe"] = {k: float(v) for k, v in simular(**parametros, agio_percent=0.0).items()}
+        analise["agios_percent"] = entradas["agios_percent"]
+        analise["tabela"] = simular(**parametros, agio_percent=analise["agios_percent"])
+        # TIR e VPL pelo fluxo de caixa mensal, para o lance inicial e cada ágio
+        analise["fluxo"] = simular_fluxo(parametros, [0] + analise["agios_percent"], taxa_desconto_anual, **entradas["fluxo"])
+        analise["cronograma"] = fluxo_caixa(parametros, 0.0, **entradas["fluxo"])
+
+        if entradas["meta"] is not None:
+            meta_tipo, meta_valor = entradas["meta"]
+            try:
+                if meta_tipo.startswith("Rendimento"):
+                    analise["lance_maximo"] = lance_maximo(parametros, rendimento_mensal_minimo=meta_valor)
+                else:
+                    analise["lance_maximo"] = lance_maximo(parametros, resultado_minimo=meta_valor)
+            except ValueError as e:
+                analise["lance_maximo"] = None
+                analise["erro_lance_maximo"] = str(e)
+
+    # Lance ótimo: valor esperado (chance de vitória × valor) numa grade de 0,1% de ágio
+    if entradas["lance_otimo"] is not None:
+        with medir("otimizacao"):
+            otimo = entradas["lance_otimo"]
+            if otimo["modelo"] == "Concorrentes":
+                curva = CurvaConcorrentes(**otimo["curva"])
+            elif otimo["modelo"] == "Curva logística":
+                curva = CurvaLogistica(**otimo["curva"])
+            else:
+                curva = curva_vitoria(EstatisticaRegional(**{k: v for k, v in entradas["historico"].items() if k in EstatisticaRegional._fields}))
+            analise["lance_otimo"] = otimizar_lance(parametros, curva, objetivo=otimo["objetivo"], taxa_desconto_anual_percent=taxa_desconto_anual, **entradas["fluxo"])
+
+    if modo_risco:
+        with medir("risco"):
+            risco = entradas["risco"]
+            incertos = dict(parametros)
+            del incertos["valor_mercado"], incertos["prazo_venda_meses"], incertos["custo_reforma_m2"]
+            analise["risco"] = simular_risco(
+                incertos,
+                [0] + analise["agios_percent"],
+                valor_mercado=(valor_mercado * risco["preco_min_percent"] / 100, valor_mercado, valor_mercado * risco["preco_max_percent"] / 100),
+                prazo_meses=risco["prazo_medio_meses"],
+                custo_reforma_m2=(min(risco["reforma_min_m2"], risco["reforma_max_m2"]), max(risco["reforma_min_m2"], risco["reforma_max_m2"])),
+                n=risco["sorteios"],
+            )
+    st.session_state["analise"] = analise
+
+if analise is not None and analise["chave"] == chave_analise:
+    if analisar_ofertas and endereco:
+        st.markdown("### Análise de Ofertas Similares")
+        if analise["resultados"] is None and analise["erro_busca"] is None:
+            carregar_busca(analise, endereco, area_m2)
+        if analise["resultados"] is None and analise["erro_busca"] is None:
+            acompanhar_busca(analise["tarefa"])
+        elif analise["erro_busca"] is not None:
+            st.error(f"Erro ao buscar ofertas similares: {analise['erro_busca']}")
+            st.write("Detalhes do erro para debug:", analise["erro_busca"])  # Debug: mostra detalhes do erro
+        elif analise["resultados"]:
+            if analise["mensagem_busca"]:
+                st.write(f"📦 {analise['mensagem_busca']}")
+            for site, erro_site in analise["erros_portais"]:
+                st.warning(f"⚠️ Erro na busca em {site}: {erro_site}")
+            exibir_precos_coletados(analise["resultados"])
+            prices = precos_unicos(analise["resultados"])
+            estatisticas = analise["estatisticas"]
+            st.markdown("#### Preços encontrados na região:")
+            
+            # Mostra até 5 preços em colunas
+            price_cols = st.columns(min(5, len(prices)))
+            for i, price in enumerate(prices[:5]):
+                with price_cols[i]:
+                    st.markdown(f"**R$ {price:,.2f}**")
+            
+            st.markdown(f"**Mediana dos preços:** R$ {estatisticas['preco']['mediana']:,.2f}")
+            st.markdown(f"**Média aparada dos preços:** R$ {estatisticas['preco']['media_aparada']:,.2f}")
+            st.markdown(f"**Total de preços encontrados:** {len(prices)}")
+            repetidos = len(analise["resultados"]) - len(prices)
+            if repetidos > 0:
+                st.caption(f"{repetidos} anúncio(s) do mesmo imóvel em outros portais contado(s) uma única vez.")
+            if estatisticas["preco"]["rejeitados"]:
+                descartados = ", ".join(f"R$ {p:,.0f}" for p in estatisticas["preco"]["rejeitados"])
+                st.markdown(f"**Descartados como outliers:** {descartados}")
+            if estatisticas["preco_m2"] is not None:
+                st.markdown(f"**Mediana do R$/m²:** R$ {estatisticas['preco_m2']['mediana']:,.2f} ({estatisticas['preco_m2']['n_considerados']} anúncios com área)")
+            base_estimativa = "R$/m² × área" if estatisticas["base"] == "m2" else "mediana dos preços"
+            st.markdown(f"**Valor estimado pelos comparáveis ({base_estimativa}):** R$ {estatisticas['valor_estimado']:,.2f}")
+
+            estimativa = analise.get("estimativa")
+            if estimativa is not None and estimativa.valor is not None:
+                st.markdown(f"**Estimativa pela base local:** R$ {estimativa.valor:,.2f} ({estimativa.n} comparáveis)")
+            
+            if valor_mercado > 0:
+                diff_percent = ((valor_mercado - estatisticas["valor_estimado"]) / estatisticas["valor_estimado"]) * 100
+                st.markdown(f"**Diferença para valor estimado:** {diff_percent:+.1f}%")
+        else:
+            for site, erro_site in analise["erros_portais"]:
+                st.warning(f"⚠️ Erro na busca em {site}: {erro_site}")
+            st.warning("Não foram encontrados preços de imóveis similares. Tente fornecer um endereço mais específico.")
+
+    if entradas["historico"] is not None:
+        regiao_historico = entradas["historico"]
+        st.markdown("### Histórico de Leilões da Região")
+        desertos_percent = regiao_historico["desertos"] / (regiao_historico["n"] + regiao_historico["desertos"]) * 100
+        arrematados = f"{regiao_historico['n']:,}".replace(",", ".")
+        st.markdown(f"**{regiao_historico['descricao']}:** {arrematados} leilões arrematados, {desertos_percent:.0f}% desertos")
+        metricas_historico = {"agio": "Ágio do arremate %", "desconto": "Desconto do arremate ao mercado %", "desconto_lance": "Desconto do lance inicial %"}
+        st.dataframe(
+            pd.DataFrame(
+                {rotulo: percentis(regiao_historico[metrica]) for metrica, rotulo in metricas_historico.items() if regiao_historico[metrica] is not None}
+            ).T.rename(columns=str.upper).style.format("{:.1f}"),
+        )
+        if regiao_historico["valor_mercado_estimado"] is not None:
+            st.caption(f"Valor de mercado estimado pelo desconto mediano do lance inicial na região: R$ {regiao_historico['valor_mercado_estimado']:,.2f}")
+        elif estimar_mercado:
+            st.caption("O histórico da região não tem valores de mercado; usado o valor informado.")
+
+    detalhe = analise["detalhe"]
+    valor_arremate = detalhe["valor_arremate"]
+    irpf = detalhe["irpf"]
+    itbi = detalhe["itbi"]
+    registro = detalhe["registro"]
+    total_tributos = detalhe["total_tributos"]
+    comissao_leiloeiro = detalhe["comissao_leiloeiro"]
+    assessoria = detalhe["assessoria"]
+    custo_reforma = detalhe["custo_reforma"]
+    total_iptu = detalhe["total_iptu"]
+    total_condominio = detalhe["total_condominio"]
+    comissao_venda = detalhe["comissao_venda"]
+    total_outros_custos = detalhe["total_outros_custos"]
+    total_investido = detalhe["total_investido"]
+    resultado = detalhe["resultado"]
+    percentual = detalhe["percentual"]
+    rendimento_mensal = detalhe["rendimento_mensal"]
 
     # Exibição dos resultados em colunas para economizar espaço
     st.subheader("Resultados para o Lance Inicial")
@@ -744,77 +614,214 @@ if submitted:
         st.markdown(f"**Retorno:** {percentual:.1f}%")
         st.markdown(f"**Rendimento Mensal:** {rendimento_mensal:.2f}%")
 
+    fluxo = analise["fluxo"]
+    col_tir1, col_tir2 = st.columns(2)
+    with col_tir1:
+        st.markdown(f"**TIR (fluxo de caixa):** {formatar_taxa(fluxo['tir_mensal'][0])} a.m. / {formatar_taxa(fluxo['tir_anual'][0])} a.a.")
+        st.markdown(f"**Capital Máximo Exposto:** R$ {fluxo['exposicao_maxima'][0]:,.2f}")
+    with col_tir2:
+        st.markdown(f"**VPL a {taxa_desconto_anual:.1f}% a.a.:** R$ {fluxo['vpl'][0]:,.2f}")
+
+    with st.expander("Fluxo de caixa mês a mês"):
+        cronograma = analise["cronograma"]
+        st.dataframe(
+            pd.DataFrame({
+                "Arremate": cronograma["arremate"],
+                "Despesas do arremate": cronograma["despesas_arremate"],
+                "Reforma": cronograma["reforma"],
+                "IPTU e condomínio": cronograma["mensais"],
+                "Venda": cronograma["venda"],
+                "Total": cronograma["total"],
+                "Acumulado": np.cumsum(cronograma["total"]),
+            }, index=pd.Index(np.arange(len(cronograma["total"])), name="Mês")).style.format("{:,.0f}"),
+        )
+
+    if entradas["meta"] is not None:
+        meta_tipo, meta_valor = entradas["meta"]
+        st.markdown("---")
+        st.subheader("Lance Máximo para a Meta")
+        maximo = analise["lance_maximo"]
+        if analise.get("erro_lance_maximo"):
+            st.warning(analise["erro_lance_maximo"])
+        elif maximo is None or maximo["agio_percent"] < 0:
+            st.warning(f"Nenhum lance a partir do inicial atinge a meta ({meta_tipo}: {meta_valor:,.2f}).")
+        else:
+            col5, col6 = st.columns(2)
+            with col5:
+                st.markdown(f"**Arremate Máximo:** R$ {maximo['valor_arremate']:,.2f}")
+                st.markdown(f"**Ágio Máximo:** {maximo['agio_percent']:.2f}%")
+            with col6:
+                st.markdown(f"**Resultado:** R$ {maximo['resultado']:,.2f}")
+                st.markdown(f"**Rendimento Mensal:** {maximo['rendimento_mensal']:.2f}%")
+
+    if entradas["lance_otimo"] is not None:
+        st.markdown("---")
+        st.subheader("Lance Ótimo contra a Concorrência")
+        objetivo = entradas["lance_otimo"]["objetivo"]
+        curva_otimo = analise["lance_otimo"]
+        otimo = curva_otimo["otimo"]
+        if otimo is None:
+            st.warning(f"Nenhum lance tem {OBJETIVOS[objetivo].lower()} positivo com a concorrência informada.")
+        else:
+            col_otimo1, col_otimo2 = st.columns(2)
+            with col_otimo1:
+                st.markdown(f"**Lance Ótimo:** R$ {otimo['valor_arremate']:,.2f}")
+                st.markdown(f"**Ágio:** {otimo['agio_percent']:.1f}%")
+                st.markdown(f"**Chance de Vitória:** {otimo['prob_vitoria'] * 100:.1f}%")
+            with col_otimo2:
+                st.markdown(f"**{OBJETIVOS[objetivo]}:** R$ {otimo['esperado']:,.2f}")
+                st.markdown(f"**Se vencer:** R$ {otimo['valor']:,.2f}")
+        st.line_chart(
+            pd.DataFrame({OBJETIVOS[objetivo]: curva_otimo["esperado"]}, index=pd.Index(curva_otimo["agio_percent"], name="Ágio %")),
+        )
+        st.caption(f"Chance de vitória e valor esperado avaliados em {len(curva_otimo['agio_percent']):,} ágios de 0% a 200%.".replace(",", "."))
+
     # Agora, mostrar a tabela de simulações com diferentes percentuais de ágio
     st.markdown("---")
     st.subheader("Simulações com Diferentes Percentuais de Ágio")
     
     # Estilo da tabela com fonte monoespaçada para alinhamento uniforme
     st.markdown('<div class="result-table">', unsafe_allow_html=True)
-    st.markdown("""
-    | Ágio % | Valor Final | Resultado | Retorno % | Rend. Mensal % |
-    |---------|------------|-----------|-----------|----------------|""")
+    # Percentuais de ágio simulados, calculados numa única passada
+    agios_percent = analise["agios_percent"]
+    tabela = analise["tabela"]
 
-    # Lista de percentuais de ágio para simular
-    agios_percent = [10, 20, 30, 40, 50, 60, 70, 80]
-    
-    # Calcular resultados para cada percentual de ágio
-    for agio_percent in agios_percent:
-        # Cálculos
-        valor_arremate = valor_lance * (1 + agio_percent / 100)
-        ganho_capital = max(valor_mercado - valor_arremate, 0)
-        irpf = ganho_capital * (irpf_percent / 100)
-        itbi = valor_arremate * (itbi_percent / 100)
-        registro = valor_arremate * (registro_percent / 100)
-        total_tributos = irpf + itbi + registro
-
-        comissao_leiloeiro = valor_arremate * (comissao_leiloeiro_percent / 100)
-        assessoria = valor_arremate * (assessoria_percent / 100)
-        total_leiloeiro_assessoria = comissao_leiloeiro + assessoria
-
-        custo_reforma = area_m2 * custo_reforma_m2
-        outros_custos = 0.0
-        total_reforma = custo_reforma + outros_custos
-
-        total_iptu = iptu_mensal * prazo_venda_meses
-        total_condominio = condominio_mensal * prazo_venda_meses
-        total_mensal = total_iptu + total_condominio
-
-        comissao_venda = valor_mercado * (comissao_venda_percent / 100)
-
-        total_outros_custos = total_tributos + total_leiloeiro_assessoria + total_reforma + total_mensal + comissao_venda
-        total_investido = valor_arremate + total_outros_custos
-        resultado = valor_mercado - total_investido
-        percentual = (resultado / total_investido) * 100 if total_investido > 0 else 0
-        rendimento_mensal = ((1 + percentual / 100) ** (1 / prazo_venda_meses) - 1) * 100 if prazo_venda_meses > 0 and percentual > -100 else 0
-
-        # Exibir linha da tabela com formatação uniforme
-        st.markdown(f"| {agio_percent:>3} | {valor_arremate:>11,.0f} | **{resultado:>9,.0f}** | {percentual:>8.1f} | {rendimento_mensal:>13.2f} |")
+    # Tabela inteira montada de uma vez e enviada num único elemento
+    with medir("renderizacao_tabela"):
+        linhas = [
+            "| Ágio % | Valor Final | Resultado | Retorno % | Rend. Mensal % | TIR Mensal | VPL |",
+            "|---------|------------|-----------|-----------|----------------|------------|-----|",
+        ]
+        for i, agio_percent in enumerate(agios_percent):
+            linhas.append(
+                f"| {agio_percent:>3} | {tabela['valor_arremate'][i]:>11,.0f} | **{tabela['resultado'][i]:>9,.0f}** | {tabela['percentual'][i]:>8.1f} "
+                f"| {tabela['rendimento_mensal'][i]:>13.2f} | {formatar_taxa(fluxo['tir_mensal'][i + 1]):>12} | {fluxo['vpl'][i + 1]:>9,.0f} |"
+            )
+        st.markdown("\n".join(linhas))
     
     st.markdown('</div>', unsafe_allow_html=True)
 
-    # Perguntar se o usuário deseja gerar um PDF da análise
+    if analise.get("risco") is not None:
+        st.markdown("---")
+        st.subheader("Modo de Risco (Monte Carlo)")
+        risco = analise["risco"]
+        st.caption(f"{entradas['risco']['sorteios']:,} sorteios por ágio".replace(",", "."))
+        st.dataframe(
+            pd.DataFrame({
+                "Ágio %": risco["agio_percent"],
+                "Resultado P5": risco["resultado_p5"],
+                "Resultado P50": risco["resultado_p50"],
+                "Resultado P95": risco["resultado_p95"],
+                "Rend. Mensal P5 %": risco["rendimento_mensal_p5"],
+                "Rend. Mensal P50 %": risco["rendimento_mensal_p50"],
+                "Rend. Mensal P95 %": risco["rendimento_mensal_p95"],
+                "Prob. Prejuízo %": risco["prob_prejuizo"] * 100,
+            }).style.format({
+                "Ágio %": "{:.0f}",
+                "Resultado P5": "{:,.0f}",
+                "Resultado P50": "{:,.0f}",
+                "Resultado P95": "{:,.0f}",
+                "Rend. Mensal P5 %": "{:.2f}",
+                "Rend. Mensal P50 %": "{:.2f}",
+                "Rend. Mensal P95 %": "{:.2f}",
+                "Prob. Prejuízo %": "{:.1f}",
+            }),
+            hide_index=True,
+        )
+
+    # Sensibilidade 2-D: os controles ficam fora do formulário e a grade
+    # calculada fica guardada na análise
+    st.markdown("---")
+    st.subheader("Sensibilidade: Ágio × Prazo / Valor de Mercado")
+    col_sens1, col_sens2, col_sens3 = st.columns(3)
+    with col_sens1:
+        eixo = st.selectbox("Eixo", list(EIXOS), format_func=EIXOS.get)
+    with col_sens2:
+        metricas = {"resultado": "Resultado (R$)", "percentual": "Retorno %", "rendimento_mensal": "Rend. Mensal %"}
+        metrica = st.selectbox("Métrica", list(metricas), format_func=metricas.get)
+    with col_sens3:
+        passo_agio = st.select_slider("Passo do ágio (%)", options=[1, 2, 5, 10], value=5)
+
+    grades = analise.setdefault("grades", {})
+    chave_grade = (eixo, metrica, passo_agio)
+    if chave_grade not in grades:
+        agios_grade = np.arange(0, 100 + passo_agio, passo_agio)
+        if eixo == "prazo_venda_meses":
+            colunas = np.arange(1, 37)
+            valores = colunas
+        else:
+            colunas = variacoes_mercado(30.0, 5.0)
+            valores = valor_mercado * (1 + colunas / 100)
+        grades[chave_grade] = pd.DataFrame(
+            grade_sensibilidade(parametros_simulacao(entradas), agios_grade, eixo, valores, metrica),
+            index=pd.Index(agios_grade, name="Ágio %"),
+            columns=[f"{c:+.0f}%" if eixo == "valor_mercado" else f"{c:.0f}" for c in colunas],
+        )
+    st.dataframe(grades[chave_grade].style.format("{:,.0f}" if metrica == "resultado" else "{:.2f}"))
+
+    # Relatório em PDF: gerado em segundo plano e guardado em disco pelo hash
+    # dos dados, de modo que baixá-lo de novo é imediato
     st.markdown("---")
     gerar_pdf = st.checkbox("Deseja gerar um PDF desta análise?")
     if gerar_pdf:
-        import io
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-
-        buffer = io.BytesIO()
-        c = canvas.Canvas(buffer, pagesize=A4)
-        y = 800
-        linhas = [
-            "Simulação de Arremate de Imóvel",
-            f"Endereço: {endereco}",
-            f"Valor de mercado: R$ {valor_mercado:,.2f}",
-            f"Lance inicial: R$ {valor_lance:,.2f}",
-            "---",
-            f"Total investido: R$ {total_investido:,.2f}",
-            f"Resultado: R$ {resultado:,.2f} ({percentual:.1f}%)",
-        ]
-        for linha in linhas:
-            c.drawString(30, y, linha)
-            y -= 20
-        c.save()
-        buffer.seek(0)
-        st.download_button("Baixar PDF", buffer, file_name="analise_imovel.pdf", mime="application/pdf") 
\ No newline at end of file
+        maximo = analise.get("lance_maximo")
+        dados = dados_relatorio(
+            parametros_simulacao(entradas),
+            analise["agios_percent"],
+            endereco=endereco,
+            estatisticas=analise.get("estatisticas") if analise["resultados"] else None,
+            anuncios=anuncios_unicos(analise["resultados"]) if analise["resultados"] else None,
+            lance_maximo=maximo if maximo is not None and maximo["agio_percent"] >= 0 else None,
+            risco=analise.get("risco"),
+        )
+        # Guardado pelo hash dos dados: um PDF pedido durante a busca é refeito
+        # quando os comparáveis chegam
+        chave = chave_relatorio(dados)
+        if analise.get("chave_relatorio") != chave:
+            analise["relatorio"] = agendar_relatorio(dados)
+            analise["chave_relatorio"] = chave
+        exibir_relatorio(analise["relatorio"])
+
+# ----------------------------------------------------------------------
+# Depuração: tempos por etapa desta execução e percentis do processo, com
+# exportação em JSON ou no formato do Prometheus
+# ----------------------------------------------------------------------
+METRICAS.gravar()
+with st.expander("Depuração: tempos por etapa"):
+    if rodada:
+        st.markdown("**Esta execução**")
+        st.dataframe(
+            pd.DataFrame([
+                {"Etapa": m["etapa"], "Detalhe": ", ".join(f"{k}={v}" for k, v in m.items() if k not in ("etapa", "segundos")), "ms": m["segundos"] * 1000}
+                for m in rodada
+            ]).style.format({"ms": "{:.1f}"}),
+            hide_index=True,
+        )
+    else:
+        st.caption("Nenhuma etapa medida nesta execução (análise reaproveitada da sessão).")
+    resumo_metricas = METRICAS.resumo()
+    if resumo_metricas["etapas"]:
+        st.markdown("**Desde o início do servidor**")
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Etapa": item["etapa"],
+                    "Detalhe": ", ".join(f"{k}={v}" for k, v in item["rotulos"].items()),
+                    "N": item["n"],
+                    "p50 ms": item["p50"] * 1000,
+                    "p95 ms": item["p95"] * 1000,
+                    "Máx. ms": item["max"] * 1000,
+                }
+                for item in resumo_metricas["etapas"]
+            ]).style.format({"p50 ms": "{:.1f}", "p95 ms": "{:.1f}", "Máx. ms": "{:.1f}"}),
+            hide_index=True,
+        )
+    for contador in resumo_metricas["contadores"]:
+        detalhe = ", ".join(f"{k}={v}" for k, v in contador["rotulos"].items())
+        valor_contador = f"{contador['valor']:,}".replace(",", ".")
+        st.caption(f"{contador['nome']}{f' ({detalhe})' if detalhe else ''}: {valor_contador}")
+    col_metricas1, col_metricas2 = st.columns(2)
+    with col_metricas1:
+        st.download_button("Métricas (JSON)", METRICAS.json(), file_name="metricas.json", mime="application/json")
+    with col_metricas2:
+        st.download_button("Métricas (Prometheus)", METRICAS.prometheus(), file_name="metricas.prom", mime="text/plain")
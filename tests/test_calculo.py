@@ -0,0 +1,67 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from leilao.calculo import COLUNAS, faixa_agios, simular
+
+
+def simular_escalar(valor_lance, valor_mercado, area_m2, custo_reforma_m2, iptu_mensal, condominio_mensal,
+                    prazo_venda_meses, assessoria_percent, comissao_venda_percent, agio_percent):
+    # Fórmulas do simulador original, um ágio por vez
+    irpf_percent, itbi_percent, registro_percent, comissao_leiloeiro_percent = 15.0, 3.0, 1.0, 5.0
+    valor_arremate = valor_lance * (1 + agio_percent / 100)
+    ganho_capital = max(valor_mercado - valor_arremate, 0)
+    total_tributos = ganho_capital * irpf_percent / 100 + valor_arremate * (itbi_percent + registro_percent) / 100
+    total_leiloeiro_assessoria = valor_arremate * (comissao_leiloeiro_percent + assessoria_percent) / 100
+    total_reforma = area_m2 * custo_reforma_m2
+    total_mensal = (iptu_mensal + condominio_mensal) * prazo_venda_meses
+    comissao_venda = valor_mercado * (comissao_venda_percent / 100)
+    total_investido = valor_arremate + total_tributos + total_leiloeiro_assessoria + total_reforma + total_mensal + comissao_venda
+    resultado = valor_mercado - total_investido
+    percentual = (resultado / total_investido) * 100 if total_investido > 0 else 0
+    rendimento_mensal = ((1 + percentual / 100) ** (1 / prazo_venda_meses) - 1) * 100 if prazo_venda_meses > 0 and percentual > -100 else 0
+    return {
+        "valor_arremate": valor_arremate,
+        "total_investido": total_investido,
+        "resultado": resultado,
+        "percentual": percentual,
+        "rendimento_mensal": rendimento_mensal,
+    }
+
+
+CASOS = list(itertools.product(
+    [0.0, 250000.0, 500000.0],
+    [0.0, 800000.0, 1000000.0],
+    [0.0, 80.0],
+    [12, 0],
+    [0.0, 6.0],
+))
+AGIOS = [0, 10, 20, 30, 40, 50, 60, 70, 80]
+
+
+@pytest.mark.parametrize("valor_lance, valor_mercado, area_m2, prazo, assessoria", CASOS)
+def test_igual_as_formulas_escalares(valor_lance, valor_mercado, area_m2, prazo, assessoria):
+    entradas = dict(valor_lance=valor_lance, valor_mercado=valor_mercado, area_m2=area_m2, custo_reforma_m2=1000.0,
+                    iptu_mensal=100.0, condominio_mensal=1500.0, prazo_venda_meses=prazo,
+                    assessoria_percent=assessoria, comissao_venda_percent=5.0)
+    tabela = simular(**entradas, agio_percent=AGIOS)
+    for i, agio in enumerate(AGIOS):
+        esperado = simular_escalar(**entradas, agio_percent=agio)
+        for coluna, valor in esperado.items():
+            assert tabela[coluna][i] == pytest.approx(valor, rel=1e-12, abs=1e-9), coluna
+
+
+def test_escalar_e_broadcasting():
+    detalhe = simular(500000.0, 1000000.0, 100.0, 1000.0, 100.0, 1500.0, 12)
+    assert set(detalhe) == set(COLUNAS)
+    assert all(np.ndim(v) == 0 for v in detalhe.values())
+    grade = simular(500000.0, np.array([[800000.0], [1000000.0]]), 100.0, 1000.0, 100.0, 1500.0, 12, agio_percent=[0, 10, 20])
+    assert all(v.shape == (2, 3) for v in grade.values())
+    assert grade["resultado"][1, 0] == pytest.approx(float(detalhe["resultado"]))
+
+
+def test_faixa_agios():
+    agios = faixa_agios(0.0, 200.0, 0.1)
+    assert len(agios) == 2001
+    assert agios[0] == 0.0 and agios[-1] == 200.0 and agios[1234] == 123.4
@@ -0,0 +1,45 @@
+from leilao.duplicatas import agrupar, deduplicar, dominio, mesmo_imovel, normalizar_titulo
+
+
+def anuncio(link, price, area=None, title="", site=None):
+    return {"link": link, "price": price, "area": area, "title": title, "site": site}
+
+
+def test_mesmo_imovel_por_preco_e_area():
+    a = anuncio("https://www.zapimoveis.com.br/1", 850000.0, 85.0)
+    assert mesmo_imovel(a, anuncio("https://www.vivareal.com.br/9", 860000.0, 86.0))
+    assert not mesmo_imovel(a, anuncio("https://www.vivareal.com.br/9", 860000.0, 120.0))
+    assert not mesmo_imovel(a, anuncio("https://www.vivareal.com.br/9", 900000.0, 85.0))
+    assert mesmo_imovel(a, anuncio(a["link"], 1500000.0))
+
+
+def test_mesmo_imovel_por_titulo_sem_area():
+    a = anuncio("a", 850000.0, title="Apartamento 3 quartos Rua Augusta Consolação à venda")
+    b = anuncio("b", 855000.0, title="Vende-se apartamento 3 quartos rua Augusta, Consolação - OLX")
+    c = anuncio("c", 855000.0, title="Casa térrea com quintal no Butantã")
+    assert mesmo_imovel(a, b)
+    assert not mesmo_imovel(a, c)
+
+
+def test_normalizar_titulo_e_dominio():
+    assert normalizar_titulo("Apartamento à Venda - ZAP") == "apartamento"
+    assert dominio("https://www.olx.com.br/imoveis/1") == "olx.com.br"
+
+
+def test_agrupar_compara_com_o_lider():
+    # 100 → 101,9 → 103,8: cada um está a 2% do anterior, mas o terceiro
+    # não está a 2% do líder e não é encadeado
+    anuncios = [anuncio(str(i), p, 80.0) for i, p in enumerate([1000000.0, 1019000.0, 1038000.0])]
+    assert agrupar(anuncios) == [[0, 1], [2]]
+
+
+def test_deduplicar():
+    anuncios = [
+        anuncio("https://www.zapimoveis.com.br/1", 850000.0, title="Apto Augusta"),
+        anuncio("https://www.vivareal.com.br/2", 852000.0, 85.0, "Apto Augusta", "vivareal.com.br"),
+        anuncio("https://www.olx.com.br/3", 640000.0, 60.0),
+        anuncio("https://www.olx.com.br/4", None),
+    ]
+    unicos = deduplicar(anuncios)
+    assert [(u["link"], u["duplicatas"]) for u in unicos] == [("https://www.vivareal.com.br/2", 2), ("https://www.olx.com.br/3", 1)]
+    assert unicos[0]["sites"] == ["vivareal.com.br", "zapimoveis.com.br"]
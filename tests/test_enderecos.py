@@ -0,0 +1,60 @@
+import pytest
+
+from leilao.comparaveis import BaseComparaveis
+from leilao.enderecos import IndiceTrigramas, distancia_edicao, normalizar_endereco, prepare_address
+
+
+@pytest.mark.parametrize("endereco, esperado", [
+    ("R. Augusta, nº 1.500", "rua augusta 1500"),
+    ("RUA AUGUSTA 1500", "rua augusta 1500"),
+    ("Av. Brig. Faria Lima, 3.477 - Itaim Bibi", "avenida brigadeiro faria lima 3477 itaim bibi"),
+    ("Praça da Sé, 12.345.678", "praca da se 12345678"),
+    ("Rua Nº 5, 100", "rua 5 100"),
+    ("Av. Paulista, 50, 201", "avenida paulista 50 201"),
+])
+def test_normalizar_endereco(endereco, esperado):
+    assert normalizar_endereco(endereco) == esperado
+
+
+@pytest.mark.parametrize("endereco, esperado", [
+    ("R. Augusta, 500", "augusta 500"),
+    ("Travessa Estrada Santa Cruz, 10", "estrada santa cruz 10"),
+    ("Rua Largo do Arouche, 50", "largo do arouche 50"),
+    ("Av. Est. de Israel, 3", "est de israel 3"),
+])
+def test_prepare_address_remove_so_o_tipo_inicial(endereco, esperado):
+    assert prepare_address(endereco) == esperado
+
+
+def test_distancia_edicao():
+    assert distancia_edicao("brigadero", "brigadeiro") == 1
+    assert distancia_edicao("fradqiue", "fradique") == 1
+    assert distancia_edicao("paulistano", "paulista") == 2
+
+
+@pytest.mark.parametrize("grafia, esperado", [
+    ("brigadero", "brigadeiro"),
+    ("pinheros", "pinheiros"),
+    ("augusto", None),
+    ("paulistano", None),
+    ("farias", None),
+])
+def test_mais_proximo_so_corrige_erros_de_digitacao(grafia, esperado):
+    indice = IndiceTrigramas(["brigadeiro", "pinheiros", "augusta", "paulista", "faria"])
+    assert indice.mais_proximo(grafia) == esperado
+
+
+def test_base_nao_funde_ruas_parecidas():
+    base = BaseComparaveis(":memory:")
+    base.ingerir([{"link": "a", "price": 500000.0, "area": 50}], "Rua Augusta, 100, Consolação, São Paulo")
+    base.ingerir([{"link": "b", "price": 700000.0, "area": 50}], "Rua Augusto, 100, Consolação, São Paulo")
+    assert [a["link"] for a in base.vizinhos("Rua Augusto 100")] == ["b"]
+    assert [a["link"] for a in base.vizinhos("Rua Augusta 100")] == ["a"]
+
+
+def test_base_corrige_grafia_com_erro():
+    base = BaseComparaveis(":memory:")
+    assert base.canonizar("R. Brigadero Tobias, 10") == "rua brigadero tobias 10"
+    base.ingerir([{"link": "a", "price": 500000.0, "area": 50}], "Rua Brigadeiro Tobias, 10, Luz, São Paulo")
+    assert base.canonizar("R. Brigadero Tobias, 10") == "rua brigadeiro tobias 10"
+    assert [a["link"] for a in base.vizinhos("R. Brigadero Tobias, 10")] == ["a"]
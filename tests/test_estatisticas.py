@@ -0,0 +1,70 @@
+import pytest
+
+from leilao.estatisticas import ResumoStreaming, estatisticas_comparaveis, media_aparada, rejeitar_outliers, resumir
+
+
+def test_quantis_exatos():
+    resumo = ResumoStreaming().estender([5.0, 1.0, 3.0, 2.0, 4.0])
+    assert resumo.exato
+    assert resumo.mediana() == 3.0
+    assert resumo.quantil(0.25) == 2.0
+    assert resumo.quantil(0.1) == pytest.approx(1.4)
+    assert ResumoStreaming().mediana() is None
+
+
+def test_reservatorio_mantem_contagem_e_extremos():
+    resumo = ResumoStreaming(capacidade=100).estender(range(10000))
+    assert not resumo.exato
+    assert (resumo.n, resumo.minimo, resumo.maximo) == (10000, 0, 9999)
+    assert len(resumo.amostra()) == 100
+    assert 3000 < resumo.mediana() < 7000
+
+
+@pytest.mark.parametrize("metodo", ["mad", "iqr"])
+def test_rejeita_outlier(metodo):
+    dentro, fora = rejeitar_outliers(sorted([800e3, 850e3, 900e3, 870e3, 820e3, 20e6]), metodo)
+    assert fora == [20e6]
+    assert 20e6 not in dentro
+
+
+def test_sem_dispersao_nada_e_rejeitado():
+    assert rejeitar_outliers([1.0, 1.0, 1.0, 5.0]) == ([1.0, 1.0, 1.0, 5.0], [])
+    assert rejeitar_outliers([1.0, 100.0]) == ([1.0, 100.0], [])
+
+
+def test_metodo_desconhecido():
+    with pytest.raises(ValueError):
+        rejeitar_outliers([1.0, 2.0, 3.0], "z")
+
+
+def test_media_aparada():
+    assert media_aparada(list(range(10)) + [1000], 0.1) == pytest.approx(5.0)
+
+
+def test_resumir():
+    resumo = resumir([800e3, 850e3, 900e3, 20e6])
+    assert resumo["n"] == 4
+    assert resumo["n_considerados"] == 3
+    assert resumo["mediana"] == 850e3
+    assert resumir([]) is None
+
+
+def test_outlier_de_preco_sai_tambem_do_preco_m2():
+    anuncios = [{"price": p, "area": a} for p, a in [
+        (800e3, 80), (900e3, 90), (850e3, 85), (700e3, 70), (950e3, 100),
+        (20e6, 85),  # preço digitado com zeros a mais
+    ]]
+    estatisticas = estatisticas_comparaveis(anuncios, area_m2=80)
+    assert estatisticas["preco"]["rejeitados"] == [20e6]
+    assert estatisticas["preco_m2"]["n"] == 6
+    assert estatisticas["preco_m2"]["n_considerados"] == 5
+    assert max(estatisticas["preco_m2"]["rejeitados"]) == pytest.approx(20e6 / 85)
+    assert estatisticas["base"] == "m2"
+    assert estatisticas["valor_estimado"] == pytest.approx(10000 * 80)
+
+
+def test_sem_area_estima_pela_mediana_dos_precos():
+    estatisticas = estatisticas_comparaveis([{"price": p} for p in (500e3, 600e3, 700e3)], area_m2=80)
+    assert estatisticas["preco_m2"] is None
+    assert (estatisticas["base"], estatisticas["valor_estimado"]) == ("preco", 600e3)
+    assert estatisticas_comparaveis([]) is None
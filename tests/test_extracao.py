@@ -0,0 +1,56 @@
+import pytest
+
+from leilao.extracao import Extracao, extract_prices_from_search, extrair, extrair_anuncios, numero_br
+from leilao.formatacao import format_number, parse_number
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("Apartamento 100 m² por R$ 1,2 mi", Extracao(1200000.0, 100.0, 12000.0)),
+    ("R$ 850 mil, 85,5 metros quadrados", Extracao(850000.0, 85.5, 850000.0 / 85.5)),
+    ("R$ 8.500/m² · 80 m2", Extracao(680000.0, 80.0, 8500.0)),
+    ("R$2,5 milhões 200m²", Extracao(2500000.0, 200.0, 12500.0)),
+    ("Cobertura R$ 1.250.000,00 - 3 quartos", Extracao(1250000.0)),
+    ("R$ 5 (taxa)  R$ 700.000", Extracao(700000.0)),
+    ("Condomínio R$ 1.500 IPTU R$ 300", Extracao()),
+    ("sem números", Extracao()),
+])
+def test_extrair(texto, esperado):
+    assert extrair(texto) == pytest.approx(esperado)
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("1.234.567,89", 1234567.89),
+    ("1,2", 1.2),
+    ("2.5", 2.5),
+    ("1.500", 1500.0),
+    ("850", 850.0),
+])
+def test_numero_br(texto, esperado):
+    assert numero_br(texto) == esperado
+
+
+def test_parse_e_format_number():
+    assert parse_number("1.234.567,89") == 1234567.89
+    assert parse_number("") == 0.0
+    assert parse_number(3) == 3.0
+    assert format_number("1234567") == "1.234.567"
+    assert format_number("1.234") == "1.234"
+    assert format_number("abc") == "abc"
+
+
+def test_extrair_anuncios_primeiro_preco_por_portal():
+    respostas = {
+        "zapimoveis.com.br": [
+            {"title": "Apto sem preço", "snippet": "3 quartos", "link": "a"},
+            {"title": "Apto R$ 900 mil", "snippet": "90 m²", "link": "b"},
+            {"title": "Apto R$ 950 mil", "snippet": "", "link": "c"},
+        ],
+        "olx.com.br": RuntimeError("falhou"),
+    }
+    anuncios = extrair_anuncios(respostas)
+    assert [(a["link"], a["price"], a["area"]) for a in anuncios] == [("b", 900000.0, 90.0)]
+
+
+def test_extract_prices_from_search():
+    resultados = [{"title": "R$ 500.000", "snippet": "ou R$ 50.000 de entrada"}, {"title": "R$ 500.000,00"}]
+    assert extract_prices_from_search(resultados) == [500000.0]
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from leilao.calculo import simular
+from leilao.fluxo import fluxo_caixa, simular_fluxo, taxa_mensal, tir, vpl
+
+PARAMETROS = {
+    "valor_lance": 500000.0,
+    "valor_mercado": 1000000.0,
+    "area_m2": 100.0,
+    "custo_reforma_m2": 1000.0,
+    "iptu_mensal": 100.0,
+    "condominio_mensal": 1500.0,
+    "prazo_venda_meses": 12,
+    "assessoria_percent": 6.0,
+    "comissao_venda_percent": 5.0,
+}
+AGIOS = [0.0, 20.0, 40.0, 80.0]
+
+
+def test_vpl_e_tir_de_fluxos_conhecidos():
+    fluxos = np.array([[-100.0, 110.0, 0.0], [-100.0, 0.0, 121.0], [-100.0, 50.0, 50.0]])
+    assert vpl(fluxos, 0.1) == pytest.approx([0.0, 0.0, -100 + 50 / 1.1 + 50 / 1.21])
+    assert tir(fluxos) == pytest.approx([0.1, 0.1, 0.0], abs=1e-12)
+
+
+def test_tir_inexistente():
+    assert np.isnan(tir([[100.0, 50.0], [-100.0, -50.0]])).all()
+
+
+def test_taxa_mensal():
+    assert (1 + taxa_mensal(12.0)) ** 12 == pytest.approx(1.12)
+
+
+@pytest.mark.parametrize("condicoes", [{}, {"entrada_percent": 25.0, "parcelas": 30}, {"entrada_percent": 25.0, "parcelas": 6}])
+def test_soma_do_fluxo_e_o_resultado(condicoes):
+    fluxo = fluxo_caixa(PARAMETROS, AGIOS, **condicoes)
+    np.testing.assert_allclose(fluxo["total"].sum(axis=-1), simular(**PARAMETROS, agio_percent=AGIOS)["resultado"])
+    assert fluxo["total"].shape == (len(AGIOS), PARAMETROS["prazo_venda_meses"] + 1)
+
+
+def test_simular_fluxo():
+    r = simular_fluxo(PARAMETROS, AGIOS, 10.0, entrada_percent=25.0, parcelas=30)
+    total = fluxo_caixa(PARAMETROS, AGIOS, entrada_percent=25.0, parcelas=30)["total"]
+    np.testing.assert_allclose(vpl(total, r["tir_mensal"] / 100), 0.0, atol=1e-4)
+    np.testing.assert_allclose(r["tir_anual"], ((1 + r["tir_mensal"] / 100) ** 12 - 1) * 100)
+    np.testing.assert_allclose(r["vpl"], vpl(total, taxa_mensal(10.0)))
+    np.testing.assert_allclose(r["exposicao_maxima"], -np.cumsum(total, axis=-1).min(axis=-1))
+    assert np.all(np.diff(r["tir_mensal"]) < 0)
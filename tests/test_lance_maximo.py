@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+from leilao.lance_maximo import lance_maximo, lance_maximo_bisseccao
+
+PARAMETROS = {
+    "valor_lance": 500000.0,
+    "valor_mercado": 1000000.0,
+    "area_m2": 100.0,
+    "custo_reforma_m2": 1000.0,
+    "iptu_mensal": 100.0,
+    "condominio_mensal": 1500.0,
+    "prazo_venda_meses": 12,
+    "assessoria_percent": 6.0,
+    "comissao_venda_percent": 0.0,
+}
+
+
+@pytest.mark.parametrize("meta", [
+    {"resultado_minimo": 100000.0},
+    {"resultado_minimo": -50000.0},
+    {"rendimento_mensal_minimo": 1.0},
+    {"percentual_minimo": 20.0},
+])
+def test_forma_fechada_atinge_a_meta_no_limite(meta):
+    maximo = lance_maximo(PARAMETROS, **meta)
+    if "resultado_minimo" in meta:
+        assert maximo["resultado"] == pytest.approx(meta["resultado_minimo"], abs=0.01)
+    elif "rendimento_mensal_minimo" in meta:
+        assert maximo["rendimento_mensal"] == pytest.approx(meta["rendimento_mensal_minimo"], abs=1e-6)
+    else:
+        assert maximo["percentual"] == pytest.approx(meta["percentual_minimo"], abs=1e-6)
+
+
+def test_forma_fechada_igual_a_bisseccao():
+    for resultado_minimo in (-200000.0, 0.0, 50000.0, 150000.0):
+        fechado = lance_maximo(PARAMETROS, resultado_minimo=resultado_minimo)
+        bisseccao = lance_maximo_bisseccao(PARAMETROS, lambda r: r["resultado"] >= resultado_minimo)
+        assert fechado["valor_arremate"] == pytest.approx(bisseccao["valor_arremate"], abs=0.02)
+
+
+def test_detalhe_no_valor_resolvido():
+    # O detalhamento é simulado no arremate calculado, e não no lance inicial
+    maximo = lance_maximo(PARAMETROS, resultado_minimo=100000.0)
+    assert maximo["total_investido"] == pytest.approx(PARAMETROS["valor_mercado"] - 100000.0, abs=1e-6)
+    assert math.isclose(PARAMETROS["valor_lance"] * (1 + maximo["agio_percent"] / 100), maximo["valor_arremate"], rel_tol=1e-12)
+    assert maximo["valor_arremate"] != pytest.approx(PARAMETROS["valor_lance"])
+
+
+def test_meta_inatingivel():
+    assert lance_maximo(PARAMETROS, resultado_minimo=2000000.0) is None
+
+
+def test_lance_inicial_nao_positivo():
+    with pytest.raises(ValueError):
+        lance_maximo(dict(PARAMETROS, valor_lance=0.0), resultado_minimo=100000.0)
+    with pytest.raises(ValueError):
+        lance_maximo_bisseccao(dict(PARAMETROS, valor_lance=-1.0), lambda r: True)
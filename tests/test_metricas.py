@@ -0,0 +1,56 @@
+import contextvars
+import json
+import threading
+
+from leilao.metricas import METRICAS, Metricas, iniciar_rodada, medir
+
+
+def test_resumo_e_janela():
+    metricas = Metricas(janela=3)
+    for segundos in (0.5, 0.1, 0.2, 0.3):
+        metricas.registrar("busca", segundos, site="olx.com.br")
+    metricas.contar("consultas", site="olx.com.br")
+    metricas.contar("consultas", 2, site="olx.com.br")
+    resumo = metricas.resumo()
+    [etapa] = resumo["etapas"]
+    # Contagem e soma cobrem tudo; os percentis só as últimas `janela` durações
+    assert (etapa["n"], etapa["soma"]) == (4, 1.1)
+    assert (etapa["p50"], etapa["p95"], etapa["max"]) == (0.2, 0.3, 0.3)
+    assert resumo["contadores"] == [{"nome": "consultas", "rotulos": {"site": "olx.com.br"}, "valor": 3}]
+
+
+def test_prometheus():
+    metricas = Metricas()
+    metricas.registrar("calculo", 0.25)
+    metricas.contar("erros", site='a"b')
+    texto = metricas.prometheus()
+    assert 'leilao_etapa_segundos{etapa="calculo",quantile="0.5"} 0.250000' in texto
+    assert 'leilao_etapa_segundos_count{etapa="calculo"} 1' in texto
+    assert "# TYPE leilao_erros_total counter" in texto
+    assert 'leilao_erros_total{site="a\\"b"} 1' in texto
+
+
+def test_gravar(tmp_path):
+    metricas = Metricas()
+    metricas.contar("consultas")
+    metricas.gravar(str(tmp_path / "m.json"))
+    metricas.gravar(str(tmp_path / "m.prom"))
+    assert json.loads((tmp_path / "m.json").read_text())["contadores"][0]["valor"] == 1
+    assert "leilao_consultas_total 1" in (tmp_path / "m.prom").read_text()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["m.json", "m.prom"]
+
+
+def test_rodada_inclui_threads_com_contexto_copiado():
+    rodada = iniciar_rodada()
+    with medir("teste_rodada"):
+        pass
+
+    def buscar():
+        with medir("teste_rodada", site="zap"):
+            pass
+
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(buscar,))
+    thread.start()
+    thread.join()
+    assert [m.get("site") for m in rodada] == [None, "zap"]
+    assert any(e["etapa"] == "teste_rodada" for e in METRICAS.resumo()["etapas"])
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from leilao.fluxo import simular_fluxo
+from leilao.otimizacao import OBJETIVOS, CurvaLogistica, otimizar_lance
+
+PARAMETROS = {
+    "valor_lance": 500000.0,
+    "valor_mercado": 1000000.0,
+    "area_m2": 100.0,
+    "custo_reforma_m2": 1000.0,
+    "iptu_mensal": 100.0,
+    "condominio_mensal": 1500.0,
+    "prazo_venda_meses": 12,
+    "assessoria_percent": 6.0,
+    "comissao_venda_percent": 0.0,
+}
+AGIOS = [0.0, 10.0, 20.0, 40.0, 80.0]
+
+
+def test_objetivos_so_em_reais():
+    assert set(OBJETIVOS) == {"resultado", "vpl"}
+    with pytest.raises(ValueError):
+        otimizar_lance(PARAMETROS, CurvaLogistica(), AGIOS, objetivo="tir")
+
+
+def test_vpl_esperado_e_chance_vezes_vpl():
+    curva = CurvaLogistica(mediana=20.0, escala=5.0)
+    otimo = otimizar_lance(PARAMETROS, curva, AGIOS, objetivo="vpl", taxa_desconto_anual_percent=10.0)
+    vpl = simular_fluxo(PARAMETROS, AGIOS, 10.0)["vpl"]
+    np.testing.assert_allclose(otimo["valor"], vpl)
+    np.testing.assert_allclose(otimo["esperado"], curva(np.array(AGIOS)) * vpl)
+    assert otimo["otimo"]["esperado"] == pytest.approx(max(otimo["esperado"]))
+
+
+def test_sem_lance_positivo():
+    assert otimizar_lance(dict(PARAMETROS, valor_mercado=400000.0), CurvaLogistica(), AGIOS)["otimo"] is None
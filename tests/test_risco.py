@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from leilao.calculo import simular
+from leilao.risco import percentis, simular_risco, sortear_preco, sortear_prazo
+
+PARAMETROS = {
+    "valor_lance": 500000.0,
+    "valor_mercado": 1000000.0,
+    "area_m2": 100.0,
+    "custo_reforma_m2": 1000.0,
+    "iptu_mensal": 100.0,
+    "condominio_mensal": 1500.0,
+    "prazo_venda_meses": 12,
+    "assessoria_percent": 6.0,
+    "comissao_venda_percent": 0.0,
+}
+
+
+def test_preco_constante_com_minimo_igual_ao_maximo():
+    rng = np.random.default_rng(0)
+    assert np.all(sortear_preco(rng, (900000.0, 900000.0, 900000.0), 1000) == 900000.0)
+    precos = sortear_preco(rng, (800000.0, 1200000.0, 1000000.0), 1000)
+    assert precos.min() >= 800000.0 and precos.max() <= 1000000.0
+
+
+def test_sem_incerteza_igual_ao_deterministico():
+    agios = [0.0, 20.0, 40.0]
+    resumo = simular_risco(PARAMETROS, agios, (1e6, 1e6, 1e6), {12: 1.0}, (1000.0, 1000.0), n=1000, seed=1)
+    esperado = simular(**PARAMETROS, agio_percent=agios)
+    for p in (5, 50, 95):
+        np.testing.assert_allclose(resumo[f"resultado_p{p}"], esperado["resultado"])
+        np.testing.assert_allclose(resumo[f"rendimento_mensal_p{p}"], esperado["rendimento_mensal"])
+    np.testing.assert_array_equal(resumo["prob_prejuizo"], esperado["resultado"] < 0)
+
+
+@pytest.mark.parametrize("n", [101, 200_000])
+def test_percentis_exatos(n):
+    valores = np.random.default_rng(n).normal(size=n)
+    postos = np.round(np.array([5, 50, 95]) / 100 * (n - 1)).astype(int)
+    np.testing.assert_array_equal(percentis(valores), np.sort(valores)[postos])
+
+
+def test_prazo_discreto_e_poisson():
+    rng = np.random.default_rng(0)
+    assert set(sortear_prazo(rng, {6: 1, 18: 3}, 1000)) <= {6.0, 18.0}
+    assert sortear_prazo(rng, 0.01, 1000).min() == 1.0